@@ -28,6 +28,22 @@ router = APIRouter()
 logger = logging.getLogger(__name__)
 
 
+def _broadcast_read(broadcast) -> BroadcastRead:
+    """Схема рассылки с именами автора, группы и факультета (одна валидация)"""
+    return BroadcastRead(
+        id=broadcast.id,
+        title=broadcast.title,
+        message=broadcast.message,
+        group_id=broadcast.group_id,
+        faculty_id=broadcast.faculty_id,
+        author_user_id=broadcast.author_user_id,
+        created_at=broadcast.created_at,
+        author_full_name=broadcast.author.full_name if broadcast.author else None,
+        group_name=broadcast.group.name if broadcast.group else None,
+        faculty_name=broadcast.faculty.title if broadcast.faculty else None,
+    )
+
+
 @router.get("", response_model=List[BroadcastRead], summary="Получить рассылки")
 def get_broadcasts(
     group_id: Optional[uuid.UUID] = None,
@@ -48,17 +64,7 @@ def get_broadcasts(
     else:
         broadcasts = []
 
-    result = []
-    for broadcast in broadcasts:
-        payload = BroadcastRead.model_validate(broadcast).model_dump()
-        if broadcast.author:
-            payload["author_full_name"] = broadcast.author.full_name
-        if broadcast.group:
-            payload["group_name"] = broadcast.group.name
-        if broadcast.faculty:
-            payload["faculty_name"] = broadcast.faculty.name
-        result.append(BroadcastRead(**payload))
-    return result
+    return [_broadcast_read(broadcast) for broadcast in broadcasts]
 
 
 @router.get("/my", response_model=List[BroadcastRead], summary="Мои рассылки (для преподавателей)")
@@ -74,17 +80,7 @@ def get_my_broadcasts(
         )
 
     broadcasts = get_teacher_broadcasts(db, current_user.id)
-    result = []
-    for broadcast in broadcasts:
-        payload = BroadcastRead.model_validate(broadcast).model_dump()
-        if broadcast.author:
-            payload["author_full_name"] = broadcast.author.full_name
-        if broadcast.group:
-            payload["group_name"] = broadcast.group.name
-        if broadcast.faculty:
-            payload["faculty_name"] = broadcast.faculty.name
-        result.append(BroadcastRead(**payload))
-    return result
+    return [_broadcast_read(broadcast) for broadcast in broadcasts]
 
 
 @router.get("/{broadcast_id}", response_model=BroadcastRead, summary="Получить рассылку по ID")
@@ -98,14 +94,7 @@ def get_broadcast_details(
     if not broadcast:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Рассылка не найдена")
 
-    payload = BroadcastRead.model_validate(broadcast).model_dump()
-    if broadcast.author:
-        payload["author_full_name"] = broadcast.author.full_name
-    if broadcast.group:
-        payload["group_name"] = broadcast.group.name
-    if broadcast.faculty:
-        payload["faculty_name"] = broadcast.faculty.name
-    return BroadcastRead(**payload)
+    return _broadcast_read(broadcast)
 
 
 @router.post("", response_model=BroadcastRead, status_code=status.HTTP_201_CREATED, summary="Создать рассылку")
@@ -121,14 +110,7 @@ def create_broadcast_endpoint(
         broadcast = create_broadcast(db, broadcast_data=broadcast_data, author_user_id=current_user.id)
         _push_broadcast_to_bot(db, broadcast, current_user)
 
-        payload = BroadcastRead.model_validate(broadcast).model_dump()
-        if broadcast.author:
-            payload["author_full_name"] = broadcast.author.full_name
-        if broadcast.group:
-            payload["group_name"] = broadcast.group.name
-        if broadcast.faculty:
-            payload["faculty_name"] = broadcast.faculty.name
-        return BroadcastRead(**payload)
+        return _broadcast_read(broadcast)
     except ValueError as exc:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
 
@@ -1,61 +1,87 @@
 """
 Элективы (факультативные курсы)
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 from typing import List, Optional
 import uuid
 
 from app.db.session import get_db
 from app.models.user import User, UserRole
+from app.models.waitlist import WaitlistKind
 from app.schemas.elective import (
-    ElectiveCreate, ElectiveUpdate, ElectiveRead, ElectiveRegistrationRead
+    ElectiveCreate, ElectiveUpdate, ElectiveRead, ElectiveRegistrationRead,
+    ElectivePreferenceRead, ElectivePreferencesUpdate,
 )
+from app.schemas.waitlist import WaitlistPositionRead
 from app.services.elective_service import (
     get_elective_by_id,
     get_all_electives,
+    get_electives_version,
+    get_registered_elective_ids,
+    get_user_registrations_version,
     get_user_electives,
     create_elective,
     update_elective,
     register_for_elective,
     unregister_from_elective,
     is_user_registered,
+    join_elective_waitlist,
+    leave_elective_waitlist,
+    get_elective_waitlist_position,
 )
+from app.services.elective_allocation_service import get_elective_preferences, set_elective_preferences
 from app.api.deps import get_current_active_user, get_current_admin, get_optional_current_user
+from app.services.response_cache import cached_json_response
+from app.services.waitlist_service import get_waitlist_size
 
 router = APIRouter()
 
 
 @router.get("", response_model=List[ElectiveRead], summary="Список элективов")
 def get_electives_list(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
     active_only: bool = True,
     current_user: Optional[User] = Depends(get_optional_current_user),
     db: Session = Depends(get_db)
-) -> List[ElectiveRead]:
-    """Получить список всех доступных элективов"""
-    electives = get_all_electives(db, skip=skip, limit=limit, active_only=active_only)
-    
-    result = []
-    for elective in electives:
-        elective_dict = ElectiveRead.model_validate(elective).model_dump()
-        
-        # Добавляем имя преподавателя
-        if elective.teacher:
-            elective_dict["teacher_full_name"] = elective.teacher.full_name
-        
-        # Проверяем, записан ли пользователь (если авторизован)
+):
+    """Получить список всех доступных элективов (с ETag, см. response_cache)"""
+    validator, last_updated = get_electives_version(db, active_only=active_only)
+    key = f"electives:{request.url.query}"
+    if current_user:
+        validator += ":" + get_user_registrations_version(db, current_user.id)
+        key += f":{current_user.id}"
+
+    def render() -> List[ElectiveRead]:
+        electives = get_all_electives(db, skip=skip, limit=limit, active_only=active_only)
+        registered = set()
         if current_user:
-            elective_dict["is_registered"] = is_user_registered(
-                db, elective_id=elective.id, user_id=current_user.id
+            registered = get_registered_elective_ids(
+                db, user_id=current_user.id, elective_ids=[elective.id for elective in electives]
             )
-        else:
-            elective_dict["is_registered"] = False
-        
-        result.append(ElectiveRead(**elective_dict))
-    
-    return result
+
+        result = []
+        for elective in electives:
+            elective_dict = ElectiveRead.model_validate(elective).model_dump()
+
+            # Добавляем имя преподавателя
+            if elective.teacher:
+                elective_dict["teacher_full_name"] = elective.teacher.full_name
+
+            elective_dict["is_registered"] = elective.id in registered
+            result.append(ElectiveRead(**elective_dict))
+        return result
+
+    return cached_json_response(
+        request,
+        key=key,
+        validator=validator,
+        render=render,
+        shared=current_user is None,
+        last_modified=last_updated,
+    )
 
 
 @router.get("/my", response_model=List[ElectiveRead], summary="Мои элективы")
@@ -80,6 +106,47 @@ def get_my_electives(
     return result
 
 
+def _preferences_read(preferences) -> List[ElectivePreferenceRead]:
+    return [
+        ElectivePreferenceRead(elective_id=item.elective_id, rank=item.rank, title=item.elective.title)
+        for item in preferences
+    ]
+
+
+@router.get("/preferences", response_model=List[ElectivePreferenceRead], summary="Мои приоритеты элективов")
+def get_my_elective_preferences(
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+) -> List[ElectivePreferenceRead]:
+    """Ранжированный список элективов для пакетного распределения"""
+    return _preferences_read(get_elective_preferences(db, user_id=current_user.id))
+
+
+@router.put("/preferences", response_model=List[ElectivePreferenceRead], summary="Указать приоритеты элективов")
+def set_my_elective_preferences(
+    data: ElectivePreferencesUpdate,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+) -> List[ElectivePreferenceRead]:
+    """
+    Заменить список приоритетов (только для студентов)
+
+    Места распределяет фоновая задача electives.allocate
+    (POST /jobs/electives.allocate/run); пустой список — отказаться от участия.
+    """
+    if current_user.role != UserRole.STUDENT:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Запись на элективы доступна только для студентов"
+        )
+
+    try:
+        preferences = set_elective_preferences(db, user_id=current_user.id, elective_ids=data.elective_ids)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return _preferences_read(preferences)
+
+
 @router.get("/{elective_id}", response_model=ElectiveRead, summary="Детали электива")
 def get_elective_details(
     elective_id: uuid.UUID,
@@ -184,3 +251,53 @@ def unregister_from_elective_endpoint(
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
+
+@router.post("/{elective_id}/waitlist", response_model=WaitlistPositionRead, summary="Встать в лист ожидания")
+def join_elective_waitlist_endpoint(
+    elective_id: uuid.UUID,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+) -> WaitlistPositionRead:
+    """Встать в очередь, когда мест нет; повторный вызов возвращает текущее место (только для студентов)"""
+    if current_user.role != UserRole.STUDENT:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Запись на элективы доступна только для студентов"
+        )
+    
+    try:
+        position = join_elective_waitlist(db, elective_id=elective_id, user_id=current_user.id)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return WaitlistPositionRead(
+        position=position,
+        size=get_waitlist_size(db, kind=WaitlistKind.ELECTIVE, target_id=elective_id),
+    )
+
+
+@router.get("/{elective_id}/waitlist", response_model=WaitlistPositionRead, summary="Место в листе ожидания")
+def get_elective_waitlist_endpoint(
+    elective_id: uuid.UUID,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+) -> WaitlistPositionRead:
+    """Место текущего пользователя в очереди электива"""
+    return WaitlistPositionRead(
+        position=get_elective_waitlist_position(db, elective_id=elective_id, user_id=current_user.id),
+        size=get_waitlist_size(db, kind=WaitlistKind.ELECTIVE, target_id=elective_id),
+    )
+
+
+@router.delete("/{elective_id}/waitlist", status_code=status.HTTP_204_NO_CONTENT, summary="Выйти из листа ожидания")
+def leave_elective_waitlist_endpoint(
+    elective_id: uuid.UUID,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Выйти из листа ожидания электива"""
+    try:
+        leave_elective_waitlist(db, elective_id=elective_id, user_id=current_user.id)
+        return None
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
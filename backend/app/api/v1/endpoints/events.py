@@ -1,81 +1,163 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, UploadFile, File, Query, Request, status
 from sqlalchemy.orm import Session
 from typing import List, Optional
+from datetime import datetime
 import uuid
 import json
 from pathlib import Path
 
 from app.db.session import get_db
 from app.models.user import User, UserRole
-from app.schemas.event import EventCreate, EventUpdate, EventRead, EventRegistrationRead
+from app.models.event import EventType, EventFormat
+from app.models.waitlist import WaitlistKind
+from app.schemas.event import EventCreate, EventUpdate, EventRead, EventRegistrationRead, EventFacets, TopicFacet
+from app.schemas.waitlist import WaitlistPositionRead
 from app.services.event_service import (
+    EventFilters,
     get_event_by_id,
     get_all_events,
+    get_event_facets,
+    get_events_version,
+    get_registered_event_ids,
+    get_user_registrations_version,
     get_user_events,
     create_event,
     update_event,
     register_for_event,
     unregister_from_event,
     is_user_registered,
+    join_event_waitlist,
+    leave_event_waitlist,
+    get_event_waitlist_position,
 )
 from app.api.deps import get_current_active_user, get_current_admin, get_optional_current_user
 from app.core.config import settings
+from app.services.event_image_service import event_image_srcset, process_event_image
+from app.services.response_cache import cached_json_response
+from app.services.waitlist_service import get_waitlist_size
+from app.services.upload_utils import UploadTooLargeError, stream_upload_to_dir
 
 router = APIRouter()
 
 
+def event_filters(
+    upcoming_only: bool = True,
+    event_type: Optional[EventType] = None,
+    format: Optional[EventFormat] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    topic: Optional[List[str]] = Query(default=None, description="Темы (подходит любая из них)"),
+    has_free_seats: Optional[bool] = None,
+    price_min: Optional[int] = Query(default=None, ge=0, description="Минимальная цена, коп."),
+    price_max: Optional[int] = Query(default=None, ge=0, description="Максимальная цена, коп."),
+) -> EventFilters:
+    """Фильтры ленты из параметров запроса"""
+    return EventFilters(
+        upcoming_only=upcoming_only,
+        event_type=event_type,
+        format=format,
+        date_from=date_from,
+        date_to=date_to,
+        topics=topic or [],
+        has_free_seats=has_free_seats,
+        price_min=price_min,
+        price_max=price_max,
+    )
+
+
+def _event_read(event, *, is_registered: bool) -> EventRead:
+    """Схема мероприятия из модели (одна валидация; topics хранятся в БД как JSON)"""
+    topics_list = []
+    if event.topics:
+        try:
+            topics_list = json.loads(event.topics)
+        except ValueError:
+            topics_list = []
+
+    return EventRead(
+        id=event.id,
+        title=event.title,
+        description=event.description,
+        date=event.date,
+        end_time=event.end_time,
+        event_type=event.event_type,
+        price=event.price,
+        format=event.format,
+        location=event.location,
+        max_participants=event.max_participants,
+        current_participants=event.current_participants,
+        image_url=event.image_url,
+        image_srcset=event_image_srcset(event),
+        speaker_name=event.speaker_name,
+        speaker_bio=event.speaker_bio,
+        topics=topics_list,
+        created_at=event.created_at,
+        updated_at=event.updated_at,
+        is_registered=is_registered,
+    )
+
+
 @router.get("", response_model=List[EventRead], summary="Лента событий")
 def get_events_feed(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
-    upcoming_only: bool = True,
+    filters: EventFilters = Depends(event_filters),
     current_user: Optional[User] = Depends(get_optional_current_user),
     db: Session = Depends(get_db)
-) -> List[EventRead]:
-    """Получить ленту всех мероприятий"""
-    events = get_all_events(db, skip=skip, limit=limit, upcoming_only=upcoming_only)
-    
-    result = []
-    for event in events:
-        # Парсим topics из JSON перед валидацией
-        topics_list = []
-        if event.topics:
-            try:
-                topics_list = json.loads(event.topics)
-            except:
-                topics_list = []
-        
-        # Создаем словарь для валидации, исключая topics из модели
-        event_data = {
-            "id": event.id,
-            "title": event.title,
-            "description": event.description,
-            "date": event.date,
-            "end_time": event.end_time,
-            "event_type": event.event_type,
-            "price": event.price,
-            "format": event.format,
-            "location": event.location,
-            "max_participants": event.max_participants,
-            "current_participants": event.current_participants,
-            "image_url": event.image_url,
-            "speaker_name": event.speaker_name,
-            "speaker_bio": event.speaker_bio,
-            "topics": topics_list,  # Уже распарсенный список
-            "created_at": event.created_at,
-            "updated_at": event.updated_at,
-            "is_registered": False,
-        }
-        
-        # Проверяем, записан ли пользователь
+):
+    """
+    Получить ленту мероприятий (фильтрация выполняется в БД)
+
+    Ответ помечается ETag; при совпадающем If-None-Match возвращается 304
+    без выборки мероприятий. Лента анонимного пользователя одинакова для
+    всех и кэшируется в памяти процесса.
+    """
+    validator, last_updated = get_events_version(db, filters)
+    key = f"events:{request.url.query}"
+    if current_user:
+        validator += ":" + get_user_registrations_version(db, current_user.id)
+        key += f":{current_user.id}"
+
+    def render() -> List[EventRead]:
+        events = get_all_events(db, skip=skip, limit=limit, filters=filters)
+        registered = set()
         if current_user:
-            event_data["is_registered"] = is_user_registered(
-                db, event_id=event.id, user_id=current_user.id
+            registered = get_registered_event_ids(
+                db, user_id=current_user.id, event_ids=[event.id for event in events]
             )
-        
-        result.append(EventRead(**event_data))
-    
-    return result
+
+        return [_event_read(event, is_registered=event.id in registered) for event in events]
+
+    return cached_json_response(
+        request,
+        key=key,
+        validator=validator,
+        render=render,
+        shared=current_user is None,
+        last_modified=last_updated,
+    )
+
+
+@router.get("/facets", response_model=EventFacets, summary="Фасеты ленты событий")
+def get_events_facets(
+    filters: EventFilters = Depends(event_filters),
+    db: Session = Depends(get_db),
+) -> EventFacets:
+    """
+    Количество мероприятий по типу, формату, темам и наличию мест
+
+    Принимает те же фильтры, что и лента. Счётчики каждого фасета
+    считаются без его собственного фильтра.
+    """
+    facets = get_event_facets(db, filters)
+    return EventFacets(
+        total=facets.total,
+        event_type=facets.event_type,
+        format=facets.format,
+        topics=[TopicFacet(name=name, count=count) for name, count in facets.topics],
+        with_free_seats=facets.with_free_seats,
+    )
 
 
 @router.get("/my", response_model=List[EventRead], summary="Мои события")
@@ -85,42 +167,8 @@ def get_my_events(
 ) -> List[EventRead]:
     """Получить мероприятия, на которые записан пользователь"""
     events = get_user_events(db, current_user.id)
-    
-    result = []
-    for event in events:
-        # Парсим topics из JSON перед валидацией
-        topics_list = []
-        if event.topics:
-            try:
-                topics_list = json.loads(event.topics)
-            except:
-                topics_list = []
-        
-        # Создаем словарь для валидации
-        event_data = {
-            "id": event.id,
-            "title": event.title,
-            "description": event.description,
-            "date": event.date,
-            "end_time": event.end_time,
-            "event_type": event.event_type,
-            "price": event.price,
-            "format": event.format,
-            "location": event.location,
-            "max_participants": event.max_participants,
-            "current_participants": event.current_participants,
-            "image_url": event.image_url,
-            "speaker_name": event.speaker_name,
-            "speaker_bio": event.speaker_bio,
-            "topics": topics_list,  # Уже распарсенный список
-            "created_at": event.created_at,
-            "updated_at": event.updated_at,
-            "is_registered": True,  # Всегда True для "Мои события"
-        }
-        
-        result.append(EventRead(**event_data))
-    
-    return result
+    # Всегда True для "Мои события"
+    return [_event_read(event, is_registered=True) for event in events]
 
 
 @router.get("/{event_id}", response_model=EventRead, summary="Детали мероприятия")
@@ -133,44 +181,11 @@ def get_event_details(
     event = get_event_by_id(db, event_id)
     if not event:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Мероприятие не найдено")
-    
-    # Парсим topics из JSON перед валидацией
-    topics_list = []
-    if event.topics:
-        try:
-            topics_list = json.loads(event.topics)
-        except:
-            topics_list = []
-    
-    # Создаем словарь для валидации
-    event_data = {
-        "id": event.id,
-        "title": event.title,
-        "description": event.description,
-        "date": event.date,
-        "end_time": event.end_time,
-        "event_type": event.event_type,
-        "price": event.price,
-        "format": event.format,
-        "location": event.location,
-        "max_participants": event.max_participants,
-        "current_participants": event.current_participants,
-        "image_url": event.image_url,
-        "speaker_name": event.speaker_name,
-        "speaker_bio": event.speaker_bio,
-        "topics": topics_list,  # Уже распарсенный список
-        "created_at": event.created_at,
-        "updated_at": event.updated_at,
-        "is_registered": False,
-    }
-    
-    # Проверяем, записан ли пользователь
+
+    is_registered = False
     if current_user:
-        event_data["is_registered"] = is_user_registered(
-            db, event_id=event.id, user_id=current_user.id
-        )
-    
-    return EventRead(**event_data)
+        is_registered = is_user_registered(db, event_id=event.id, user_id=current_user.id)
+    return _event_read(event, is_registered=is_registered)
 
 
 @router.post("", response_model=EventRead, status_code=status.HTTP_201_CREATED, summary="Создать мероприятие")
@@ -181,20 +196,7 @@ def create_event_endpoint(
 ) -> EventRead:
     """Создать новое мероприятие (только для админов)"""
     event = create_event(db, event_data=event_data)
-    
-    event_dict = EventRead.model_validate(event).model_dump()
-    event_dict["is_registered"] = False
-    
-    # Парсим topics из JSON
-    if event.topics:
-        try:
-            event_dict["topics"] = json.loads(event.topics)
-        except:
-            event_dict["topics"] = []
-    else:
-        event_dict["topics"] = []
-    
-    return EventRead(**event_dict)
+    return _event_read(event, is_registered=False)
 
 
 @router.put("/{event_id}", response_model=EventRead, summary="Обновить мероприятие")
@@ -208,22 +210,11 @@ def update_event_endpoint(
     event = update_event(db, event_id=event_id, event_data=event_data)
     if not event:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Мероприятие не найдено")
-    
-    event_dict = EventRead.model_validate(event).model_dump()
-    event_dict["is_registered"] = is_user_registered(
-        db, event_id=event.id, user_id=current_user.id
+
+    return _event_read(
+        event,
+        is_registered=is_user_registered(db, event_id=event.id, user_id=current_user.id),
     )
-    
-    # Парсим topics из JSON
-    if event.topics:
-        try:
-            event_dict["topics"] = json.loads(event.topics)
-        except:
-            event_dict["topics"] = []
-    else:
-        event_dict["topics"] = []
-    
-    return EventRead(**event_dict)
 
 
 @router.post("/{event_id}/register", response_model=EventRegistrationRead, summary="Записаться на мероприятие")
@@ -254,9 +245,54 @@ def unregister_from_event_endpoint(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
+@router.post("/{event_id}/waitlist", response_model=WaitlistPositionRead, summary="Встать в лист ожидания")
+def join_event_waitlist_endpoint(
+    event_id: uuid.UUID,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+) -> WaitlistPositionRead:
+    """Встать в очередь, когда мест нет; повторный вызов возвращает текущее место"""
+    try:
+        position = join_event_waitlist(db, event_id=event_id, user_id=current_user.id)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return WaitlistPositionRead(
+        position=position,
+        size=get_waitlist_size(db, kind=WaitlistKind.EVENT, target_id=event_id),
+    )
+
+
+@router.get("/{event_id}/waitlist", response_model=WaitlistPositionRead, summary="Место в листе ожидания")
+def get_event_waitlist_endpoint(
+    event_id: uuid.UUID,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+) -> WaitlistPositionRead:
+    """Место текущего пользователя в очереди мероприятия"""
+    return WaitlistPositionRead(
+        position=get_event_waitlist_position(db, event_id=event_id, user_id=current_user.id),
+        size=get_waitlist_size(db, kind=WaitlistKind.EVENT, target_id=event_id),
+    )
+
+
+@router.delete("/{event_id}/waitlist", status_code=status.HTTP_204_NO_CONTENT, summary="Выйти из листа ожидания")
+def leave_event_waitlist_endpoint(
+    event_id: uuid.UUID,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Выйти из листа ожидания мероприятия"""
+    try:
+        leave_event_waitlist(db, event_id=event_id, user_id=current_user.id)
+        return None
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
 @router.post("/{event_id}/upload-image", summary="Загрузить фото мероприятия")
 async def upload_event_image(
     event_id: uuid.UUID,
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     current_user: User = Depends(get_current_admin),
     db: Session = Depends(get_db)
@@ -278,24 +314,32 @@ async def upload_event_image(
     base_dir = Path(__file__).parent.parent.parent.parent.parent
     static_dir = base_dir / settings.static_root
     events_dir = static_dir / "events"
-    events_dir.mkdir(parents=True, exist_ok=True)
     
     # Генерируем уникальное имя файла
     file_extension = Path(file.filename).suffix if file.filename else ".jpg"
     unique_filename = f"{event_id}_{uuid.uuid4()}{file_extension}"
-    file_path = events_dir / unique_filename
     
-    # Сохраняем файл
-    content = await file.read()
-    with open(file_path, "wb") as f:
-        f.write(content)
+    # Сохраняем файл потоково, без чтения целиком в память
+    try:
+        upload = await stream_upload_to_dir(
+            file,
+            events_dir,
+            max_size=settings.upload_max_bytes,
+            filename=unique_filename,
+        )
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
     
     # Обновляем URL в базе данных
     relative_path = f"events/{unique_filename}"
     event.image_url = relative_path
+    event.image_variants = None
     db.commit()
     db.refresh(event)
     
+    # Уменьшенные WebP-варианты строятся в пуле процессов после ответа
+    background_tasks.add_task(process_event_image, event.id, relative_path, upload.path)
+    
     return {
         "image_url": f"{settings.static_url.rstrip('/')}/{relative_path}",
         "message": "Фото успешно загружено"
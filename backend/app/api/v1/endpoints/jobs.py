@@ -0,0 +1,57 @@
+"""
+Фоновые задачи (только для администраторов)
+
+Исполнитель и регистрация задач — app/core/jobs.py.
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from typing import List, Optional
+
+from app.api.deps import get_current_admin
+from app.core.jobs import enqueue_job, list_job_runs, list_jobs
+from app.db.session import get_db
+from app.models.job import JobStatus
+from app.models.user import User
+from app.schemas.job import JobEnqueue, JobRead, JobRunRead
+
+router = APIRouter()
+
+
+@router.get("", response_model=List[JobRead], summary="Список фоновых задач")
+def get_jobs(
+    job_status: Optional[JobStatus] = Query(None, alias="status"),
+    limit: int = Query(100, ge=1, le=1000),
+    current_user: User = Depends(get_current_admin),
+    db: Session = Depends(get_db),
+) -> List[JobRead]:
+    """Периодические задачи и разовые в очереди (или все с указанным статусом)"""
+    return [JobRead.model_validate(job) for job in list_jobs(db, status=job_status, limit=limit)]
+
+
+@router.get("/runs", response_model=List[JobRunRead], summary="История запусков")
+def get_job_runs(
+    name: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=1000),
+    current_user: User = Depends(get_current_admin),
+    db: Session = Depends(get_db),
+) -> List[JobRunRead]:
+    """Последние запуски задач, новые первыми"""
+    return [JobRunRead.model_validate(run) for run in list_job_runs(db, name=name, limit=limit)]
+
+
+@router.post("/{name}/run", response_model=JobRead, status_code=status.HTTP_202_ACCEPTED, summary="Запустить задачу")
+def run_job_now(
+    name: str,
+    data: Optional[JobEnqueue] = None,
+    current_user: User = Depends(get_current_admin),
+    db: Session = Depends(get_db),
+) -> JobRead:
+    """Поставить разовый запуск задачи в очередь"""
+    data = data or JobEnqueue()
+    try:
+        job = enqueue_job(db, name, data.payload, run_at=data.run_at)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    db.commit()
+    db.refresh(job)
+    return JobRead.model_validate(job)
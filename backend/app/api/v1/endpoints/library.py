@@ -1,7 +1,7 @@
 """
 Модуль 6: Электронная библиотека
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 import uuid
 
@@ -15,6 +15,7 @@ from app.services.library_service import (
     update_library_access,
 )
 from app.api.deps import get_current_active_user, get_current_admin
+from app.services.response_cache import VERSION_LIBRARY, cached_json_response, get_cache_version
 
 router = APIRouter()
 
@@ -26,9 +27,10 @@ router = APIRouter()
     description="Получить информацию о доступе к электронной библиотеке (логин, пароль, ссылка на портал, инструкция)",
 )
 def get_library_access(
+    request: Request,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db),
-) -> LibraryAccessRead:
+):
     """
     Модуль 6: Получить гайд по доступу к электронной библиотеке
     
@@ -42,15 +44,26 @@ def get_library_access(
             detail="Доступ к библиотеке доступен только для студентов"
         )
     
-    library_access = get_library_access_for_user(db, current_user.id)
-    
-    if not library_access:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Информация о доступе к библиотеке не найдена. Обратитесь в администрацию вашего вуза."
-        )
-    
-    return LibraryAccessRead.model_validate(library_access)
+    def render() -> LibraryAccessRead:
+        library_access = get_library_access_for_user(db, current_user.id)
+
+        if not library_access:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Информация о доступе к библиотеке не найдена. Обратитесь в администрацию вашего вуза."
+            )
+
+        return LibraryAccessRead.model_validate(library_access)
+
+    # Данные общие для всех студентов вуза, но содержат пароль — только private
+    return cached_json_response(
+        request,
+        key=f"library:{current_user.university_id}",
+        validator=str(get_cache_version(db, VERSION_LIBRARY)),
+        render=render,
+        shared=True,
+        private=True,
+    )
 
 
 @router.post(
@@ -1,13 +1,16 @@
 """
 Модуль 7: Главное меню и навигация
 """
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from sqlalchemy.orm import Session
+from starlette.responses import Response
 
+from app.core.metrics import RESPONSE_CACHE_REQUESTS
 from app.db.session import get_db
 from app.models.user import User
 from app.schemas.menu import MenuResponse
-from app.services.menu_service import get_menu_for_role
+from app.services.file_serving import etag_matches
+from app.services.menu_service import get_rendered_menu
 from app.api.deps import get_current_active_user
 
 router = APIRouter()
@@ -20,9 +23,10 @@ router = APIRouter()
     description="Получить динамическое главное меню в зависимости от роли пользователя",
 )
 def get_main_menu(
+    request: Request,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db),
-) -> MenuResponse:
+):
     """
     Модуль 7: Получить главное меню
     
@@ -30,7 +34,15 @@ def get_main_menu(
     - Студент: Лента мероприятий, Элективы, ЛК (Библиотека, Помощь)
     - Преподаватель/Сотрудник: Лента мероприятий, Документооборот, ЛК (Помощь)
     - Админ: Все пункты + Админ-панель
+
+    Пункты задаются в файле меню (см. menu_service); тело ответа и ETag
+    подготовлены заранее.
     """
-    menu = get_menu_for_role(current_user.role)
-    return menu
+    menu = get_rendered_menu(current_user.role)
+    headers = {"etag": menu.etag, "cache-control": "private, no-cache", "vary": "Authorization"}
+    if etag_matches(request.headers.get("if-none-match"), menu.etag):
+        RESPONSE_CACHE_REQUESTS.inc("not_modified")
+        return Response(status_code=304, headers=headers)
+    RESPONSE_CACHE_REQUESTS.inc("hit")
+    return Response(content=menu.body, media_type="application/json", headers=headers)
 
@@ -0,0 +1,38 @@
+"""
+Профили запросов (только для администраторов)
+
+Профиль снимается заголовком X-Profile: 1 или случайной выборкой, см.
+app/core/profiler.py. Файлы в формате speedscope открываются на
+https://www.speedscope.app.
+"""
+from fastapi import APIRouter, Depends, HTTPException, status
+from starlette.responses import FileResponse
+from typing import List
+
+from app.api.deps import get_current_admin
+from app.core.profiler import PROFILE_SUFFIX, list_profiles, profile_path
+from app.models.user import User
+from app.schemas.profile import ProfileRead
+from app.services.file_serving import content_disposition
+
+router = APIRouter()
+
+
+@router.get("", response_model=List[ProfileRead], summary="Список профилей")
+def get_profiles(current_user: User = Depends(get_current_admin)) -> List[ProfileRead]:
+    """Сохранённые профили, новые первыми"""
+    return [ProfileRead.model_validate(profile) for profile in list_profiles()]
+
+
+@router.get("/{profile_id}", summary="Скачать профиль")
+def download_profile(profile_id: str, current_user: User = Depends(get_current_admin)):
+    """Файл профиля в формате speedscope"""
+    try:
+        path = profile_path(profile_id)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    return FileResponse(
+        path,
+        media_type="application/json",
+        headers={"content-disposition": content_disposition(f"{profile_id}{PROFILE_SUFFIX}", inline=False)},
+    )
@@ -2,10 +2,12 @@
 Модуль 4: Система заявок и документов
 """
 import logging
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, status
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query, Request as HTTPRequest, status
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from typing import List, Optional
 import uuid
+from pathlib import Path
 
 from app.db.session import get_db
 from app.models.user import User
@@ -13,7 +15,7 @@ from app.models.request import Request, RequestType, RequestStatus
 from app.schemas.request import (
     RequestCreate, RequestRead, RequestDetailRead,
     RequestApprove, RequestReject, RequestListRead,
-    RequestDocumentRead, RequestApprovalStepRead
+    RequestDocumentRead, RequestApprovalStepRead, RequestApprovalCount
 )
 from app.models.request_approval_step import RequestApprovalStep
 from app.services.request_service import (
@@ -21,13 +23,18 @@ from app.services.request_service import (
     get_request_by_id,
     get_user_requests,
     get_requests_for_approval,
+    count_requests_for_approval,
     approve_request,
     reject_request,
     add_request_document,
     get_request_documents,
+    get_request_document_for_user,
     get_request_detail,
 )
 from app.services import bot_notify_service
+from app.services.document_store import receive_document_upload
+from app.services.file_serving import accel_path_for, cache_control, serve_file
+from app.services.upload_utils import UploadTooLargeError
 from app.api.deps import get_current_active_user
 from app.core.config import settings
 
@@ -52,7 +59,7 @@ def get_my_requests(
 ) -> List[RequestListRead]:
     """Получить все заявки пользователя (раздел 'Мои заявки')"""
     requests = get_user_requests(db, user_id=current_user.id)
-    return [RequestListRead.model_validate(req) for req in requests]
+    return [_request_list_read(req) for req in requests]
 
 
 @router.get(
@@ -62,12 +69,39 @@ def get_my_requests(
     description="Получить заявки, требующие согласования текущего пользователя",
 )
 def get_approval_requests(
+    limit: Optional[int] = Query(default=None, ge=1, le=500),
+    before_id: Optional[int] = None,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db),
 ) -> List[RequestListRead]:
-    """Получить заявки на согласование (раздел 'Согласование заявок')"""
-    requests = get_requests_for_approval(db, approver_user_id=current_user.id)
-    return [RequestListRead.model_validate(req) for req in requests]
+    """
+    Получить заявки на согласование (раздел 'Согласование заявок')
+
+    Для постраничной выдачи передайте `limit`, а для следующей страницы —
+    `before_id` равный id последней заявки из предыдущего ответа.
+    """
+    requests = get_requests_for_approval(
+        db,
+        approver_user_id=current_user.id,
+        limit=limit,
+        before_id=before_id,
+    )
+    return [_request_list_read(req) for req in requests]
+
+
+@router.get(
+    "/approval/count",
+    response_model=RequestApprovalCount,
+    summary="Количество заявок на согласование",
+    description="Получить количество заявок, ожидающих решения текущего пользователя",
+)
+def get_approval_requests_count(
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+) -> RequestApprovalCount:
+    """Количество заявок на согласование (бейдж в боте)"""
+    pending = count_requests_for_approval(db, approver_user_id=current_user.id)
+    return RequestApprovalCount(pending=pending)
 
 
 @router.get(
@@ -86,22 +120,10 @@ def get_request_details(
     if not request:
         raise HTTPException(status_code=404, detail="Заявка не найдена или нет доступа")
     
-    # Получаем документы и шаги согласования
-    documents = get_request_documents(db, request_id)
-    approval_steps = db.query(RequestApprovalStep).filter(
-        RequestApprovalStep.request_id == request_id
-    ).order_by(RequestApprovalStep.step_order).all()
-    
-    # Формируем ответ
+    # Документы, шаги согласования и имена уже загружены вместе с заявкой
     detail = RequestDetailRead.model_validate(request)
-    # Добавляем URL для документов
-    detail.documents = [
-        RequestDocumentRead(
-            **doc.__dict__,
-            file_url=f"{settings.static_url.rstrip('/')}/{doc.file_path}"
-        ) for doc in documents
-    ]
-    detail.approval_steps = [RequestApprovalStepRead.model_validate(step) for step in approval_steps]
+    detail.documents = [_document_read(doc) for doc in request.documents]
+    detail.approval_steps = [_approval_step_read(step) for step in request.approval_steps]
     
     # Добавляем имена автора и согласующего
     if request.author:
@@ -215,18 +237,17 @@ async def upload_request_document(
         raise HTTPException(status_code=403, detail="Вы можете загружать документы только к своим заявкам")
     
     try:
-        file_content = await file.read()
-        document = add_request_document(
+        # Файл пишется на диск потоково, без чтения целиком в память
+        upload = await receive_document_upload(file, max_size=settings.upload_max_bytes)
+        document = await run_in_threadpool(
+            add_request_document,
             db=db,
             request_id=request_id,
-            filename=file.filename or "document",
-            file_content=file_content,
-            mime_type=file.content_type
-        )
-        return RequestDocumentRead(
-            **document.__dict__,
-            file_url=f"{settings.static_url.rstrip('/')}/{document.file_path}"
+            upload=upload,
         )
+        return _document_read(document)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Ошибка при загрузке документа: {str(e)}")
 
@@ -252,12 +273,70 @@ def get_request_documents_endpoint(
         raise HTTPException(status_code=403, detail="Нет доступа к этой заявке")
     
     documents = get_request_documents(db, request_id)
-    return [
-        RequestDocumentRead(
-            **doc.__dict__,
-            file_url=f"{settings.static_url.rstrip('/')}/{doc.file_path}"
-        ) for doc in documents
-    ]
+    return [_document_read(doc) for doc in documents]
+
+
+@router.get(
+    "/{request_id}/documents/{document_id}/file",
+    summary="Скачать документ заявки",
+    description="Содержимое документа; поддерживаются ETag/If-None-Match и Range",
+)
+def download_request_document(
+    request_id: int,
+    document_id: uuid.UUID,
+    http_request: HTTPRequest,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Скачать документ заявки
+
+    В режиме static_serving_mode=nginx backend только проверяет права и
+    возвращает X-Accel-Redirect, файл отдаёт nginx.
+    """
+    document = get_request_document_for_user(
+        db,
+        request_id=request_id,
+        document_id=document_id,
+        user_id=current_user.id,
+    )
+    if not document:
+        raise HTTPException(status_code=404, detail="Документ не найден или нет доступа")
+
+    # Blob адресуется по sha256: содержимое по этому пути никогда не меняется
+    return serve_file(
+        http_request,
+        Path(settings.static_root) / document.file_path,
+        media_type=document.mime_type,
+        etag=f'"{document.blob_sha256}"' if document.blob_sha256 else None,
+        cache=cache_control(immutable=bool(document.blob_sha256), private=True),
+        filename=document.filename,
+        accel_path=accel_path_for(document.file_path),
+    )
+
+
+def _request_list_read(request: Request) -> RequestListRead:
+    item = RequestListRead.model_validate(request)
+    if request.author:
+        item.author_full_name = request.author.full_name
+    if request.current_approver:
+        item.current_approver_full_name = request.current_approver.full_name
+    return item
+
+
+def _approval_step_read(step: RequestApprovalStep) -> RequestApprovalStepRead:
+    item = RequestApprovalStepRead.model_validate(step)
+    if step.approver:
+        item.approver_full_name = step.approver.full_name
+    return item
+
+
+def _document_read(document) -> RequestDocumentRead:
+    return RequestDocumentRead(
+        **document.__dict__,
+        # Относительно API: документы отдаются только с проверкой прав
+        file_url=f"/requests/{document.request_id}/documents/{document.id}/file",
+    )
 
 
 def _notify_document_ready_if_needed(request: Request, user_max_id: Optional[int]) -> None:
@@ -0,0 +1,71 @@
+"""
+Полнотекстовый поиск по мероприятиям, элективам и рассылкам
+"""
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+
+from app.api.deps import get_optional_current_user
+from app.db.session import get_db
+from app.models.broadcast import Broadcast
+from app.models.elective import Elective
+from app.models.event import Event
+from app.models.search_document import SearchKind
+from app.models.user import User
+from app.schemas.search import SearchHit
+from app.services.search_service import search
+
+router = APIRouter()
+
+SNIPPET_LENGTH = 200
+
+_MODELS = {
+    SearchKind.EVENT: (Event, "description"),
+    SearchKind.ELECTIVE: (Elective, "description"),
+    SearchKind.BROADCAST: (Broadcast, "message"),
+}
+
+
+@router.get("", response_model=List[SearchHit], summary="Поиск")
+def search_endpoint(
+    q: str = Query(..., min_length=1, max_length=200, description="Поисковый запрос"),
+    kind: Optional[List[SearchKind]] = Query(default=None, description="Ограничить типами сущностей"),
+    limit: int = Query(default=20, ge=1, le=100),
+    offset: int = Query(default=0, ge=0),
+    current_user: Optional[User] = Depends(get_optional_current_user),
+    db: Session = Depends(get_db),
+) -> List[SearchHit]:
+    """
+    Поиск по мероприятиям, элективам и рассылкам с ранжированием
+
+    Рассылки ищутся только среди доступных пользователю (адресованных его
+    группе/факультету или созданных им), элективы — только среди активных.
+    """
+    found = search(db, query=q, user=current_user, kinds=kind, limit=limit, offset=offset)
+
+    # Сущности подгружаются одним запросом на тип
+    ids_by_kind: dict[SearchKind, list] = {}
+    for item_kind, entity_id, _ in found:
+        ids_by_kind.setdefault(item_kind, []).append(entity_id)
+    entities = {}
+    for item_kind, ids in ids_by_kind.items():
+        model, _ = _MODELS[item_kind]
+        for entity in db.query(model).filter(model.id.in_(ids)):
+            entities[(item_kind, entity.id)] = entity
+
+    result = []
+    for item_kind, entity_id, rank in found:
+        entity = entities.get((item_kind, entity_id))
+        if entity is None:
+            continue
+        text = getattr(entity, _MODELS[item_kind][1]) or ""
+        result.append(
+            SearchHit(
+                kind=item_kind,
+                id=entity_id,
+                title=entity.title,
+                snippet=text[:SNIPPET_LENGTH] or None,
+                rank=rank,
+            )
+        )
+    return result
@@ -1,13 +1,18 @@
 """
 Управление университетами
+
+Справочники редко меняются и запрашиваются при каждой регистрации, поэтому
+ответы отдаются с ETag по счётчику версии "universities" (см. response_cache)
+и их тела кэшируются в памяти процесса.
 """
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from sqlalchemy.orm import Session
 from typing import List
 
 from app.db.session import get_db
 from app.schemas.university import UniversityRead
 from app.models.university import University
+from app.services.response_cache import VERSION_UNIVERSITIES, cached_json_response, get_cache_version
 
 router = APIRouter()
 
@@ -19,16 +24,26 @@ router = APIRouter()
     description="Возвращает список всех университетов в системе. Используется для выбора вуза при регистрации.",
 )
 def get_universities(
+    request: Request,
     db: Session = Depends(get_db),
-) -> List[UniversityRead]:
+):
     """
     Получить список всех университетов
     
     Возвращает список всех университетов, отсортированных по названию.
     Используется для выбора вуза при регистрации пользователя.
     """
-    universities = db.query(University).order_by(University.name).all()
-    return [UniversityRead.model_validate(uni) for uni in universities]
+    def render() -> List[UniversityRead]:
+        universities = db.query(University).order_by(University.name).all()
+        return [UniversityRead.model_validate(uni) for uni in universities]
+
+    return cached_json_response(
+        request,
+        key="universities",
+        validator=str(get_cache_version(db, VERSION_UNIVERSITIES)),
+        render=render,
+        shared=True,
+    )
 
 
 @router.get(
@@ -38,9 +53,10 @@ def get_universities(
     description="Возвращает список всех факультетов указанного университета.",
 )
 def get_university_faculties(
+    request: Request,
     university_id: str,
     db: Session = Depends(get_db),
-) -> List[dict]:
+):
     """
     Получить список факультетов университета
     
@@ -59,17 +75,26 @@ def get_university_faculties(
             detail="Некорректный формат ID университета"
         )
     
-    faculties = db.query(Faculty).filter(
-        Faculty.university_id == uni_uuid
-    ).order_by(Faculty.title).all()
-    
-    return [
-        {
-            "id": str(fac.id),
-            "title": fac.title,
-        }
-        for fac in faculties
-    ]
+    def render() -> List[dict]:
+        faculties = db.query(Faculty).filter(
+            Faculty.university_id == uni_uuid
+        ).order_by(Faculty.title).all()
+
+        return [
+            {
+                "id": str(fac.id),
+                "title": fac.title,
+            }
+            for fac in faculties
+        ]
+
+    return cached_json_response(
+        request,
+        key=f"faculties:{uni_uuid}",
+        validator=str(get_cache_version(db, VERSION_UNIVERSITIES)),
+        render=render,
+        shared=True,
+    )
 
 
 @router.get(
@@ -79,10 +104,11 @@ def get_university_faculties(
     description="Возвращает список всех студенческих групп указанного факультета.",
 )
 def get_faculty_groups(
+    request: Request,
     university_id: str,
     faculty_id: str,
     db: Session = Depends(get_db),
-) -> List[dict]:
+):
     """
     Получить список групп факультета
     
@@ -103,31 +129,42 @@ def get_faculty_groups(
             detail="Некорректный формат ID"
         )
     
-    # Проверяем, что факультет принадлежит указанному университету
-    faculty = db.query(Faculty).filter(
-        Faculty.id == fac_uuid,
-        Faculty.university_id == uni_uuid
-    ).first()
-    
-    if not faculty:
-        from fastapi import HTTPException, status
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Факультет не найден"
-        )
-    
-    groups = db.query(StudentGroup).filter(
-        StudentGroup.faculty_id == fac_uuid
-    ).order_by(StudentGroup.name).all()
-    
-    return [
-        {
-            "id": str(group.id),
-            "name": group.name,
-            "code": group.code,
-        }
-        for group in groups
-    ]
+    def check_faculty() -> None:
+        # Проверяем, что факультет принадлежит указанному университету
+        faculty = db.query(Faculty).filter(
+            Faculty.id == fac_uuid,
+            Faculty.university_id == uni_uuid
+        ).first()
+
+        if not faculty:
+            from fastapi import HTTPException, status
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Факультет не найден"
+            )
+
+    def render() -> List[dict]:
+        check_faculty()
+        groups = db.query(StudentGroup).filter(
+            StudentGroup.faculty_id == fac_uuid
+        ).order_by(StudentGroup.name).all()
+
+        return [
+            {
+                "id": str(group.id),
+                "name": group.name,
+                "code": group.code,
+            }
+            for group in groups
+        ]
+
+    return cached_json_response(
+        request,
+        key=f"groups:{uni_uuid}:{fac_uuid}",
+        validator=str(get_cache_version(db, VERSION_UNIVERSITIES)),
+        render=render,
+        shared=True,
+    )
 
 
 @router.get(
@@ -137,10 +174,11 @@ def get_faculty_groups(
     description="Возвращает список всех кафедр указанного факультета.",
 )
 def get_faculty_kafedras(
+    request: Request,
     university_id: str,
     faculty_id: str,
     db: Session = Depends(get_db),
-) -> List[dict]:
+):
     """
     Получить список кафедр факультета
     
@@ -161,28 +199,39 @@ def get_faculty_kafedras(
             detail="Некорректный формат ID"
         )
     
-    # Проверяем, что факультет принадлежит указанному университету
-    faculty = db.query(Faculty).filter(
-        Faculty.id == fac_uuid,
-        Faculty.university_id == uni_uuid
-    ).first()
-    
-    if not faculty:
-        from fastapi import HTTPException, status
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Факультет не найден"
-        )
-    
-    kafedras = db.query(Kafedra).filter(
-        Kafedra.faculty_id == fac_uuid
-    ).order_by(Kafedra.title).all()
-    
-    return [
-        {
-            "id": str(kaf.id),
-            "title": kaf.title or "Без названия",
-        }
-        for kaf in kafedras
-    ]
+    def check_faculty() -> None:
+        # Проверяем, что факультет принадлежит указанному университету
+        faculty = db.query(Faculty).filter(
+            Faculty.id == fac_uuid,
+            Faculty.university_id == uni_uuid
+        ).first()
+
+        if not faculty:
+            from fastapi import HTTPException, status
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Факультет не найден"
+            )
+
+    def render() -> List[dict]:
+        check_faculty()
+        kafedras = db.query(Kafedra).filter(
+            Kafedra.faculty_id == fac_uuid
+        ).order_by(Kafedra.title).all()
+
+        return [
+            {
+                "id": str(kaf.id),
+                "title": kaf.title or "Без названия",
+            }
+            for kaf in kafedras
+        ]
+
+    return cached_json_response(
+        request,
+        key=f"kafedras:{uni_uuid}:{fac_uuid}",
+        validator=str(get_cache_version(db, VERSION_UNIVERSITIES)),
+        render=render,
+        shared=True,
+    )
 
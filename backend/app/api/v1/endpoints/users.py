@@ -1,19 +1,23 @@
 """
 Управление пользователями
-Добавление студентов и преподавателей
+Добавление студентов и преподавателей (по одному и импортом из файла)
 Личный кабинет
 """
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Request, UploadFile
 from sqlalchemy.orm import Session
+import uuid
 
 from app.db.session import get_db
 from app.models.user import User
-from app.api.deps import get_current_active_user
+from app.api.deps import get_current_active_user, get_current_admin
+from app.schemas.roster_import import RosterImportErrorRead, RosterImportReport
 from app.schemas.student import StudentCreate, StudentRead
 from app.schemas.teacher import TeacherCreate, TeacherRead
 from app.schemas.user import ProfileRead
+from app.services.roster_import_service import RosterKind, import_roster
 from app.services.student_service import create_student
 from app.services.teacher_service import create_teacher
+from app.services.response_cache import cached_json_response, profile_validator
 from app.services.user_service import get_user_profile
 
 router = APIRouter()
@@ -63,6 +67,76 @@ def add_teacher(
         raise HTTPException(status_code=400, detail=f"Ошибка при создании преподавателя: {str(e)}")
 
 
+def _import_roster(
+    kind: RosterKind,
+    db: Session,
+    file: UploadFile,
+    university_id: uuid.UUID,
+    dry_run: bool,
+) -> RosterImportReport:
+    try:
+        result = import_roster(
+            db,
+            kind=kind,
+            file=file.file,
+            filename=file.filename or "",
+            university_id=university_id,
+            dry_run=dry_run,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return RosterImportReport(
+        processed=result.processed,
+        created=result.created,
+        updated=result.updated,
+        failed=result.failed,
+        dry_run=dry_run,
+        errors=[RosterImportErrorRead.model_validate(error) for error in result.errors],
+    )
+
+
+@router.post(
+    "/students/import",
+    response_model=RosterImportReport,
+    summary="Импорт студентов из CSV/XLSX",
+    description=(
+        "Массовое добавление и обновление студентов вуза. Колонки: full_name, student_card, "
+        "group (название, код или UUID), faculty (необязательно), city (необязательно). "
+        "Студенты с существующим student_card обновляются."
+    ),
+)
+def import_students(
+    university_id: uuid.UUID = Form(...),
+    file: UploadFile = File(...),
+    dry_run: bool = Form(False),
+    current_user: User = Depends(get_current_admin),
+    db: Session = Depends(get_db),
+) -> RosterImportReport:
+    """Импорт студентов (только для админов); ошибки строк возвращаются в отчёте"""
+    return _import_roster(RosterKind.STUDENTS, db, file, university_id, dry_run)
+
+
+@router.post(
+    "/teachers/import",
+    response_model=RosterImportReport,
+    summary="Импорт преподавателей из CSV/XLSX",
+    description=(
+        "Массовое добавление и обновление преподавателей вуза. Колонки: full_name, tab_number, "
+        "kafedra (название или UUID), faculty (необязательно), city (необязательно). "
+        "Преподаватели с существующим tab_number обновляются."
+    ),
+)
+def import_teachers(
+    university_id: uuid.UUID = Form(...),
+    file: UploadFile = File(...),
+    dry_run: bool = Form(False),
+    current_user: User = Depends(get_current_admin),
+    db: Session = Depends(get_db),
+) -> RosterImportReport:
+    """Импорт преподавателей (только для админов); ошибки строк возвращаются в отчёте"""
+    return _import_roster(RosterKind.TEACHERS, db, file, university_id, dry_run)
+
+
 @router.get(
     "/profile",
     response_model=ProfileRead,
@@ -70,13 +144,25 @@ def add_teacher(
     description="Получить данные личного кабинета текущего пользователя",
 )
 def get_profile(
+    request: Request,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db),
-) -> ProfileRead:
-    """Получить данные личного кабинета текущего пользователя"""
+):
+    """
+    Получить данные личного кабинета текущего пользователя
+
+    Ответ кэшируется в памяти процесса до изменения данных пользователя или
+    справочников вузов; при совпадающем If-None-Match возвращается 304.
+    """
     try:
-        profile_data = get_user_profile(db, current_user.id)
-        return ProfileRead(**profile_data)
+        return cached_json_response(
+            request,
+            key=f"profile:{current_user.id}",
+            validator=profile_validator(db, current_user),
+            render=lambda: ProfileRead(**get_user_profile(db, current_user.id)),
+            shared=True,
+            private=True,
+        )
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
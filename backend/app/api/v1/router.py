@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.api.v1.endpoints import auth, users, schedule, requests, events, payments, library, menu, electives, broadcasts, universities
+from app.api.v1.endpoints import auth, users, schedule, requests, events, payments, library, menu, electives, broadcasts, universities, search, profiles, jobs
 
 api_router = APIRouter()
 api_router.include_router(auth.router, prefix="/auth", tags=["Авторизация и верификация"])
@@ -14,3 +14,6 @@ api_router.include_router(library.router, prefix="/library", tags=["Электр
 api_router.include_router(menu.router, prefix="/menu", tags=["Главное меню"])
 api_router.include_router(electives.router, prefix="/electives", tags=["Элективы"])
 api_router.include_router(broadcasts.router, prefix="/broadcasts", tags=["Рассылки"])
+api_router.include_router(search.router, prefix="/search", tags=["Поиск"])
+api_router.include_router(profiles.router, prefix="/profiles", tags=["Профилирование"])
+api_router.include_router(jobs.router, prefix="/jobs", tags=["Фоновые задачи"])
@@ -13,6 +13,40 @@ class Settings(BaseSettings):
     static_dir: str = Field(default="static")  # Абсолютный путь к директории со статикой
     static_url: str = Field(default="/static")
     request_documents_prefix: str = Field(default="requests")
+    document_blobs_prefix: str = Field(default="blobs")  # Хранилище документов по sha256
+    static_serving_mode: str = Field(default="app")  # app — файлы отдаёт backend, nginx — через X-Accel-Redirect
+    static_accel_prefix: str = Field(default="/_protected_static")  # internal location nginx с корнем static_root
+    event_image_widths: list[int] = Field(default=[320, 640, 1280])  # Ширины WebP-вариантов фото мероприятий
+    event_image_workers: int = Field(default=2)  # Процессов для обработки фото
+    upload_max_bytes: int = Field(default=50 * 1024 * 1024)  # Максимальный размер загружаемого файла
+    response_cache_max_bytes: int = Field(default=32 * 1024 * 1024)  # Объём кэша тел общих ответов (ETag) в памяти процесса
+    menu_config_path: str = Field(default="")  # JSON-файл меню по ролям; пусто — app/data/menus.json
+    menu_reload_interval_seconds: float = Field(default=5.0)  # Как часто проверять изменение файла меню
+    import_chunk_size: int = Field(default=1000)  # Строк в одной пачке массового импорта студентов/преподавателей
+    query_stats_enabled: bool = Field(default=True)  # Подсчёт SQL-запросов на запрос и заголовок Server-Timing
+    metrics_enabled: bool = Field(default=True)  # Эндпоинт /metrics в формате Prometheus
+    metrics_token: str = Field(default="")  # Если задан, /metrics требует заголовок Authorization: Bearer <токен>
+    slow_query_ms: float = Field(default=200.0)  # Порог логирования медленных SQL-запросов, мс (0 — не логировать)
+    profiler_enabled: bool = Field(default=False)  # Профилирование запросов по заголовку X-Profile (только админы)
+    profiler_sample_rate: float = Field(default=0.0)  # Доля запросов, профилируемых автоматически (0 — выключено)
+    profiler_interval_ms: float = Field(default=2.0)  # Период сэмплирования стеков
+    profiles_dir: str = Field(default="profiles")  # Каталог профилей (speedscope)
+    profiles_max_files: int = Field(default=50)  # Сколько последних профилей хранить
+    jobs_enabled: bool = Field(default=True)  # Исполнитель фоновых задач в процессе API
+    jobs_timezone: str = Field(default="Europe/Moscow")  # Часовой пояс cron-расписаний
+    jobs_poll_interval_seconds: float = Field(default=2.0)  # Как часто проверять очередь задач
+    jobs_lease_seconds: int = Field(default=60)  # Аренда задачи: через сколько её подхватит другой воркер, если этот упал
+    jobs_max_concurrency: int = Field(default=2)  # Задач одновременно в одном воркере
+    jobs_retry_base_seconds: int = Field(default=30)  # Пауза перед повтором разовой задачи (удваивается)
+    jobs_shutdown_timeout_seconds: float = Field(default=10.0)  # Сколько ждать выполняющиеся задачи при остановке
+    jobs_history_days: int = Field(default=30)  # Сколько хранить историю запусков
+    event_reminder_cron: str = Field(default="*/5 * * * *")  # Как часто искать мероприятия для напоминаний (пусто — не напоминать)
+    event_reminder_windows_minutes: list[int] = Field(default=[1440, 60])  # За сколько минут до начала напоминать
+    event_reminder_batch_size: int = Field(default=500)  # Получателей в одном вызове /notify/bulk
+    elective_preferences_max: int = Field(default=10)  # Сколько элективов студент может указать в списке приоритетов
+    counter_reconcile_cron: str = Field(default="15 4 * * *")  # Когда сверять счётчики записавшихся с регистрациями (пусто — не сверять)
+    counter_triggers_enabled: bool = Field(default=False)  # Вести счётчики записавшихся триггерами БД, а не в сервисах
+    schedule_changelog_retention_days: int = Field(default=0)  # Удалять записи changelog расписания старше (0 — хранить всё)
     # ЮКасса настройки (для реальной интеграции)
     yookassa_shop_id: str = Field(default="")
     yookassa_secret_key: str = Field(default="")
@@ -20,6 +54,8 @@ class Settings(BaseSettings):
     bot_notify_base_url: str = Field(default="http://bot:8080")
     bot_notify_token: str = Field(default="")
     bot_default_sender_max_id: int = Field(default=1)
+    # Время жизни кэша маршрутизации согласующих (сек), 0 - без ограничения
+    approver_routing_ttl_seconds: int = Field(default=300)
 
     model_config = {
         "env_file": ".env",
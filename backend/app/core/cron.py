@@ -0,0 +1,92 @@
+"""
+Расписания в формате cron для периодических фоновых задач
+
+Пять полей: минута, час, день месяца, месяц, день недели (0 или 7 —
+воскресенье). Поддерживаются *, списки (1,15), диапазоны (1-5) и шаги
+(*/10, 8-18/2), а также псевдонимы @hourly, @daily, @weekly, @monthly.
+Как и в cron, если ограничены и день месяца, и день недели, достаточно
+совпадения любого из них. Время считается в часовом поясе расписания.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+_ALIASES = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *",
+}
+_FIELDS = (("минута", 0, 59), ("час", 0, 23), ("день", 1, 31), ("месяц", 1, 12), ("день недели", 0, 7))
+# Дальше не ищем: выражение вроде "0 0 31 2 *" не сработает никогда
+_SEARCH_LIMIT = timedelta(days=366 * 5)
+
+
+def _parse_field(value: str, name: str, low: int, high: int) -> frozenset[int]:
+    result: set[int] = set()
+    for part in value.split(","):
+        base, _, step_text = part.partition("/")
+        try:
+            step = int(step_text) if step_text else 1
+            if base == "*":
+                start, end = low, high
+            elif "-" in base:
+                start, end = (int(bound) for bound in base.split("-", 1))
+            else:
+                start = int(base)
+                end = high if step_text else start
+        except ValueError:
+            raise ValueError(f"Некорректное поле cron ({name}): {value!r}") from None
+        if step < 1 or not low <= start <= end <= high:
+            raise ValueError(f"Некорректное поле cron ({name}): {value!r}")
+        result.update(range(start, end + 1, step))
+    return frozenset(result)
+
+
+class CronSchedule:
+    """Разобранное cron-выражение"""
+
+    def __init__(self, expression: str, tz: Optional[str] = None) -> None:
+        self.expression = expression.strip()
+        fields = _ALIASES.get(self.expression, self.expression).split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron-выражение должно состоять из 5 полей: {expression!r}")
+        minutes, hours, days, months, weekdays = (
+            _parse_field(value, *spec) for value, spec in zip(fields, _FIELDS)
+        )
+        self.minutes, self.hours, self.days, self.months = minutes, hours, days, months
+        self.weekdays = frozenset(day % 7 for day in weekdays)
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+        self.tz = ZoneInfo(tz) if tz else timezone.utc
+
+    def __repr__(self) -> str:
+        return f"CronSchedule({self.expression!r})"
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day_ok = moment.day in self.days
+        weekday_ok = (moment.weekday() + 1) % 7 in self.weekdays
+        if self._any_day or self._any_weekday:
+            return day_ok and weekday_ok
+        return day_ok or weekday_ok
+
+    def next_after(self, moment: datetime) -> datetime:
+        """Ближайшее срабатывание строго после moment (в UTC)"""
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+        # Ищем по «настенному» времени пояса расписания, пропуская целые месяцы, дни и часы
+        current = moment.astimezone(self.tz).replace(tzinfo=None, second=0, microsecond=0) + timedelta(minutes=1)
+        limit = current + _SEARCH_LIMIT
+        while current < limit:
+            if current.month not in self.months:
+                month_start = current.replace(day=1, hour=0, minute=0)
+                current = (month_start + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(current):
+                current = current.replace(hour=0, minute=0) + timedelta(days=1)
+            elif current.hour not in self.hours:
+                current = current.replace(minute=0) + timedelta(hours=1)
+            elif current.minute not in self.minutes:
+                current += timedelta(minutes=1)
+            else:
+                return current.replace(tzinfo=self.tz).astimezone(timezone.utc)
+        raise ValueError(f"Cron-выражение никогда не срабатывает: {self.expression!r}")
@@ -0,0 +1,385 @@
+"""
+Фоновые задачи в процессе API
+
+Задачи — обычные функции task(db, payload) -> dict | None, регистрируемые
+декоратором register_job рядом с кодом, к которому они относятся:
+
+    @register_job("schedule_changelog.prune", cron="45 3 * * *")
+    def prune_changelog(db: Session, payload: dict) -> dict: ...
+
+Периодическая задача (cron) хранится одной строкой в таблице jobs, разовая
+ставится в очередь enqueue_job(db, name, payload, run_at=...) в транзакции
+вызывающего — запись появится, только если его изменения зафиксированы.
+Задача с on_startup=True (обслуживание после развёртывания: сверка индексов,
+досчёт данных) ставится в очередь при старте исполнителя: строка у неё одна
+на всё приложение, поэтому при --workers N её выполняет один воркер за раз,
+а не каждый процесс при импорте.
+
+Исполнитель (JobRunner) запускается вместе с приложением в каждом воркере
+uvicorn и раз в settings.jobs_poll_interval_seconds:
+- продлевает аренду своих выполняющихся задач;
+- захватывает задачи, срок которых наступил: условный UPDATE ставит
+  locked_by/locked_until, только если задачу ещё никто не держит, поэтому
+  каждую задачу выполняет ровно один воркер. Если воркер упал, аренда
+  (settings.jobs_lease_seconds) истекает и задачу подхватывает другой;
+- выполняет их в собственном пуле из settings.jobs_max_concurrency потоков,
+  не занимая пул потоков запросов.
+
+Каждый запуск пишется в job_runs (время, результат, ошибка). Периодическая
+задача после запуска переносится на следующее срабатывание (пропущенные
+за время простоя не догоняются), разовая повторяется с растущей паузой до
+max_attempts раз.
+"""
+import asyncio
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+import logging
+import os
+import socket
+import time
+import traceback
+from typing import Callable, Optional
+import uuid
+
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.cron import CronSchedule
+from app.core.metrics import BACKGROUND_QUEUE_DEPTH, JOB_DURATION
+from app.db.session import SessionLocal
+from app.models.job import Job, JobKind, JobRun, JobRunStatus, JobStatus
+
+logger = logging.getLogger(__name__)
+
+JobFunc = Callable[[Session, dict], Optional[dict]]
+
+MAX_ERROR_LENGTH = 4000
+# Строки периодических и стартовых задач имеют фиксированный id: два воркера не создадут дубликат
+_CRON_NAMESPACE = uuid.UUID("5b0f8a8e-6f0c-4a47-9d87-3f1c0a6d2b71")
+
+
+@dataclass(frozen=True)
+class JobSpec:
+    name: str
+    func: JobFunc
+    cron: Optional[CronSchedule]
+    max_attempts: int
+    on_startup: bool = False
+
+
+_registry: dict[str, JobSpec] = {}
+
+
+def register_job(
+    name: str, *, cron: Optional[str] = None, max_attempts: int = 3, on_startup: bool = False
+) -> Callable[[JobFunc], JobFunc]:
+    """Зарегистрировать фоновую задачу; с cron она запускается по расписанию, с on_startup — после старта"""
+    def decorator(func: JobFunc) -> JobFunc:
+        schedule = CronSchedule(cron, settings.jobs_timezone) if cron else None
+        _registry[name] = JobSpec(
+            name=name, func=func, cron=schedule, max_attempts=max_attempts, on_startup=on_startup
+        )
+        return func
+    return decorator
+
+
+def registered_jobs() -> list[JobSpec]:
+    return sorted(_registry.values(), key=lambda spec: spec.name)
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def enqueue_job(db: Session, name: str, payload: Optional[dict] = None, *, run_at: Optional[datetime] = None) -> Job:
+    """Поставить разовую задачу в очередь (фиксируется вместе с транзакцией вызывающего)"""
+    if name not in _registry:
+        raise ValueError(f"Неизвестная фоновая задача: {name}")
+    job = Job(
+        name=name,
+        kind=JobKind.ONCE,
+        payload=payload or {},
+        status=JobStatus.SCHEDULED,
+        next_run_at=run_at or _now(),
+    )
+    db.add(job)
+    return job
+
+
+def sync_cron_jobs(db: Session) -> None:
+    """Создать строки периодических задач и обновить их при смене расписания"""
+    now = _now()
+    cron_names = [spec.name for spec in _registry.values() if spec.cron is not None]
+    # Задача больше не периодическая или удалена из кода
+    db.execute(delete(Job).where(Job.kind == JobKind.CRON, Job.name.notin_(cron_names)))
+    db.commit()
+    for spec in registered_jobs():
+        if spec.cron is None:
+            continue
+        job_id = uuid.uuid5(_CRON_NAMESPACE, spec.name)
+        job = db.get(Job, job_id)
+        if job is None:
+            db.add(Job(
+                id=job_id,
+                name=spec.name,
+                kind=JobKind.CRON,
+                cron=spec.cron.expression,
+                status=JobStatus.SCHEDULED,
+                next_run_at=spec.cron.next_after(now),
+            ))
+        elif job.cron != spec.cron.expression:
+            job.cron = spec.cron.expression
+            job.next_run_at = spec.cron.next_after(now)
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()  # строку только что создал другой воркер
+
+
+def enqueue_startup_jobs(db: Session) -> None:
+    """
+    Поставить в очередь задачи on_startup
+
+    Строка задачи одна (фиксированный id): пока она ждёт или выполняется,
+    остальные воркеры её не трогают, завершённую — ставят заново.
+    """
+    now = _now()
+    for spec in registered_jobs():
+        if not spec.on_startup:
+            continue
+        job_id = uuid.uuid5(_CRON_NAMESPACE, f"startup:{spec.name}")
+        job = db.get(Job, job_id)
+        if job is None:
+            db.add(Job(
+                id=job_id,
+                name=spec.name,
+                kind=JobKind.ONCE,
+                payload={},
+                status=JobStatus.SCHEDULED,
+                next_run_at=now,
+            ))
+        elif job.status != JobStatus.SCHEDULED:
+            job.status = JobStatus.SCHEDULED
+            job.attempts = 0
+            job.next_run_at = now
+        else:
+            continue
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()  # строку только что создал другой воркер
+
+
+def _claim(db: Session, worker: str, running: list[uuid.UUID], limit: int) -> list[tuple[uuid.UUID, str]]:
+    """Продлить аренду выполняющихся задач и захватить до limit новых"""
+    now = _now()
+    lease = now + timedelta(seconds=settings.jobs_lease_seconds)
+    if running:
+        db.execute(
+            update(Job)
+            .where(Job.id.in_(running), Job.locked_by == worker)
+            .values(locked_until=lease)
+        )
+        db.commit()
+    if limit <= 0:
+        return []
+
+    free = or_(Job.locked_until.is_(None), Job.locked_until < now)
+    candidates = db.execute(
+        select(Job.id, Job.name)
+        .where(Job.status == JobStatus.SCHEDULED, Job.next_run_at <= now, free)
+        .order_by(Job.next_run_at)
+        .limit(limit * 2)
+    ).all()
+    claimed = []
+    for job_id, name in candidates:
+        if name not in _registry:
+            continue  # задача другой версии приложения
+        result = db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == JobStatus.SCHEDULED, free)
+            .values(locked_by=worker, locked_until=lease, attempts=Job.attempts + 1)
+        )
+        db.commit()
+        if result.rowcount == 1:
+            claimed.append((job_id, name))
+            if len(claimed) >= limit:
+                break
+    return claimed
+
+
+def _retry_delay(attempt: int) -> timedelta:
+    return timedelta(seconds=min(settings.jobs_retry_base_seconds * 2 ** (attempt - 1), 3600))
+
+
+def run_job(job_id: uuid.UUID, worker: str) -> JobRunStatus:
+    """Выполнить захваченную задачу, записать запуск в историю и перепланировать"""
+    with SessionLocal() as db:
+        job = db.get(Job, job_id)
+        spec = _registry[job.name]
+        payload = dict(job.payload or {})
+        run = JobRun(
+            job_id=job.id,
+            name=job.name,
+            worker=worker,
+            attempt=job.attempts,
+            status=JobRunStatus.RUNNING,
+            started_at=_now(),
+        )
+        db.add(run)
+        db.commit()
+
+        started = time.perf_counter()
+        error = None
+        try:
+            result = spec.func(db, payload)
+            db.commit()
+            status = JobRunStatus.SUCCESS
+        except Exception:  # noqa: BLE001
+            db.rollback()
+            logger.exception("job %s failed", spec.name)
+            result, status = None, JobRunStatus.FAILED
+            error = traceback.format_exc()[-MAX_ERROR_LENGTH:]
+        duration = time.perf_counter() - started
+        JOB_DURATION.observe(duration, spec.name, status.value)
+
+        finished = _now()
+        run.status = status
+        run.finished_at = finished
+        run.duration_ms = round(duration * 1000, 1)
+        run.result = result
+        run.error = error
+
+        job = db.get(Job, job_id)
+        if job is None or job.locked_by != worker:
+            # Аренда истекла и задачу забрал другой воркер — только фиксируем запуск
+            logger.warning("job %s lost its lease while running", spec.name)
+            db.commit()
+            return status
+        job.last_run_at = finished
+        job.last_error = error
+        job.locked_by = None
+        job.locked_until = None
+        if job.kind == JobKind.CRON:
+            schedule = spec.cron or CronSchedule(job.cron, settings.jobs_timezone)
+            job.next_run_at = schedule.next_after(finished)
+        elif status == JobRunStatus.SUCCESS:
+            job.status = JobStatus.DONE
+        elif job.attempts >= spec.max_attempts:
+            job.status = JobStatus.FAILED
+        else:
+            job.next_run_at = finished + _retry_delay(job.attempts)
+        db.commit()
+        return status
+
+
+class JobRunner:
+    """Цикл опроса таблицы jobs в одном воркере"""
+
+    def __init__(self) -> None:
+        self.worker = f"{socket.gethostname()}:{os.getpid()}"
+        self._executor = ThreadPoolExecutor(max_workers=settings.jobs_max_concurrency, thread_name_prefix="job")
+        self._running: dict[uuid.UUID, Future] = {}
+        self._stopping = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        await run_in_threadpool(self._sync_jobs)
+        self._task = asyncio.create_task(self._loop(), name="job-runner")
+
+    @staticmethod
+    def _sync_jobs() -> None:
+        with SessionLocal() as db:
+            sync_cron_jobs(db)
+            enqueue_startup_jobs(db)
+
+    def _claim(self, running: list[uuid.UUID], limit: int) -> list[tuple[uuid.UUID, str]]:
+        with SessionLocal() as db:
+            return _claim(db, self.worker, running, limit)
+
+    async def _tick(self) -> None:
+        self._running = {job_id: future for job_id, future in self._running.items() if not future.done()}
+        free = settings.jobs_max_concurrency - len(self._running)
+        claimed = await run_in_threadpool(self._claim, list(self._running), free)
+        for job_id, name in claimed:
+            logger.debug("job %s claimed by %s", name, self.worker)
+            self._running[job_id] = self._executor.submit(run_job, job_id, self.worker)
+        BACKGROUND_QUEUE_DEPTH.set(len(self._running), "jobs")
+
+    async def _loop(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                await self._tick()
+            except Exception:  # noqa: BLE001
+                logger.exception("job runner tick failed")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=settings.jobs_poll_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    async def stop(self) -> None:
+        self._stopping.set()
+        if self._task is not None:
+            await self._task
+        running = [asyncio.wrap_future(future) for future in self._running.values() if not future.done()]
+        if running:
+            # Незавершённые задачи подхватит другой воркер, когда истечёт аренда
+            await asyncio.wait(running, timeout=settings.jobs_shutdown_timeout_seconds)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_runner: Optional[JobRunner] = None
+
+
+async def start_job_runner() -> None:
+    """Запустить исполнитель фоновых задач (startup приложения)"""
+    global _runner
+    if not settings.jobs_enabled or _runner is not None:
+        return
+    _runner = JobRunner()
+    await _runner.start()
+
+
+async def stop_job_runner() -> None:
+    """Остановить исполнитель, дождавшись выполняющихся задач (shutdown приложения)"""
+    global _runner
+    if _runner is not None:
+        runner, _runner = _runner, None
+        await runner.stop()
+
+
+@register_job("jobs.prune_history", cron="15 3 * * *")
+def prune_job_history(db: Session, payload: dict) -> dict:
+    """Удалить старую историю запусков и завершённые разовые задачи"""
+    cutoff = _now() - timedelta(days=int(payload.get("days", settings.jobs_history_days)))
+    runs = db.execute(delete(JobRun).where(JobRun.started_at < cutoff)).rowcount
+    jobs = db.execute(
+        delete(Job).where(
+            Job.kind == JobKind.ONCE,
+            Job.status.in_([JobStatus.DONE, JobStatus.FAILED]),
+            Job.next_run_at < cutoff,
+        )
+    ).rowcount
+    return {"runs": runs, "jobs": jobs}
+
+
+def list_jobs(db: Session, status: Optional[JobStatus] = None, limit: int = 100) -> list[Job]:
+    """Задачи из таблицы jobs: по умолчанию периодические и ожидающие разовые"""
+    query = select(Job).order_by(Job.next_run_at).limit(limit)
+    if status is not None:
+        query = query.where(Job.status == status)
+    else:
+        query = query.where(or_(Job.kind == JobKind.CRON, Job.status == JobStatus.SCHEDULED))
+    return list(db.execute(query).scalars())
+
+
+def list_job_runs(db: Session, name: Optional[str] = None, limit: int = 50) -> list[JobRun]:
+    """Последние запуски, новые первыми"""
+    query = select(JobRun).order_by(JobRun.started_at.desc()).limit(limit)
+    if name:
+        query = query.where(JobRun.name == name)
+    return list(db.execute(query).scalars())
@@ -0,0 +1,237 @@
+"""
+Метрики в формате Prometheus (GET /metrics)
+
+Собственный минимальный сборщик без внешних зависимостей: счётчики,
+гистограммы и gauge хранятся в словарях под блокировкой, обновление —
+поиск в словаре и bisect по границам корзин. Значения, которые дешевле
+прочитать в момент опроса (пул соединений SQLAlchemy, занятость пула
+потоков), задаются функциями и вычисляются только при рендеринге.
+
+Метки маршрутов — шаблоны (/api/v1/events/{event_id}), а не конкретные
+пути, иначе число рядов росло бы без ограничений.
+"""
+from bisect import bisect_left
+import threading
+import time
+from typing import Callable, Iterable, Optional, Sequence, Union
+
+import anyio.to_thread
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.query_stats import route_template
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = tuple[str, ...]
+Sample = Union[float, dict[LabelValues, float]]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Registry:
+    def __init__(self) -> None:
+        self._metrics: list["_Metric"] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: "_Metric") -> None:
+        with self._lock:
+            if any(existing.name == metric.name for existing in self._metrics):
+                raise ValueError(f"Метрика {metric.name} уже зарегистрирована")
+            self._metrics.append(metric)
+
+    def render(self) -> bytes:
+        lines: list[str] = []
+        for metric in list(self._metrics):
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return ("\n".join(lines) + "\n").encode()
+
+
+REGISTRY = _Registry()
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        REGISTRY.register(self)
+
+    def samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            values = dict(self._values)
+        for labels, value in sorted(values.items()):
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+
+class CallbackGauge(_Metric):
+    """Gauge, значение которого вычисляет функция при каждом опросе"""
+    kind = "gauge"
+
+    def __init__(
+        self, name: str, help: str, collect: Callable[[], Sample], labelnames: Sequence[str] = ()
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        self._collect = collect
+
+    def samples(self) -> Iterable[str]:
+        value = self._collect()
+        values = value if isinstance(value, dict) else {(): value}
+        for labels, number in sorted(values.items()):
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_number(number)}"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # метки -> [счётчики по корзинам (последняя — +Inf), сумма]
+        self._values: dict[LabelValues, list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            values = {labels: (list(counts), total) for labels, (counts, total) in self._values.items()}
+        for labels, (counts, total) in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                yield f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}"
+
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Время обработки HTTP-запроса",
+    ("method", "route", "status"),
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP-запросы в обработке")
+RESPONSE_CACHE_REQUESTS = Counter(
+    "response_cache_requests_total",
+    "Ответы с ETag: hit — тело из кэша процесса, miss — собрано заново, not_modified — 304",
+    ("result",),
+)
+BOT_NOTIFY_DURATION = Histogram("bot_notify_duration_seconds", "Время вызова уведомлений бота", ("method",))
+BOT_NOTIFY_ERRORS = Counter("bot_notify_errors_total", "Ошибки вызова уведомлений бота", ("method", "reason"))
+JOB_DURATION = Histogram("job_duration_seconds", "Время выполнения фоновых задач", ("job", "status"))
+BACKGROUND_QUEUE_DEPTH = Gauge("background_queue_depth", "Фоновые задачи в очереди и в работе", ("queue",))
+
+
+def install_runtime_gauges(engine: Engine) -> None:
+    """Gauge пула соединений и пула потоков (значения читаются при опросе)"""
+    pool = engine.pool
+
+    def pool_state() -> dict[LabelValues, float]:
+        state = {}
+        for name in ("size", "checkedout", "overflow", "checkedin"):
+            method = getattr(pool, name, None)
+            if callable(method):
+                # QueuePool.overflow() отрицателен, пока пул не заполнен
+                state[(name,)] = max(0, method())
+        return state
+
+    def threadpool_state() -> dict[LabelValues, float]:
+        # Опрос выполняется в асинхронном обработчике /metrics, в потоке event loop
+        try:
+            limiter = anyio.to_thread.current_default_thread_limiter()
+        except RuntimeError:
+            return {}
+        return {("busy",): limiter.borrowed_tokens, ("total",): limiter.total_tokens}
+
+    CallbackGauge("db_pool_connections", "Состояние пула соединений SQLAlchemy", pool_state, ("state",))
+    CallbackGauge("threadpool_tokens", "Пул потоков для синхронных эндпоинтов", threadpool_state, ("state",))
+
+
+class MetricsMiddleware:
+    """Гистограмма времени ответа по шаблонам маршрутов и число запросов в обработке"""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Маршрутизатор меняет path/root_path внутри смонтированных приложений
+        path, root_path = scope.get("path", ""), scope.get("root_path", "")
+        status_code: Optional[int] = None
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            route = route_template({**scope, "path": path, "root_path": root_path}, default="unmatched")
+            status = f"{(status_code or 500) // 100}xx"
+            HTTP_REQUEST_DURATION.observe(time.perf_counter() - started, scope["method"], route, status)
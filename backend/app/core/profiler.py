@@ -0,0 +1,267 @@
+"""
+Сэмплирующий профилировщик запросов
+
+Включается settings.profiler_enabled (по умолчанию выключен). Профиль
+запроса снимается, если:
+- администратор прислал заголовок X-Profile: 1 (проверяется его токен);
+- запрос попал в выборку settings.profiler_sample_rate (доля 0..1).
+
+Пока запрос выполняется, отдельный поток раз в settings.profiler_interval_ms
+читает стеки потоков (sys._current_frames) — сам код запроса не
+инструментируется. Синхронные эндпоинты выполняются в пуле потоков, поэтому
+сэмплируются все занятые потоки процесса; простаивающие (ожидание очереди,
+select event loop) отбрасываются. Одновременно снимается не больше одного
+профиля; при параллельных запросах их стеки тоже попадут в профиль — в
+метаданных сохраняется число запросов в обработке.
+
+Профили пишутся в формате speedscope (https://www.speedscope.app) в
+settings.profiles_dir; хранится не больше settings.profiles_max_files
+последних, старые удаляются. Идентификатор профиля возвращается в заголовке
+ответа X-Profile-Id.
+"""
+from dataclasses import dataclass
+from datetime import datetime, timezone
+import json
+import logging
+import os
+from pathlib import Path
+import random
+import re
+import sys
+import threading
+import time
+from typing import Optional
+import uuid
+
+from jose import JWTError, jwt
+from starlette.concurrency import run_in_threadpool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import HTTP_REQUESTS_IN_FLIGHT
+from app.core.query_stats import route_template
+from app.db.session import SessionLocal
+from app.models.user import User, UserRole
+
+logger = logging.getLogger(__name__)
+
+PROFILE_SUFFIX = ".speedscope.json"
+META_SUFFIX = ".meta.json"
+PROFILE_ID_RE = re.compile(r"^\d{8}T\d{12}-[0-9a-f]{8}$")
+MAX_STACK_DEPTH = 200
+
+# Файлы, в которых поток ждёт работы: такие стеки в профиль не попадают
+_IDLE_FILES = ("threading.py", "queue.py", "selectors.py")
+
+_busy = threading.Lock()
+
+
+@dataclass
+class ProfileInfo:
+    id: str
+    method: str
+    route: str
+    status: int
+    duration_ms: float
+    samples: int
+    in_flight: int
+    created_at: datetime
+    size: int
+
+
+class _Sampler:
+    """Фоновый поток, собирающий стеки всех занятых потоков"""
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self.frames: list[dict] = []
+        self._frame_index: dict[tuple, int] = {}
+        # поток -> (стеки от корня к листу, веса в секундах)
+        self.samples: dict[int, tuple[list[list[int]], list[float]]] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+
+    def start(self) -> None:
+        self.started = time.perf_counter()
+        self._thread.start()
+
+    def stop(self) -> float:
+        self._stop.set()
+        self._thread.join()
+        return time.perf_counter() - self.started
+
+    def _frame(self, code) -> int:
+        key = (code.co_qualname, code.co_filename, code.co_firstlineno)
+        index = self._frame_index.get(key)
+        if index is None:
+            index = self._frame_index[key] = len(self.frames)
+            self.frames.append({"name": key[0], "file": key[1], "line": key[2]})
+        return index
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            weight, last = now - last, now
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own or frame.f_code.co_filename.endswith(_IDLE_FILES):
+                    continue
+                stack = []
+                while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                    stack.append(self._frame(frame.f_code))
+                    frame = frame.f_back
+                stack.reverse()
+                stacks, weights = self.samples.setdefault(thread_id, ([], []))
+                stacks.append(stack)
+                weights.append(weight)
+
+    def speedscope(self, name: str, duration: float) -> dict:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "edu-max profiler",
+            "shared": {"frames": self.frames},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": names.get(thread_id, f"thread {thread_id}"),
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": duration,
+                    "samples": stacks,
+                    "weights": weights,
+                }
+                for thread_id, (stacks, weights) in self.samples.items()
+            ],
+        }
+
+
+def _profiles_dir() -> Path:
+    return Path(settings.profiles_dir)
+
+
+def _is_admin(authorization: Optional[str]) -> bool:
+    if not authorization or not authorization.lower().startswith("bearer "):
+        return False
+    try:
+        payload = jwt.decode(authorization[7:], settings.secret_key, algorithms=[settings.algorithm])
+        user_id = uuid.UUID(str(payload.get("sub")))
+    except (JWTError, ValueError):
+        return False
+    with SessionLocal() as db:
+        user = db.get(User, user_id)
+        return user is not None and user.role == UserRole.ADMIN
+
+
+def _save(profile_id: str, profile: dict, meta: dict) -> None:
+    directory = _profiles_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    for suffix, payload in ((PROFILE_SUFFIX, profile), (META_SUFFIX, meta)):
+        tmp = directory / f".{profile_id}{suffix}.tmp"
+        tmp.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, directory / f"{profile_id}{suffix}")
+    _prune(directory, settings.profiles_max_files)
+
+
+def _prune(directory: Path, keep: int) -> None:
+    # Идентификатор начинается с времени, поэтому сортировка по имени — по возрасту
+    profiles = sorted(path.name[: -len(PROFILE_SUFFIX)] for path in directory.glob(f"*{PROFILE_SUFFIX}"))
+    for profile_id in profiles[: max(0, len(profiles) - keep)]:
+        for suffix in (PROFILE_SUFFIX, META_SUFFIX):
+            (directory / f"{profile_id}{suffix}").unlink(missing_ok=True)
+
+
+def list_profiles() -> list[ProfileInfo]:
+    """Сохранённые профили, новые первыми"""
+    directory = _profiles_dir()
+    result = []
+    for meta_path in sorted(directory.glob(f"*{META_SUFFIX}"), reverse=True):
+        profile_id = meta_path.name[: -len(META_SUFFIX)]
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            size = (directory / f"{profile_id}{PROFILE_SUFFIX}").stat().st_size
+        except (OSError, ValueError):
+            continue  # профиль удалён между чтениями
+        result.append(ProfileInfo(
+            id=profile_id,
+            created_at=datetime.fromisoformat(meta["created_at"]),
+            size=size,
+            **{key: meta[key] for key in ("method", "route", "status", "duration_ms", "samples", "in_flight")},
+        ))
+    return result
+
+
+def profile_path(profile_id: str) -> Path:
+    """Путь к файлу профиля; ValueError, если идентификатор некорректен или профиля нет"""
+    if not PROFILE_ID_RE.match(profile_id):
+        raise ValueError("Некорректный идентификатор профиля")
+    path = _profiles_dir() / f"{profile_id}{PROFILE_SUFFIX}"
+    if not path.is_file():
+        raise ValueError("Профиль не найден")
+    return path
+
+
+class ProfilerMiddleware:
+    """Снимает профиль запроса по заголовку администратора или случайной выборке"""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def _should_profile(self, scope: Scope) -> bool:
+        headers = dict(scope.get("headers") or ())
+        if headers.get(b"x-profile", b"").strip() not in (b"", b"0"):
+            authorization = headers.get(b"authorization", b"").decode("latin-1")
+            # Без токена или пока снимается другой профиль — отказ без обращения к БД
+            if not authorization.lower().startswith("bearer ") or _busy.locked():
+                return False
+            return await run_in_threadpool(_is_admin, authorization)
+        return settings.profiler_sample_rate > 0 and random.random() < settings.profiler_sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not await self._should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+        if not _busy.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            created_at = datetime.now(timezone.utc)
+            profile_id = f"{created_at:%Y%m%dT%H%M%S%f}-{uuid.uuid4().hex[:8]}"
+            path, root_path = scope.get("path", ""), scope.get("root_path", "")
+            status_code = 500
+            in_flight = 0
+
+            async def send_wrapper(message: Message) -> None:
+                nonlocal status_code, in_flight
+                if message["type"] == "http.response.start":
+                    status_code = message["status"]
+                    in_flight = int(HTTP_REQUESTS_IN_FLIGHT.value())
+                    message["headers"] = [*message.get("headers", []), (b"x-profile-id", profile_id.encode())]
+                await send(message)
+
+            sampler = _Sampler(settings.profiler_interval_ms / 1000)
+            sampler.start()
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                duration = sampler.stop()
+                route = route_template({**scope, "path": path, "root_path": root_path}, default="unmatched")
+                name = f"{scope['method']} {route}"
+                meta = {
+                    "method": scope["method"],
+                    "route": route,
+                    "status": status_code,
+                    "duration_ms": round(duration * 1000, 1),
+                    "samples": sum(len(stacks) for stacks, _ in sampler.samples.values()),
+                    "in_flight": in_flight,
+                    "created_at": created_at.isoformat(),
+                }
+                try:
+                    await run_in_threadpool(_save, profile_id, sampler.speedscope(name, duration), meta)
+                except OSError as exc:
+                    logger.warning("failed to save profile %s: %s", profile_id, exc)
+        finally:
+            _busy.release()
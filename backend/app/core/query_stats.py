@@ -0,0 +1,190 @@
+"""
+Учёт SQL-запросов на HTTP-запрос
+
+- QueryStatsMiddleware заводит на каждый HTTP-запрос счётчик (contextvar;
+  синхронные эндпоинты и зависимости выполняются в пуле потоков с копией
+  контекста, поэтому видят тот же объект) и добавляет к ответу заголовок
+  Server-Timing: db;dur=<мс>;desc="SQL xN", app;dur=<мс>.
+- Хуки движка (install_query_hooks) замеряют каждый запрос; запросы дольше
+  settings.slow_query_ms пишутся в лог с нормализованным SQL и шаблоном
+  маршрута.
+- query_budget — помощник для тестов и бенчмарков: собирает запросы,
+  выполненные внутри блока в любом потоке, и проверяет их число.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+import logging
+import re
+import threading
+import time
+from typing import Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_SPACES_RE = re.compile(r"\s+")
+_IN_LIST_RE = re.compile(r"\((?:\s*\?\s*,)+\s*\?\s*\)")
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+
+
+@dataclass
+class QueryStats:
+    """SQL-запросы одного HTTP-запроса"""
+    scope: Scope
+    count: int = 0
+    duration: float = 0.0  # секунды
+
+    @property
+    def endpoint(self) -> str:
+        return f"{self.scope.get('method', '')} {route_template(self.scope)}".strip()
+
+
+@dataclass
+class CapturedQueries:
+    """Запросы, собранные query_budget"""
+    statements: list[str] = field(default_factory=list)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+_captures: list[CapturedQueries] = []
+_captures_lock = threading.Lock()
+_templates: dict = {}
+
+
+def normalize_sql(statement: str) -> str:
+    """SQL без литералов и с одним плейсхолдером вместо списков IN"""
+    statement = _SPACES_RE.sub(" ", statement).strip()
+    statement = _LITERAL_RE.sub("?", statement)
+    return _IN_LIST_RE.sub("(?...)", statement)
+
+
+def route_template(scope: Scope, default: Optional[str] = None) -> str:
+    """
+    Шаблон маршрута (/api/v1/events/{event_id}) вместо конкретного пути
+
+    Если маршрут не найден, возвращается default, а без него — сам путь.
+    """
+    endpoint = scope.get("endpoint")
+    template = _templates.get(endpoint) if endpoint is not None else None
+    if template is not None:
+        return template
+    for route in getattr(scope.get("app"), "routes", ()):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            template = getattr(route, "path", None) or scope.get("path", "")
+            if endpoint is not None and getattr(route, "endpoint", getattr(route, "app", None)) is endpoint:
+                _templates[endpoint] = template
+            return template
+    return default if default is not None else scope.get("path", "")
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    return _current.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    stats = _current.get()
+    if stats is not None:
+        stats.count += 1
+        stats.duration += elapsed
+    if _captures:
+        with _captures_lock:
+            for captured in _captures:
+                captured.statements.append(statement)
+    if settings.slow_query_ms and elapsed * 1000 >= settings.slow_query_ms:
+        logger.warning(
+            "slow query %.1f ms [%s]: %s",
+            elapsed * 1000,
+            stats.endpoint if stats is not None else "-",
+            normalize_sql(statement),
+        )
+
+
+def _handle_error(context) -> None:
+    # after_cursor_execute при ошибке не вызывается — снимаем отметку начала
+    if context.connection is not None:
+        started = context.connection.info.get("query_started")
+        if started:
+            started.pop()
+
+
+def install_query_hooks(engine: Engine) -> None:
+    """Подключить замер SQL-запросов к движку (один раз при старте)"""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
+
+
+class QueryStatsMiddleware:
+    """Счётчик SQL-запросов на HTTP-запрос и заголовок Server-Timing"""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats(scope=scope)
+        token = _current.set(stats)
+        started = time.perf_counter()
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                total_ms = (time.perf_counter() - started) * 1000
+                value = (
+                    f'db;dur={stats.duration * 1000:.1f};desc="SQL x{stats.count}", '
+                    f"app;dur={total_ms:.1f}"
+                )
+                message["headers"] = [*message.get("headers", []), (b"server-timing", value.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+
+
+@contextmanager
+def query_budget(max_queries: Optional[int] = None) -> Iterator[CapturedQueries]:
+    """
+    Собрать SQL-запросы, выполненные внутри блока, и проверить бюджет
+
+        with query_budget(3):
+            client.get("/api/v1/users/profile", headers=headers)
+
+    Запросы учитываются во всех потоках (TestClient выполняет приложение в
+    отдельном), поэтому блоки не должны пересекаться с посторонней нагрузкой.
+    Нужны хуки install_query_hooks (ставятся при импорте app.main).
+    """
+    captured = CapturedQueries()
+    with _captures_lock:
+        _captures.append(captured)
+    try:
+        yield captured
+    finally:
+        with _captures_lock:
+            _captures.remove(captured)
+    if max_queries is not None and captured.count > max_queries:
+        listing = "\n".join(f"  {n}. {normalize_sql(sql)}" for n, sql in enumerate(captured.statements, 1))
+        raise AssertionError(
+            f"Превышен бюджет SQL-запросов: {captured.count} > {max_queries}\n{listing}"
+        )
@@ -0,0 +1,33 @@
+"""
+JSON-ответ на orjson
+
+Используется как default_response_class приложения: FastAPI сериализует
+response_model средствами pydantic, а в байты данные переводит orjson
+(в несколько раз быстрее json.dumps). Ключи словарей не обязаны быть
+строками (например, EventRead.image_srcset — {ширина: путь}).
+"""
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """Сериализовать в JSON (UUID, datetime, enum и модели pydantic поддерживаются)"""
+    return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+
+
+class ORJSONResponse(JSONResponse):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -16,13 +16,18 @@ from app.models.schedule_meta import ScheduleMeta
 from app.models.schedule_changelog import ScheduleChangelog
 from app.models.approval_road import ApprovalRoad
 from app.models.request import Request
+from app.models.document_blob import DocumentBlob
 from app.models.request_document import RequestDocument
 from app.models.request_approval_step import RequestApprovalStep
-from app.models.event import Event, EventRegistration
+from app.models.event import Event, EventRegistration, EventReminder, Topic, EventTopic
 from app.models.payment import Payment, PaymentHistory
 from app.models.library import LibraryAccess
-from app.models.elective import Elective, ElectiveRegistration
+from app.models.elective import Elective, ElectivePreference, ElectiveRegistration
 from app.models.broadcast import Broadcast
+from app.models.search_document import SearchDocument
+from app.models.cache_version import CacheVersion
+from app.models.job import Job, JobRun
+from app.models.waitlist import Waitlist, WaitlistEntry
 
 __all__ = [
     "Base",
@@ -42,15 +47,26 @@ __all__ = [
     "ScheduleMeta",
     "ScheduleChangelog",
     "Request",
+    "DocumentBlob",
     "RequestDocument",
     "RequestApprovalStep",
     "ApprovalRoad",
     "Event",
     "EventRegistration",
+    "EventReminder",
+    "Topic",
+    "EventTopic",
     "Payment",
     "PaymentHistory",
     "LibraryAccess",
     "Elective",
     "ElectiveRegistration",
+    "ElectivePreference",
     "Broadcast",
+    "SearchDocument",
+    "CacheVersion",
+    "Job",
+    "JobRun",
+    "Waitlist",
+    "WaitlistEntry",
 ]
@@ -1,13 +1,27 @@
 from pathlib import Path
+import secrets
 
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
+from fastapi import Request as HTTPRequest  # Request из моделей перекрывается импортом base ниже
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from starlette.responses import Response
 
 from app.api.v1.router import api_router
 from app.core.config import settings
+from app.core.jobs import enqueue_job, start_job_runner, stop_job_runner
+from app.core.metrics import REGISTRY, MetricsMiddleware, install_runtime_gauges
+from app.core.profiler import ProfilerMiddleware
+from app.core.query_stats import QueryStatsMiddleware, install_query_hooks
+from app.core.responses import ORJSONResponse
 from app.db.base import Base
-from app.db.session import engine
+from app.db.session import SessionLocal, engine
+from app.services.event_image_service import shutdown_image_pool
+from app.services import event_reminder_service  # noqa: F401  регистрирует фоновую задачу напоминаний
+from app.services.file_serving import PublicStaticFiles
+from app.services.menu_service import load_menus
+from app.services.participant_counter_service import ensure_counter_triggers
+from app.services.response_cache import create_cache_versions
+from app.services.search_service import ensure_search_index
 # Импортируем все модели для правильной инициализации relationships
 from app.db.base import *  # noqa: F401, F403
 
@@ -22,13 +36,34 @@ app = FastAPI(
     license_info={
         "name": "MIT",
     },
+    default_response_class=ORJSONResponse,
     swagger_ui_parameters={
         "docExpansion": "none",
         "defaultModelsExpandDepth": -1,
     },
 )
 
+install_query_hooks(engine)
+install_runtime_gauges(engine)
 Base.metadata.create_all(bind=engine)
+ensure_search_index(engine)
+load_menus()
+
+
+def prepare_database() -> None:
+    """Идемпотентная подготовка БД в каждом воркере до приёма запросов"""
+    with SessionLocal() as db:
+        create_cache_versions(db)
+        if ensure_counter_triggers(engine):
+            # Счётчики, изменённые до смены триггеров, сверит фоновая задача
+            enqueue_job(db, "counters.reconcile")
+            db.commit()
+
+
+app.add_event_handler("startup", prepare_database)
+app.add_event_handler("startup", start_job_runner)
+app.add_event_handler("shutdown", stop_job_runner)
+app.add_event_handler("shutdown", shutdown_image_pool)
 
 app.include_router(api_router, prefix=settings.api_v1_prefix)
 
@@ -39,10 +74,16 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+if settings.query_stats_enabled:
+    app.add_middleware(QueryStatsMiddleware)
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+if settings.profiler_enabled:
+    app.add_middleware(ProfilerMiddleware)
 
 static_dir = Path(settings.static_root)
 static_dir.mkdir(parents=True, exist_ok=True)
-app.mount(settings.static_url, StaticFiles(directory=static_dir, check_dir=False), name="static")
+app.mount(settings.static_url, PublicStaticFiles(directory=static_dir, check_dir=False), name="static")
 
 @app.get(
     "/health",
@@ -52,3 +93,19 @@ app.mount(settings.static_url, StaticFiles(directory=static_dir, check_dir=False
 )
 def healthcheck():
     return {"status": "ok"}
+
+
+@app.get(
+    "/metrics",
+    tags=["Служебные"],
+    summary="Метрики",
+    description="Метрики в формате Prometheus",
+    include_in_schema=False,
+)
+async def metrics(request: HTTPRequest):
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=404, detail="Not Found")
+    expected = f"Bearer {settings.metrics_token}"
+    if settings.metrics_token and not secrets.compare_digest(request.headers.get("authorization", ""), expected):
+        raise HTTPException(status_code=401, detail="Неверный токен метрик")
+    return Response(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,11 @@
+from sqlalchemy import Column, String, Integer
+
+from app.db.base_class import Base
+
+
+class CacheVersion(Base):
+    """Счётчик версии справочника для валидаторов HTTP-кэша (см. response_cache)"""
+    __tablename__ = "cache_versions"
+
+    name = Column(String(64), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
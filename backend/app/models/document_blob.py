@@ -0,0 +1,19 @@
+from sqlalchemy import Column, String, Text, DateTime, Integer
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+
+from app.db.base_class import Base
+
+
+class DocumentBlob(Base):
+    """Содержимое загруженного файла, адресуемое по sha256"""
+    __tablename__ = "document_blobs"
+
+    sha256 = Column(String(64), primary_key=True)
+    file_path = Column(Text, nullable=False)  # Путь относительно static_root: blobs/ab/cd/<sha256>
+    size = Column(Integer, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0)  # Сколько документов ссылается на blob
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    # Relationships
+    documents = relationship("RequestDocument", back_populates="blob")
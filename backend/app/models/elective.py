@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Text, DateTime, Integer, ForeignKey
+from sqlalchemy import Column, Text, DateTime, Integer, ForeignKey, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import uuid
@@ -41,3 +41,18 @@ class ElectiveRegistration(Base):
     elective = relationship("Elective", back_populates="registrations")
     user = relationship("User", foreign_keys=[user_id])
 
+
+class ElectivePreference(Base):
+    """Приоритет электива в списке студента (для пакетного распределения)"""
+    __tablename__ = "elective_preferences"
+    __table_args__ = (
+        UniqueConstraint("user_id", "rank", name="uq_elective_preferences_rank"),
+    )
+
+    user_id = Column(GUID(), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    elective_id = Column(GUID(), ForeignKey("electives.id", ondelete="CASCADE"), primary_key=True, index=True)
+    rank = Column(Integer, nullable=False)  # 1 — самый желанный
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    # Relationships
+    elective = relationship("Elective")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, DateTime, Integer, Enum as SQLEnum, ForeignKey
+from sqlalchemy import Column, String, Text, DateTime, Integer, Enum as SQLEnum, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -22,11 +22,17 @@ class EventFormat(str, enum.Enum):
 
 class Event(Base):
     __tablename__ = "events"
+    __table_args__ = (
+        # Фильтры ленты: тип/формат вместе с сортировкой по дате, диапазон цен
+        Index("ix_events_type_date", "event_type", "date"),
+        Index("ix_events_format_date", "format", "date"),
+        Index("ix_events_price", "price"),
+    )
 
     id = Column(GUID(), primary_key=True, default=uuid.uuid4, index=True)
     title = Column(Text, nullable=False)
     description = Column(Text, nullable=True)
-    date = Column(DateTime(timezone=True), nullable=False)  # Дата и время начала
+    date = Column(DateTime(timezone=True), nullable=False, index=True)  # Дата и время начала
     end_time = Column(DateTime(timezone=True), nullable=True)  # Время окончания
     event_type = Column(SQLEnum(EventType), nullable=False, default=EventType.FREE)
     price = Column(Integer, nullable=True)  # Стоимость (если платное)
@@ -35,14 +41,46 @@ class Event(Base):
     max_participants = Column(Integer, nullable=False, default=100)
     current_participants = Column(Integer, nullable=False, default=0)
     image_url = Column(Text, nullable=True)  # URL фото мероприятия
+    image_variants = Column(Text, nullable=True)  # JSON {ширина: путь} WebP-вариантов фото
     speaker_name = Column(Text, nullable=True)  # Имя спикера
     speaker_bio = Column(Text, nullable=True)  # Биография спикера
-    topics = Column(Text, nullable=True)  # JSON массив тем
+    topics = Column(Text, nullable=True)  # JSON массив тем (связи с Topic строятся по нему)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
     # Relationships
     registrations = relationship("EventRegistration", back_populates="event", cascade="all, delete-orphan")
+    topic_links = relationship("EventTopic", back_populates="event", cascade="all, delete-orphan")
+
+
+# Мероприятия со свободными местами (фильтр has_free_seats использует то же выражение)
+Index("ix_events_seats_left_date", Event.max_participants - Event.current_participants, Event.date)
+
+
+class Topic(Base):
+    """Тема мероприятия (справочник для фильтрации и фасетов)"""
+    __tablename__ = "topics"
+
+    id = Column(GUID(), primary_key=True, default=uuid.uuid4, index=True)
+    name = Column(Text, nullable=False)  # Название как при первом упоминании
+    key = Column(String, nullable=False, unique=True)  # Нормализованное название для поиска
+
+    # Relationships
+    event_links = relationship("EventTopic", back_populates="topic")
+
+
+class EventTopic(Base):
+    __tablename__ = "event_topics"
+    __table_args__ = (
+        Index("ix_event_topics_topic_event", "topic_id", "event_id"),
+    )
+
+    event_id = Column(GUID(), ForeignKey("events.id", ondelete="CASCADE"), primary_key=True)
+    topic_id = Column(GUID(), ForeignKey("topics.id", ondelete="CASCADE"), primary_key=True)
+
+    # Relationships
+    event = relationship("Event", back_populates="topic_links")
+    topic = relationship("Topic", back_populates="event_links")
 
 
 class EventRegistration(Base):
@@ -57,3 +95,13 @@ class EventRegistration(Base):
     event = relationship("Event", back_populates="registrations")
     user = relationship("User", foreign_keys=[user_id])
 
+
+class EventReminder(Base):
+    """Отметка об отправленном напоминании (см. event_reminder_service)"""
+    __tablename__ = "event_reminders"
+
+    event_id = Column(GUID(), ForeignKey("events.id", ondelete="CASCADE"), primary_key=True)
+    user_id = Column(GUID(), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    window_minutes = Column(Integer, primary_key=True)  # За сколько минут до начала напоминали
+    event_date = Column(DateTime(timezone=True), nullable=False, index=True)  # Дата мероприятия на момент отправки
+    sent_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
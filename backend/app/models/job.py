@@ -0,0 +1,70 @@
+from sqlalchemy import Column, String, Text, DateTime, Integer, Float, JSON, Enum as SQLEnum, ForeignKey, Index
+from sqlalchemy.sql import func
+import enum
+import uuid
+
+from app.db.base_class import Base
+from app.db.types import GUID
+
+
+class JobKind(str, enum.Enum):
+    """Тип фоновой задачи"""
+    CRON = "cron"  # Периодическая, одна строка на задачу
+    ONCE = "once"  # Разовая (отложенная)
+
+
+class JobStatus(str, enum.Enum):
+    """Состояние фоновой задачи"""
+    SCHEDULED = "scheduled"  # Ждёт запуска (выполняется, если захвачена: locked_until в будущем)
+    DONE = "done"  # Разовая задача выполнена
+    FAILED = "failed"  # Разовая задача исчерпала попытки
+
+
+class JobRunStatus(str, enum.Enum):
+    """Результат запуска задачи"""
+    RUNNING = "running"
+    SUCCESS = "success"
+    FAILED = "failed"
+
+
+class Job(Base):
+    """Фоновая задача (см. app/core/jobs.py)"""
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # Выборка задач к запуску
+        Index("ix_jobs_status_next_run", "status", "next_run_at"),
+    )
+
+    id = Column(GUID(), primary_key=True, default=uuid.uuid4)
+    name = Column(String(128), nullable=False, index=True)  # Имя зарегистрированной задачи
+    kind = Column(SQLEnum(JobKind), nullable=False, default=JobKind.ONCE)
+    cron = Column(String(64), nullable=True)  # Расписание периодической задачи
+    payload = Column(JSON, nullable=True)  # Аргументы разовой задачи
+    status = Column(SQLEnum(JobStatus), nullable=False, default=JobStatus.SCHEDULED)
+    next_run_at = Column(DateTime(timezone=True), nullable=False)  # Когда запустить (UTC)
+    attempts = Column(Integer, nullable=False, default=0)  # Сколько раз задача захватывалась
+    locked_by = Column(String(128), nullable=True)  # Воркер, выполняющий задачу
+    locked_until = Column(DateTime(timezone=True), nullable=True)  # Срок аренды; продлевается, пока задача идёт
+    last_run_at = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+class JobRun(Base):
+    """История запусков фоновых задач"""
+    __tablename__ = "job_runs"
+    __table_args__ = (
+        Index("ix_job_runs_name_started", "name", "started_at"),
+    )
+
+    id = Column(GUID(), primary_key=True, default=uuid.uuid4)
+    job_id = Column(GUID(), ForeignKey("jobs.id", ondelete="SET NULL"), nullable=True, index=True)
+    name = Column(String(128), nullable=False)
+    worker = Column(String(128), nullable=False)  # host:pid воркера
+    attempt = Column(Integer, nullable=False, default=1)
+    status = Column(SQLEnum(JobRunStatus), nullable=False, default=JobRunStatus.RUNNING)
+    started_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    duration_ms = Column(Float, nullable=True)
+    result = Column(JSON, nullable=True)  # Что вернула задача (счётчики и т. п.)
+    error = Column(Text, nullable=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, DateTime, ForeignKey, Enum as SQLEnum, Text
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Enum as SQLEnum, Text, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -26,6 +26,10 @@ class RequestStatus(str, enum.Enum):
 
 class Request(Base):
     __tablename__ = "requests"
+    __table_args__ = (
+        # Входящие на согласование: WHERE current_approver_id = ? AND status = ? ORDER BY id DESC
+        Index("ix_requests_approver_status_id", "current_approver_id", "status", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     request_type = Column(SQLEnum(RequestType), nullable=False)  # Тип заявки
@@ -44,5 +48,10 @@ class Request(Base):
     # ApprovalRoad relationship убран из-за проблем с инициализацией
     # Если нужен доступ к approval_road, можно получить через approval_road_id напрямую
     documents = relationship("RequestDocument", back_populates="request", cascade="all, delete-orphan")
-    approval_steps = relationship("RequestApprovalStep", back_populates="request", cascade="all, delete-orphan")
+    approval_steps = relationship(
+        "RequestApprovalStep",
+        back_populates="request",
+        cascade="all, delete-orphan",
+        order_by="RequestApprovalStep.step_order",
+    )
 
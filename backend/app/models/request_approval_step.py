@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, DateTime, ForeignKey, Enum as SQLEnum, Text
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Enum as SQLEnum, Text, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -18,6 +18,9 @@ class ApprovalAction(str, enum.Enum):
 class RequestApprovalStep(Base):
     """Шаги согласования заявки"""
     __tablename__ = "request_approval_steps"
+    __table_args__ = (
+        Index("ix_request_approval_steps_approver_action", "approver_user_id", "action", "request_id"),
+    )
 
     id = Column(GUID(), primary_key=True, default=uuid.uuid4, index=True)
     request_id = Column(Integer, ForeignKey("requests.id", ondelete="CASCADE"), nullable=False, index=True)
@@ -16,8 +16,10 @@ class RequestDocument(Base):
     file_path = Column(Text, nullable=False)  # Путь к файлу на сервере
     file_size = Column(Integer, nullable=True)  # Размер файла в байтах
     mime_type = Column(String, nullable=True)  # MIME тип файла
+    blob_sha256 = Column(String(64), ForeignKey("document_blobs.sha256"), nullable=True, index=True)  # Содержимое в хранилище blob'ов
     uploaded_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
     # Relationships
     request = relationship("Request", back_populates="documents")
+    blob = relationship("DocumentBlob", back_populates="documents")
 
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, String, Text, Integer, UniqueConstraint
+import enum
+
+from app.db.base_class import Base
+
+
+class SearchKind(str, enum.Enum):
+    """Тип индексируемой сущности"""
+    EVENT = "event"  # Мероприятие
+    ELECTIVE = "elective"  # Электив
+    BROADCAST = "broadcast"  # Рассылка
+
+
+class SearchDocument(Base):
+    """Текст сущности для полнотекстового поиска (см. search_service)"""
+    __tablename__ = "search_documents"
+    __table_args__ = (
+        UniqueConstraint("kind", "entity_id", name="uq_search_documents_kind_entity"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)  # rowid в FTS-индексе SQLite
+    kind = Column(String(16), nullable=False)
+    entity_id = Column(String, nullable=False)
+    title = Column(Text, nullable=False, default="")
+    body = Column(Text, nullable=False, default="")
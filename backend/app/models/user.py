@@ -24,6 +24,7 @@ class User(Base):
     city = Column(Text, nullable=False)
     university_id = Column(GUID(), ForeignKey("universities.id"), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    profile_version = Column(Integer, nullable=False, default=0)  # Версия данных личного кабинета (см. response_cache)
 
     # Relationships
     university = relationship("University", back_populates="users", foreign_keys=[university_id])
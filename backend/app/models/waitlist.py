@@ -0,0 +1,44 @@
+from sqlalchemy import Column, DateTime, Integer, Enum as SQLEnum, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.sql import func
+import enum
+import uuid
+
+from app.db.base_class import Base
+from app.db.types import GUID
+
+
+class WaitlistKind(str, enum.Enum):
+    """На что ведётся лист ожидания"""
+    EVENT = "event"  # Мероприятие
+    ELECTIVE = "elective"  # Электив
+
+
+class Waitlist(Base):
+    """
+    Счётчики листа ожидания (см. waitlist_service)
+
+    Позиции записей абсолютные и идут подряд: первая в очереди —
+    offset + 1, последняя — offset + size. Место в очереди — position - offset.
+    """
+    __tablename__ = "waitlists"
+
+    kind = Column(SQLEnum(WaitlistKind), primary_key=True)
+    target_id = Column(GUID(), primary_key=True)  # ID мероприятия или электива
+    offset = Column(Integer, nullable=False, default=0)  # Сколько записей уже ушло из головы очереди
+    size = Column(Integer, nullable=False, default=0)  # Сколько записей ждёт
+
+
+class WaitlistEntry(Base):
+    """Запись в листе ожидания"""
+    __tablename__ = "waitlist_entries"
+    __table_args__ = (
+        UniqueConstraint("kind", "target_id", "user_id", name="uq_waitlist_entries_user"),
+        Index("ix_waitlist_entries_position", "kind", "target_id", "position"),
+    )
+
+    id = Column(GUID(), primary_key=True, default=uuid.uuid4)
+    kind = Column(SQLEnum(WaitlistKind), nullable=False)
+    target_id = Column(GUID(), nullable=False)
+    user_id = Column(GUID(), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    position = Column(Integer, nullable=False)  # Абсолютная позиция (см. Waitlist)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
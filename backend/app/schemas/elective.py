@@ -48,3 +48,15 @@ class ElectiveRegistrationRead(BaseModel):
     registered_at: datetime
     model_config = ConfigDict(from_attributes=True)
 
+
+class ElectivePreferencesUpdate(BaseModel):
+    """Список приоритетов: ID элективов, первый — самый желанный"""
+    elective_ids: List[uuid.UUID]
+
+
+class ElectivePreferenceRead(BaseModel):
+    """Схема для чтения приоритета электива"""
+    elective_id: uuid.UUID
+    rank: int
+    title: Optional[str] = None
+    model_config = ConfigDict(from_attributes=True)
@@ -1,6 +1,6 @@
 from datetime import datetime
 from pydantic import BaseModel, ConfigDict
-from typing import List, Optional
+from typing import Dict, List, Optional
 import uuid
 import json
 
@@ -49,12 +49,28 @@ class EventRead(EventBase):
     id: uuid.UUID
     current_participants: int
     image_url: Optional[str] = None
+    image_srcset: Optional[Dict[int, str]] = None  # WebP-варианты фото {ширина: путь}
     created_at: datetime
     updated_at: datetime
     is_registered: bool = False  # Зарегистрирован ли текущий пользователь
     model_config = ConfigDict(from_attributes=True)
 
 
+class TopicFacet(BaseModel):
+    """Тема и количество мероприятий с ней"""
+    name: str
+    count: int
+
+
+class EventFacets(BaseModel):
+    """Количество мероприятий по значениям фильтров ленты"""
+    total: int  # С учётом всех фильтров
+    event_type: Dict[str, int] = {}
+    format: Dict[str, int] = {}
+    topics: List[TopicFacet] = []
+    with_free_seats: int = 0
+
+
 class EventRegistrationRead(BaseModel):
     """Схема для чтения записи на мероприятие"""
     id: uuid.UUID
@@ -0,0 +1,45 @@
+from datetime import datetime
+from pydantic import BaseModel, ConfigDict
+from typing import Any, Optional
+import uuid
+
+from app.models.job import JobKind, JobRunStatus, JobStatus
+
+
+class JobRead(BaseModel):
+    """Фоновая задача"""
+    id: uuid.UUID
+    name: str
+    kind: JobKind
+    cron: Optional[str] = None
+    payload: Optional[dict[str, Any]] = None
+    status: JobStatus
+    next_run_at: datetime
+    attempts: int
+    locked_by: Optional[str] = None  # Воркер, который сейчас выполняет задачу
+    locked_until: Optional[datetime] = None
+    last_run_at: Optional[datetime] = None
+    last_error: Optional[str] = None
+    model_config = ConfigDict(from_attributes=True)
+
+
+class JobRunRead(BaseModel):
+    """Запуск фоновой задачи"""
+    id: uuid.UUID
+    job_id: Optional[uuid.UUID] = None
+    name: str
+    worker: str
+    attempt: int
+    status: JobRunStatus
+    started_at: datetime
+    finished_at: Optional[datetime] = None
+    duration_ms: Optional[float] = None
+    result: Optional[dict[str, Any]] = None
+    error: Optional[str] = None
+    model_config = ConfigDict(from_attributes=True)
+
+
+class JobEnqueue(BaseModel):
+    """Внеочередной запуск задачи"""
+    payload: dict[str, Any] = {}
+    run_at: Optional[datetime] = None  # По умолчанию — сразу
@@ -0,0 +1,17 @@
+from datetime import datetime
+
+from pydantic import BaseModel, ConfigDict
+
+
+class ProfileRead(BaseModel):
+    """Сохранённый профиль запроса"""
+    id: str
+    method: str
+    route: str  # Шаблон маршрута
+    status: int
+    duration_ms: float
+    samples: int  # Снятых стеков (по всем потокам)
+    in_flight: int  # Запросов в обработке в момент ответа (стеки параллельных запросов тоже в профиле)
+    created_at: datetime
+    size: int  # Размер файла, байт
+    model_config = ConfigDict(from_attributes=True)
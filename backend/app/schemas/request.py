@@ -35,6 +35,7 @@ class RequestApprovalStepRead(BaseModel):
     step_order: int
     approver_user_id: Optional[uuid.UUID] = None
     approver_role: Optional[str] = None
+    approver_full_name: Optional[str] = None
     action: ApprovalAction
     comment: Optional[str] = None
     processed_at: Optional[datetime] = None
@@ -82,5 +83,11 @@ class RequestListRead(BaseModel):
     status: RequestStatus
     created_at: datetime
     content: Optional[str] = None
+    author_full_name: Optional[str] = None
+    current_approver_full_name: Optional[str] = None
     model_config = ConfigDict(from_attributes=True)
 
+
+class RequestApprovalCount(BaseModel):
+    """Количество заявок, ожидающих согласования"""
+    pending: int
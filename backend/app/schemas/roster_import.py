@@ -0,0 +1,20 @@
+from pydantic import BaseModel, ConfigDict
+from typing import List, Optional
+
+
+class RosterImportErrorRead(BaseModel):
+    """Ошибка в строке файла импорта"""
+    row: int  # Номер строки в файле (заголовок — строка 1)
+    key: Optional[str] = None  # Студенческий билет / табельный номер
+    message: str
+    model_config = ConfigDict(from_attributes=True)
+
+
+class RosterImportReport(BaseModel):
+    """Итог массового импорта"""
+    processed: int  # Строк с данными в файле
+    created: int
+    updated: int
+    failed: int
+    dry_run: bool = False
+    errors: List[RosterImportErrorRead] = []  # Не больше 1000 первых ошибок
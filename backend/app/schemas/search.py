@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+from typing import Optional
+import uuid
+
+from app.models.search_document import SearchKind
+
+
+class SearchHit(BaseModel):
+    """Результат поиска"""
+    kind: SearchKind
+    id: uuid.UUID
+    title: str
+    snippet: Optional[str] = None  # Начало описания/текста
+    rank: float  # Оценка релевантности; результаты уже упорядочены по ней
@@ -0,0 +1,8 @@
+from pydantic import BaseModel
+from typing import Optional
+
+
+class WaitlistPositionRead(BaseModel):
+    """Место в листе ожидания"""
+    position: Optional[int] = None  # 1 — следующий на освободившееся место; None — не в очереди
+    size: int  # Всего в очереди
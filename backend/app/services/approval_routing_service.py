@@ -0,0 +1,258 @@
+"""
+Маршрутизация заявок по согласующим
+
+Таблица маршрутизации строится одним набором запросов по справочникам
+(группы с кураторами, факультеты, кафедры, преподаватели, сотрудники,
+маршруты согласования) и хранится в памяти процесса. Создание и
+согласование заявки определяют согласующего по словарям за O(1).
+
+Кэш сбрасывается после фиксации любого изменения сотрудников,
+преподавателей, кураторов групп, структуры вуза или маршрутов согласования
+в этом процессе (откаченные изменения его не трогают), а также по истечении
+approver_routing_ttl_seconds (изменения из других воркеров).
+"""
+from dataclasses import dataclass, field
+import threading
+import time
+from typing import Optional
+import uuid
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.jobs import register_job
+from app.models.approval_road import ApprovalRoad
+from app.models.faculty import Faculty
+from app.models.kafedra import Kafedra
+from app.models.request import RequestType
+from app.models.staff import Staff
+from app.models.student import Student
+from app.models.student_group import StudentGroup
+from app.models.teacher import Teacher
+from app.models.user import User, UserRole
+
+ROLE_CURATOR = "Куратор"
+ROLE_DEANERY = "Деканат"
+ROLE_HEAD = "Руководитель"
+ROLE_HR = "Отдел кадров"
+
+ROAD_SEPARATOR = "→"
+
+# Маршруты по умолчанию. Хранятся в approval_roads (name = тип заявки,
+# description = шаги через «→») и могут быть изменены в БД.
+DEFAULT_APPROVAL_ROADS: dict[RequestType, tuple[str, ...]] = {
+    RequestType.ACADEMIC_LEAVE: (ROLE_CURATOR, ROLE_DEANERY),
+    RequestType.TRANSFER: (ROLE_DEANERY,),
+    RequestType.VACATION: (ROLE_HEAD, ROLE_HR),
+    RequestType.DOCUMENT_APPROVAL: (ROLE_HEAD,),
+}
+
+KNOWN_ROLES = {ROLE_CURATOR, ROLE_DEANERY, ROLE_HEAD, ROLE_HR}
+
+# Изменение этих сущностей влияет на выбор согласующих
+_ROUTING_MODELS = (ApprovalRoad, Faculty, Kafedra, Staff, StudentGroup, Teacher)
+
+
+@dataclass(slots=True)
+class ApproverRouting:
+    """Снимок справочников, достаточный для выбора согласующего без запросов"""
+    roads: dict[RequestType, tuple[str, ...]] = field(default_factory=dict)
+    road_ids: dict[RequestType, uuid.UUID] = field(default_factory=dict)
+    curator_by_group: dict[uuid.UUID, uuid.UUID] = field(default_factory=dict)
+    university_by_faculty: dict[uuid.UUID, uuid.UUID] = field(default_factory=dict)
+    faculty_by_kafedra: dict[uuid.UUID, uuid.UUID] = field(default_factory=dict)
+    staff_by_university: dict[uuid.UUID, uuid.UUID] = field(default_factory=dict)
+    # Первые два преподавателя кафедры: руководителем считается первый, кроме самого автора
+    teachers_by_kafedra: dict[uuid.UUID, list[uuid.UUID]] = field(default_factory=dict)
+    admin_id: Optional[uuid.UUID] = None
+    built_at: float = 0.0
+
+    def road_for(self, request_type: RequestType) -> tuple[str, ...]:
+        return self.roads.get(request_type, ())
+
+    def curator(self, group_id: Optional[uuid.UUID]) -> Optional[uuid.UUID]:
+        if not group_id:
+            return None
+        return self.curator_by_group.get(group_id)
+
+    def deanery(self, faculty_id: Optional[uuid.UUID]) -> Optional[uuid.UUID]:
+        if not faculty_id or faculty_id not in self.university_by_faculty:
+            return None
+        university_id = self.university_by_faculty[faculty_id]
+        return self.staff_by_university.get(university_id) or self.admin_id
+
+    def kafedra_head(self, kafedra_id: Optional[uuid.UUID], author_user_id: uuid.UUID) -> Optional[uuid.UUID]:
+        if not kafedra_id:
+            return None
+        for teacher_user_id in self.teachers_by_kafedra.get(kafedra_id, ()):
+            if teacher_user_id != author_user_id:
+                return teacher_user_id
+        return self.admin_id
+
+    def hr(self, kafedra_id: Optional[uuid.UUID]) -> Optional[uuid.UUID]:
+        faculty_id = self.faculty_by_kafedra.get(kafedra_id) if kafedra_id else None
+        university_id = self.university_by_faculty.get(faculty_id) if faculty_id else None
+        if not university_id:
+            return None
+        return self.staff_by_university.get(university_id) or self.admin_id
+
+
+_lock = threading.Lock()
+_routing: Optional[ApproverRouting] = None
+# Увеличивается при каждом сбросе: снимок, построенный до сброса, не сохраняется
+_generation = 0
+
+# Флаг в session.info: в транзакции менялись данные маршрутизации
+_CHANGED_KEY = "approver_routing_changed"
+
+
+def _parse_road(description: Optional[str]) -> tuple[str, ...]:
+    if not description:
+        return ()
+    steps = [part.strip() for part in description.split(ROAD_SEPARATOR)]
+    return tuple(step for step in steps if step in KNOWN_ROLES)
+
+
+def build_approver_routing(db: Session) -> ApproverRouting:
+    """Построить таблицу маршрутизации по текущему состоянию БД"""
+    routing = ApproverRouting(roads=dict(DEFAULT_APPROVAL_ROADS))
+
+    request_types = {item.value: item for item in RequestType}
+    for road_id, name, description in db.execute(
+        select(ApprovalRoad.id, ApprovalRoad.name, ApprovalRoad.description)
+    ):
+        request_type = request_types.get(name or "")
+        if not request_type:
+            continue
+        routing.road_ids[request_type] = road_id
+        steps = _parse_road(description)
+        if steps:
+            routing.roads[request_type] = steps
+
+    routing.curator_by_group = dict(
+        db.execute(
+            select(StudentGroup.id, StudentGroup.curator_user_id).where(
+                StudentGroup.curator_user_id.is_not(None)
+            )
+        ).all()
+    )
+    routing.university_by_faculty = dict(db.execute(select(Faculty.id, Faculty.university_id)).all())
+    routing.faculty_by_kafedra = dict(db.execute(select(Kafedra.id, Kafedra.faculty_id)).all())
+
+    for university_id, user_id in db.execute(select(Staff.university_id, Staff.user_id)):
+        routing.staff_by_university.setdefault(university_id, user_id)
+
+    for kafedra_id, user_id in db.execute(select(Teacher.kafedra_id, Teacher.user_id)):
+        teachers = routing.teachers_by_kafedra.setdefault(kafedra_id, [])
+        if len(teachers) < 2:
+            teachers.append(user_id)
+
+    routing.admin_id = db.execute(
+        select(User.id).where(User.role == UserRole.ADMIN).limit(1)
+    ).scalar_one_or_none()
+    routing.built_at = time.monotonic()
+    return routing
+
+
+def get_approver_routing(db: Session) -> ApproverRouting:
+    """Получить таблицу маршрутизации (из кэша или построить заново)"""
+    global _routing
+    routing = _routing
+    ttl = settings.approver_routing_ttl_seconds
+    if routing is not None and (ttl <= 0 or time.monotonic() - routing.built_at < ttl):
+        return routing
+
+    with _lock:
+        routing = _routing
+        if routing is None or (ttl > 0 and time.monotonic() - routing.built_at >= ttl):
+            generation = _generation
+            routing = build_approver_routing(db)
+            if generation == _generation:
+                _routing = routing
+    return routing
+
+
+def invalidate_approver_routing() -> None:
+    """Сбросить кэш маршрутизации"""
+    global _routing, _generation
+    _generation += 1
+    _routing = None
+
+
+def resolve_approver(
+    db: Session,
+    routing: ApproverRouting,
+    *,
+    role: str,
+    author_user_id: uuid.UUID,
+) -> Optional[uuid.UUID]:
+    """Определить согласующего для роли шага маршрута"""
+    if role in (ROLE_CURATOR, ROLE_DEANERY):
+        student = db.get(Student, author_user_id)
+        if not student:
+            return None
+        if role == ROLE_CURATOR:
+            return routing.curator(student.group_id)
+        return routing.deanery(student.faculty_id)
+
+    teacher = db.get(Teacher, author_user_id)
+    if not teacher:
+        return None
+    if role == ROLE_HEAD:
+        return routing.kafedra_head(teacher.kafedra_id, author_user_id)
+    if role == ROLE_HR:
+        return routing.hr(teacher.kafedra_id)
+    return None
+
+
+def ensure_approval_roads(db: Session) -> None:
+    """Создать в approval_roads отсутствующие маршруты по умолчанию"""
+    existing = set(db.execute(select(ApprovalRoad.name)).scalars())
+    created = False
+    for request_type, steps in DEFAULT_APPROVAL_ROADS.items():
+        if request_type.value in existing:
+            continue
+        db.add(
+            ApprovalRoad(
+                name=request_type.value,
+                description=f" {ROAD_SEPARATOR} ".join(steps),
+            )
+        )
+        created = True
+    if created:
+        db.commit()
+
+
+@register_job("approvals.ensure_roads", on_startup=True)
+def ensure_approval_roads_job(db: Session, payload: dict) -> None:
+    """Фоновая задача после старта: маршруты по умолчанию (один воркер — без дублей в approval_roads)"""
+    ensure_approval_roads(db)
+
+
+def _was_or_is_admin(user: User) -> bool:
+    # В after_flush разжалованный администратор уже с новой ролью: прежняя — в истории атрибута
+    roles = inspect(user).attrs.role.history.sum() or (user.role,)
+    return UserRole.ADMIN in roles
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_routing_change(session: Session, flush_context) -> None:
+    if session.info.get(_CHANGED_KEY):
+        return
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, _ROUTING_MODELS) or (isinstance(obj, User) and _was_or_is_admin(obj)):
+            # Сброс — только после фиксации: до неё пересборка увидела бы незафиксированные данные
+            session.info[_CHANGED_KEY] = True
+            return
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session: Session) -> None:
+    if session.info.pop(_CHANGED_KEY, False):
+        invalidate_approver_routing()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_on_rollback(session: Session) -> None:
+    session.info.pop(_CHANGED_KEY, None)
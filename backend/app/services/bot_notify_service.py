@@ -1,9 +1,11 @@
 import logging
+import time
 from typing import Iterable, Sequence
 
 import httpx
 
 from app.core.config import settings
+from app.core.metrics import BOT_NOTIFY_DURATION, BOT_NOTIFY_ERRORS
 
 logger = logging.getLogger(__name__)
 
@@ -30,7 +32,7 @@ def _headers() -> dict[str, str]:
 
 def notify_user(max_user_id: int, text: str) -> None:
     """Send a single notification to user."""
-    _post(f"/notify/{int(max_user_id)}", {"text": text.strip()})
+    _post(f"/notify/{int(max_user_id)}", {"text": text.strip()}, method="user")
 
 
 def notify_bulk(sender_max_id: int, user_ids: Sequence[int], text: str) -> int:
@@ -44,18 +46,18 @@ def notify_bulk(sender_max_id: int, user_ids: Sequence[int], text: str) -> int:
         "sender_id": int(sender_max_id),
         "user_ids": ids,
     }
-    _post("/notify/bulk", payload)
+    _post("/notify/bulk", payload, method="bulk")
     return len(ids)
 
 
 def notify_tuition_reminder(user_max_id: int) -> None:
     """Trigger tuition reminder notification in bot."""
-    _post(f"/notify/payment/tuition/{int(user_max_id)}", None)
+    _post(f"/notify/payment/tuition/{int(user_max_id)}", None, method="tuition")
 
 
 def notify_document_ready(user_max_id: int) -> None:
     """Trigger ready-document flow in bot."""
-    _post(f"/notify/ready/{int(user_max_id)}", None)
+    _post(f"/notify/ready/{int(user_max_id)}", None, method="ready")
 
 
 def _normalize_ids(values: Iterable[int]) -> list[int]:
@@ -70,15 +72,21 @@ def _normalize_ids(values: Iterable[int]) -> list[int]:
     return unique
 
 
-def _post(path: str, payload: dict | None) -> None:
+def _post(path: str, payload: dict | None, *, method: str) -> None:
+    # method — метка метрик без идентификаторов пользователей
     url = f"{_base_url()}{path}"
+    started = time.perf_counter()
     try:
         response = httpx.post(url, json=payload, headers=_headers(), timeout=5.0)
         response.raise_for_status()
     except httpx.RequestError as exc:
+        BOT_NOTIFY_ERRORS.inc(method, "unavailable")
         logger.error("bot notify request error: %s", exc)
         raise BotNotifyError("бот недоступен") from exc
     except httpx.HTTPStatusError as exc:
+        BOT_NOTIFY_ERRORS.inc(method, str(exc.response.status_code))
         body = exc.response.text
         logger.warning("bot notify rejected request: %s", body)
         raise BotNotifyError(f"бот вернул ошибку: {body}") from exc
+    finally:
+        BOT_NOTIFY_DURATION.observe(time.perf_counter() - started, method)
@@ -0,0 +1,169 @@
+"""
+Хранилище документов с адресацией по содержимому
+
+Файл документа хранится один раз под именем своего sha256 в
+static/blobs/ab/cd/<sha256>, сколько бы раз его ни загружали. Записи
+RequestDocument ссылаются на DocumentBlob, а DocumentBlob.ref_count считает
+эти ссылки. Blob'ы без ссылок удаляет collect_orphan_blobs
+(скрипт gc_document_blobs.py).
+
+Загрузка сначала потоково пишется во временный файл в blobs/.incoming
+(тот же том, что и шарды), поэтому перемещение в шард — атомарный rename.
+Повторная загрузка уже известного содержимого не занимает места на диске.
+"""
+from dataclasses import dataclass
+import os
+from pathlib import Path
+import time
+import uuid
+
+from fastapi import UploadFile
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.document_blob import DocumentBlob
+from app.models.request_document import RequestDocument
+from app.services.upload_utils import IncomingUpload, safe_filename, stream_upload_to_dir
+
+INCOMING_DIR = ".incoming"
+
+
+@dataclass(slots=True)
+class BlobGCResult:
+    """Итог сборки мусора в хранилище"""
+    reconciled: int = 0
+    removed_blobs: int = 0
+    removed_files: int = 0
+    freed_bytes: int = 0
+
+
+def blobs_root() -> Path:
+    return Path(settings.static_root) / settings.document_blobs_prefix
+
+
+def incoming_dir() -> Path:
+    """Директория для незавершённых загрузок"""
+    return blobs_root() / INCOMING_DIR
+
+
+def blob_relative_path(sha256: str) -> str:
+    """Путь blob'а относительно static_root"""
+    return f"{settings.document_blobs_prefix}/{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+
+def blob_path(sha256: str) -> Path:
+    return Path(settings.static_root) / blob_relative_path(sha256)
+
+
+async def receive_document_upload(file: UploadFile, *, max_size: int) -> IncomingUpload:
+    """Принять загрузку во временный файл хранилища
+
+    На диске файл получает случайное имя, в IncomingUpload.filename
+    возвращается очищенное имя, переданное клиентом.
+    """
+    original_name = safe_filename(file.filename)
+    upload = await stream_upload_to_dir(
+        file,
+        incoming_dir(),
+        max_size=max_size,
+        filename=uuid.uuid4().hex,
+    )
+    upload.filename = original_name
+    return upload
+
+
+def store_blob(db: Session, upload: IncomingUpload) -> DocumentBlob:
+    """Переместить загрузку в хранилище и добавить ссылку на blob
+
+    Транзакцию фиксирует вызывающий код вместе с записью документа.
+    """
+    target = blob_path(upload.sha256)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    # Содержимое одинаково, поэтому rename поверх существующего blob'а безопасен.
+    # Заодно обновляется mtime, и сборщик мусора не тронет только что
+    # переиспользованный файл.
+    os.replace(upload.path, target)
+
+    updated = db.execute(
+        update(DocumentBlob)
+        .where(DocumentBlob.sha256 == upload.sha256)
+        .values(ref_count=DocumentBlob.ref_count + 1)
+    ).rowcount
+    if not updated:
+        try:
+            with db.begin_nested():
+                db.add(
+                    DocumentBlob(
+                        sha256=upload.sha256,
+                        file_path=blob_relative_path(upload.sha256),
+                        size=upload.size,
+                        ref_count=1,
+                    )
+                )
+        except IntegrityError:
+            # Тот же файл одновременно загрузили в другом запросе
+            db.execute(
+                update(DocumentBlob)
+                .where(DocumentBlob.sha256 == upload.sha256)
+                .values(ref_count=DocumentBlob.ref_count + 1)
+            )
+    return db.get(DocumentBlob, upload.sha256)
+
+
+def collect_orphan_blobs(db: Session, *, min_age_seconds: int = 3600, dry_run: bool = False) -> BlobGCResult:
+    """Удалить blob'ы, на которые не ссылается ни один документ
+
+    ref_count сверяется с фактическим числом документов одним GROUP BY.
+    Файлы моложе min_age_seconds не удаляются, чтобы не задеть загрузки,
+    которые ещё не зафиксированы в БД.
+    """
+    result = BlobGCResult()
+    cutoff = time.time() - min_age_seconds
+
+    actual_refs = dict(
+        db.execute(
+            select(RequestDocument.blob_sha256, func.count())
+            .where(RequestDocument.blob_sha256.is_not(None))
+            .group_by(RequestDocument.blob_sha256)
+        ).all()
+    )
+
+    known: set[str] = set()
+    for blob in db.query(DocumentBlob).all():
+        known.add(blob.sha256)
+        refs = actual_refs.get(blob.sha256, 0)
+        if blob.ref_count != refs:
+            blob.ref_count = refs
+            result.reconciled += 1
+        if refs:
+            continue
+        path = blob_path(blob.sha256)
+        if path.exists() and path.stat().st_mtime > cutoff:
+            continue
+        result.removed_blobs += 1
+        result.freed_bytes += blob.size or 0
+        if not dry_run:
+            db.delete(blob)
+            path.unlink(missing_ok=True)
+
+    # Файлы без записи в БД (сбой между rename и commit) и брошенные загрузки
+    root = blobs_root()
+    if root.exists():
+        for path in root.rglob("*"):
+            if not path.is_file() or path.name in known:
+                continue
+            stat = path.stat()
+            if stat.st_mtime > cutoff:
+                continue
+            result.removed_files += 1
+            result.freed_bytes += stat.st_size
+            if not dry_run:
+                path.unlink(missing_ok=True)
+
+    if dry_run:
+        db.rollback()
+    else:
+        db.commit()
+    return result
@@ -0,0 +1,203 @@
+"""
+Пакетное распределение студентов по элективам
+
+Вместо гонки за местами в register_for_elective студенты заранее
+указывают ранжированный список элективов (set_elective_preferences), а
+распределение выполняется одним проходом (allocate_electives, фоновая
+задача electives.allocate).
+
+Алгоритм — отложенное принятие (Гейла — Шепли) с общей для всех элективов
+очерёдностью студентов по жребию: при общей очерёдности оно сводится к
+тому, что студенты по порядку жребия получают самый высокий в своём списке
+электив со свободным местом. Распределение устойчиво (нет пары студент —
+электив, где студент предпочёл бы электив, а там есть место или студент с
+худшим жребием) и не поощряет хитрить со списком: ставить электив ниже,
+чем хочется, невыгодно. Сложность — O(суммарная длина списков).
+
+- Места считаются как max_students - current_students, прежние записи
+  сохраняются.
+- Студент, уже записанный на любой электив, в распределении не участвует
+  (его список удаляется); каждый получает не больше одного электива.
+- Записи вставляются одним executemany, счётчики current_students
+  увеличиваются относительным UPDATE (не затирая параллельные изменения).
+- Списки распределённых студентов удаляются; не получившие место остаются
+  со своими списками до следующего запуска.
+
+Распределение стоит запускать, когда прямая запись на элективы не идёт:
+места считаются в начале запуска.
+"""
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+import random
+import time
+from typing import Hashable, Iterable, List, Mapping, Optional, Sequence, TypeVar
+import uuid
+
+from sqlalchemy import bindparam, delete, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.jobs import register_job
+from app.models.elective import Elective, ElectivePreference, ElectiveRegistration
+
+# Ограничение числа параметров в одном IN (SQLite)
+DELETE_CHUNK_SIZE = 5000
+
+Student = TypeVar("Student", bound=Hashable)
+Course = TypeVar("Course", bound=Hashable)
+
+
+@dataclass
+class AllocationResult:
+    seed: int
+    students: int = 0  # Участвовали в распределении
+    assigned: int = 0
+    unassigned: int = 0
+    skipped: int = 0  # Уже записаны на электив
+    by_rank: dict[int, int] = field(default_factory=dict)  # Сколько получили электив с таким номером в списке
+    dry_run: bool = False
+    load_seconds: float = 0.0
+    solve_seconds: float = 0.0
+    write_seconds: float = 0.0
+
+    def as_dict(self) -> dict:
+        result = asdict(self)
+        result["by_rank"] = {str(rank): count for rank, count in sorted(self.by_rank.items())}
+        return result
+
+
+def solve_allocation(
+    preferences: Mapping[Student, Sequence[Course]],
+    capacity: Mapping[Course, int],
+    order: Iterable[Student],
+) -> dict[Student, tuple[Course, int]]:
+    """
+    Отложенное принятие при общей очерёдности студентов
+
+    preferences — списки элективов по убыванию желания, capacity — свободные
+    места, order — очерёдность студентов. Возвращает {студент: (электив,
+    номер в списке с 1)}; студенты без места в результат не попадают.
+    """
+    seats = dict(capacity)
+    assignment: dict[Student, tuple[Course, int]] = {}
+    for student in order:
+        for rank, course in enumerate(preferences.get(student, ()), start=1):
+            if seats.get(course, 0) > 0:
+                seats[course] -= 1
+                assignment[student] = (course, rank)
+                break
+    return assignment
+
+
+def get_elective_preferences(db: Session, *, user_id: uuid.UUID) -> List[ElectivePreference]:
+    """Список приоритетов студента по возрастанию номера"""
+    return list(db.execute(
+        select(ElectivePreference)
+        .where(ElectivePreference.user_id == user_id)
+        .order_by(ElectivePreference.rank)
+    ).scalars())
+
+
+def set_elective_preferences(
+    db: Session, *, user_id: uuid.UUID, elective_ids: Sequence[uuid.UUID]
+) -> List[ElectivePreference]:
+    """Заменить список приоритетов студента (первый — самый желанный)"""
+    if len(set(elective_ids)) != len(elective_ids):
+        raise ValueError("Электив указан в списке несколько раз")
+    if len(elective_ids) > settings.elective_preferences_max:
+        raise ValueError(f"Можно указать не больше {settings.elective_preferences_max} элективов")
+    if elective_ids:
+        active = set(db.execute(
+            select(Elective.id).where(Elective.id.in_(elective_ids), Elective.is_active == 1)
+        ).scalars())
+        if len(active) != len(elective_ids):
+            raise ValueError("Электив не найден или неактивен")
+
+    db.execute(delete(ElectivePreference).where(ElectivePreference.user_id == user_id))
+    if elective_ids:
+        db.execute(
+            insert(ElectivePreference),
+            [
+                {"user_id": user_id, "elective_id": elective_id, "rank": rank}
+                for rank, elective_id in enumerate(elective_ids, start=1)
+            ],
+        )
+    db.commit()
+    return get_elective_preferences(db, user_id=user_id)
+
+
+def allocate_electives(db: Session, *, seed: Optional[int] = None, dry_run: bool = False) -> AllocationResult:
+    """Распределить студентов по спискам приоритетов (dry_run — только посчитать)"""
+    if seed is None:
+        seed = random.SystemRandom().randrange(2 ** 31)
+    result = AllocationResult(seed=seed, dry_run=dry_run)
+
+    started = time.perf_counter()
+    capacity = {
+        elective_id: seats
+        for elective_id, seats in db.execute(
+            select(Elective.id, Elective.max_students - Elective.current_students).where(Elective.is_active == 1)
+        )
+        if seats > 0
+    }
+    skipped = set(db.execute(
+        select(ElectiveRegistration.user_id)
+        .where(ElectiveRegistration.user_id.in_(select(ElectivePreference.user_id)))
+        .distinct()
+    ).scalars())
+    preferences: dict[uuid.UUID, list[uuid.UUID]] = {}
+    for user_id, elective_id in db.execute(
+        select(ElectivePreference.user_id, ElectivePreference.elective_id)
+        .order_by(ElectivePreference.user_id, ElectivePreference.rank)
+    ):
+        if user_id not in skipped:
+            preferences.setdefault(user_id, []).append(elective_id)
+    result.load_seconds = round(time.perf_counter() - started, 3)
+
+    started = time.perf_counter()
+    # Жребий: сортировка делает порядок независимым от порядка строк в БД
+    order = sorted(preferences)
+    random.Random(seed).shuffle(order)
+    assignment = solve_allocation(preferences, capacity, order)
+    result.solve_seconds = round(time.perf_counter() - started, 3)
+
+    result.students = len(preferences)
+    result.assigned = len(assignment)
+    result.unassigned = result.students - result.assigned
+    result.skipped = len(skipped)
+    result.by_rank = dict(Counter(rank for _, rank in assignment.values()))
+    if dry_run:
+        return result
+
+    started = time.perf_counter()
+    if assignment:
+        db.execute(
+            insert(ElectiveRegistration),
+            [
+                {"id": uuid.uuid4(), "elective_id": elective_id, "user_id": user_id}
+                for user_id, (elective_id, _) in assignment.items()
+            ],
+        )
+        if not settings.counter_triggers_enabled:  # иначе счётчики увеличили триггеры
+            taken = Counter(elective_id for elective_id, _ in assignment.values())
+            electives = Elective.__table__
+            db.connection().execute(
+                update(electives)
+                .where(electives.c.id == bindparam("elective_id"))
+                .values(current_students=electives.c.current_students + bindparam("taken")),
+                [{"elective_id": elective_id, "taken": count} for elective_id, count in taken.items()],
+            )
+    consumed = list(assignment) + list(skipped)
+    for start in range(0, len(consumed), DELETE_CHUNK_SIZE):
+        db.execute(
+            delete(ElectivePreference).where(ElectivePreference.user_id.in_(consumed[start:start + DELETE_CHUNK_SIZE]))
+        )
+    db.commit()
+    result.write_seconds = round(time.perf_counter() - started, 3)
+    return result
+
+
+@register_job("electives.allocate", max_attempts=1)
+def allocate_electives_job(db: Session, payload: dict) -> dict:
+    """Фоновая задача: пакетное распределение по элективам"""
+    return allocate_electives(db, seed=payload.get("seed"), dry_run=bool(payload.get("dry_run"))).as_dict()
@@ -1,11 +1,20 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, func
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import and_, func, select
 from typing import List, Optional
 from datetime import datetime
 import uuid
 
 from app.models.elective import Elective, ElectiveRegistration
+from app.models.waitlist import WaitlistKind
 from app.schemas.elective import ElectiveCreate, ElectiveUpdate
+from app.services.participant_counter_service import adjust_counter
+from app.services.response_cache import VERSION_ELECTIVES, get_cache_version
+from app.services.waitlist_service import (
+    add_to_waitlist,
+    get_waitlist_position,
+    pop_waitlist,
+    remove_from_waitlist,
+)
 
 
 def get_elective_by_id(db: Session, elective_id: uuid.UUID) -> Optional[Elective]:
@@ -21,7 +30,7 @@ def get_all_electives(
     active_only: bool = True
 ) -> List[Elective]:
     """Получить все элективы"""
-    query = db.query(Elective)
+    query = db.query(Elective).options(joinedload(Elective.teacher))
     
     if active_only:
         query = query.filter(Elective.is_active == 1)
@@ -29,9 +38,40 @@ def get_all_electives(
     return query.order_by(Elective.created_at.desc()).offset(skip).limit(limit).all()
 
 
+def get_electives_version(db: Session, *, active_only: bool = True) -> tuple[str, Optional[datetime]]:
+    """Версия списка элективов для HTTP-кэша: (валидатор, время последнего изменения)"""
+    query = select(func.count(), func.max(Elective.updated_at), func.sum(Elective.current_students))
+    if active_only:
+        query = query.where(Elective.is_active == 1)
+    count, last_updated, students = db.execute(query).one()
+    version = get_cache_version(db, VERSION_ELECTIVES)
+    return f"{count}:{last_updated}:{students or 0}:{version}", last_updated
+
+
+def get_user_registrations_version(db: Session, user_id: uuid.UUID) -> str:
+    """Версия записей пользователя на элективы (для поля is_registered)"""
+    count, last_registered = db.execute(
+        select(func.count(), func.max(ElectiveRegistration.registered_at))
+        .where(ElectiveRegistration.user_id == user_id)
+    ).one()
+    return f"{count}:{last_registered}"
+
+
+def get_registered_elective_ids(db: Session, *, user_id: uuid.UUID, elective_ids: List[uuid.UUID]) -> set[uuid.UUID]:
+    """ID элективов из списка, на которые записан пользователь (одним запросом)"""
+    if not elective_ids:
+        return set()
+    return set(db.execute(
+        select(ElectiveRegistration.elective_id).where(
+            ElectiveRegistration.user_id == user_id,
+            ElectiveRegistration.elective_id.in_(elective_ids),
+        )
+    ).scalars())
+
+
 def get_user_electives(db: Session, user_id: uuid.UUID) -> List[Elective]:
     """Получить элективы, на которые записан пользователь (Мои элективы)"""
-    return db.query(Elective).join(ElectiveRegistration).filter(
+    return db.query(Elective).options(joinedload(Elective.teacher)).join(ElectiveRegistration).filter(
         and_(
             ElectiveRegistration.user_id == user_id,
             Elective.is_active == 1
@@ -66,6 +106,9 @@ def update_elective(db: Session, *, elective_id: uuid.UUID, elective_data: Elect
         if hasattr(elective, field):
             setattr(elective, field, value)
     
+    # Вместимость могли увеличить — записываем ожидающих
+    _fill_from_waitlist(db, elective)
+    
     db.commit()
     db.refresh(elective)
     return elective
@@ -100,9 +143,10 @@ def register_for_elective(db: Session, *, elective_id: uuid.UUID, user_id: uuid.
         user_id=user_id,
     )
     db.add(registration)
+    remove_from_waitlist(db, kind=WaitlistKind.ELECTIVE, target_id=elective_id, user_id=user_id)
     
     # Увеличиваем счетчик участников
-    elective.current_students += 1
+    adjust_counter(db, elective, "current_students", 1)
     
     db.commit()
     db.refresh(registration)
@@ -122,15 +166,58 @@ def unregister_from_elective(db: Session, *, elective_id: uuid.UUID, user_id: uu
         raise ValueError("Вы не записаны на этот электив")
     
     elective = get_elective_by_id(db, elective_id)
+    db.delete(registration)
     if elective:
-        # Уменьшаем счетчик участников
-        elective.current_students = max(0, elective.current_students - 1)
+        # Уменьшаем счетчик участников; освободившееся место занимает первый из листа ожидания
+        adjust_counter(db, elective, "current_students", -1)
+        _fill_from_waitlist(db, elective)
     
-    db.delete(registration)
     db.commit()
     return True
 
 
+def _fill_from_waitlist(db: Session, elective: Elective) -> List[uuid.UUID]:
+    """Записать ожидающих на свободные места (без commit)"""
+    free = elective.max_students - elective.current_students
+    if free <= 0 or elective.is_active == 0:
+        return []
+    user_ids = pop_waitlist(db, kind=WaitlistKind.ELECTIVE, target_id=elective.id, count=free)
+    for user_id in user_ids:
+        db.add(ElectiveRegistration(elective_id=elective.id, user_id=user_id))
+    adjust_counter(db, elective, "current_students", len(user_ids))
+    return user_ids
+
+
+def join_elective_waitlist(db: Session, *, elective_id: uuid.UUID, user_id: uuid.UUID) -> int:
+    """Встать в лист ожидания электива; возвращает место в очереди"""
+    elective = get_elective_by_id(db, elective_id)
+    if not elective:
+        raise ValueError("Электив не найден")
+    if elective.is_active == 0:
+        raise ValueError("Электив неактивен")
+    if is_user_registered(db, elective_id=elective_id, user_id=user_id):
+        raise ValueError("Вы уже записаны на этот электив")
+    if elective.current_students < elective.max_students:
+        raise ValueError("Есть свободные места — запишитесь на электив")
+    
+    position = add_to_waitlist(db, kind=WaitlistKind.ELECTIVE, target_id=elective_id, user_id=user_id)
+    db.commit()
+    return position
+
+
+def leave_elective_waitlist(db: Session, *, elective_id: uuid.UUID, user_id: uuid.UUID) -> bool:
+    """Выйти из листа ожидания электива"""
+    if not remove_from_waitlist(db, kind=WaitlistKind.ELECTIVE, target_id=elective_id, user_id=user_id):
+        raise ValueError("Вы не в листе ожидания этого электива")
+    db.commit()
+    return True
+
+
+def get_elective_waitlist_position(db: Session, *, elective_id: uuid.UUID, user_id: uuid.UUID) -> Optional[int]:
+    """Место пользователя в листе ожидания электива (None — не в очереди)"""
+    return get_waitlist_position(db, kind=WaitlistKind.ELECTIVE, target_id=elective_id, user_id=user_id)
+
+
 def is_user_registered(db: Session, *, elective_id: uuid.UUID, user_id: uuid.UUID) -> bool:
     """Проверить, записан ли пользователь на электив"""
     registration = db.query(ElectiveRegistration).filter(
@@ -0,0 +1,147 @@
+"""
+Обработка фото мероприятий
+
+После загрузки оригинала в пуле процессов строятся WebP-варианты
+фиксированной ширины (settings.event_image_widths). Ресайз и кодирование
+занимают процессор, поэтому выполняются вне воркера API и после отправки
+ответа. Пути вариантов хранятся в Event.image_variants (JSON, как topics)
+и отдаются в EventRead.image_srcset: {ширина: путь}. После записи новых
+путей файлы вариантов прежних фото мероприятия удаляются.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+from pathlib import Path
+import threading
+from typing import Optional
+import uuid
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.metrics import BACKGROUND_QUEUE_DEPTH
+from app.db.session import SessionLocal
+from app.models.event import Event
+
+logger = logging.getLogger(__name__)
+
+WEBP_QUALITY = 80
+
+_pool_lock = threading.Lock()
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: воркер API многопоточный, fork из него небезопасен
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.event_image_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def shutdown_image_pool() -> None:
+    """Остановить пул процессов (при завершении приложения)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def render_image_variants(source: str, widths: tuple[int, ...]) -> dict[int, str]:
+    """
+    Построить WebP-варианты изображения (выполняется в дочернем процессе)
+
+    Варианты шире оригинала не создаются; если оригинал уже всех размеров,
+    создаётся один вариант его собственной ширины. Возвращает
+    {ширина: имя файла}, файлы лежат рядом с оригиналом.
+    """
+    from PIL import Image, ImageOps
+
+    source_path = Path(source)
+    variants: dict[int, str] = {}
+    with Image.open(source_path) as original:
+        image = ImageOps.exif_transpose(original)
+        image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+        targets = [width for width in sorted(set(widths)) if width < image.width]
+        if len(targets) < len(set(widths)):
+            targets.append(image.width)
+
+        for width in targets:
+            height = max(1, round(image.height * width / image.width))
+            resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+            name = f"{source_path.stem}-{width}w.webp"
+            tmp = source_path.with_name(f".{name}.tmp")
+            resized.save(tmp, format="WEBP", quality=WEBP_QUALITY, method=4)
+            os.replace(tmp, source_path.with_name(name))
+            variants[width] = name
+    return variants
+
+
+def _remove_files(directory: Path, names) -> None:
+    for name in names:
+        try:
+            (directory / name).unlink(missing_ok=True)
+        except OSError as exc:
+            logger.warning("failed to remove event image variant %s: %s", name, exc)
+
+
+def _save_variants(event_id: uuid.UUID, image_url: str, source: Path, variants: dict[int, str]) -> None:
+    directory = image_url.rsplit("/", 1)[0]
+    paths = {str(width): f"{directory}/{name}" for width, name in variants.items()}
+    with SessionLocal() as db:
+        event = db.get(Event, event_id)
+        # Пока шла обработка, фото могли заменить — старые варианты не записываем
+        if not event or event.image_url != image_url:
+            _remove_files(source.parent, variants.values())
+            return
+        event.image_variants = json.dumps(paths)
+        db.commit()
+
+        # Варианты прежних фото мероприятия больше не нужны. Если фото уже
+        # заменили снова, их удалит обработка нового фото
+        db.refresh(event, ["image_url"])
+        if event.image_url != image_url:
+            return
+        stale = [
+            path.name
+            for path in source.parent.glob(f"{event_id}_*-*w.webp")
+            if path.name not in variants.values()
+        ]
+    _remove_files(source.parent, stale)
+
+
+async def process_event_image(event_id: uuid.UUID, image_url: str, source: Path) -> None:
+    """Построить варианты фото мероприятия и сохранить их пути (фоновая задача)"""
+    loop = asyncio.get_running_loop()
+    BACKGROUND_QUEUE_DEPTH.inc("event_images")
+    try:
+        variants = await loop.run_in_executor(
+            _get_pool(),
+            render_image_variants,
+            str(source),
+            tuple(settings.event_image_widths),
+        )
+    except Exception as exc:
+        logger.warning("failed to render variants for event %s image %s: %s", event_id, image_url, exc)
+        return
+    finally:
+        BACKGROUND_QUEUE_DEPTH.dec("event_images")
+    await run_in_threadpool(_save_variants, event_id, image_url, Path(source), variants)
+
+
+def event_image_srcset(event: Event) -> Optional[dict[int, str]]:
+    """Варианты фото мероприятия {ширина: путь} или None, если их ещё нет"""
+    if not event.image_variants:
+        return None
+    try:
+        return {int(width): path for width, path in json.loads(event.image_variants).items()}
+    except (ValueError, AttributeError):
+        return None
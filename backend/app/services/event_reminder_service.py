@@ -0,0 +1,146 @@
+"""
+Напоминания о начале мероприятий через чат-бота
+
+Фоновая задача events.send_reminders (settings.event_reminder_cron) для
+каждого окна из settings.event_reminder_windows_minutes (например, за сутки
+и за час) одним запросом выбирает записавшихся на мероприятия, которые
+начнутся в пределах окна, вместе с их max_id (Event → EventRegistration →
+User) и отправляет напоминания пачками /notify/bulk по
+settings.event_reminder_batch_size получателей.
+
+Отправленное фиксируется в event_reminders (мероприятие, пользователь,
+окно, дата мероприятия): повторный запуск, перезапуск или другой воркер
+не напомнят второй раз. Окна обходятся от меньшего к большему, и
+получивший более позднее напоминание не получит более раннее (записался
+за полчаса до начала — одно сообщение, а не два). Если мероприятие
+перенесли, отметки со старой датой не учитываются. Отметка пишется в одной
+транзакции с отправкой пачки: при ошибке бота пачка откатывается и уйдёт
+при следующем запуске.
+"""
+from datetime import datetime, timedelta, timezone
+from itertools import groupby
+import logging
+from typing import Optional, Sequence
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import delete, exists, insert, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.jobs import register_job
+from app.models.event import Event, EventRegistration, EventReminder
+from app.models.user import User
+from app.services import bot_notify_service
+
+logger = logging.getLogger(__name__)
+
+# Сколько хранить отметки после начала мероприятия
+REMINDER_RETENTION = timedelta(days=1)
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite возвращает время без зоны (UTC)
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _format_reminder_text(title: str, date: datetime, location: Optional[str]) -> str:
+    local = _as_utc(date).astimezone(ZoneInfo(settings.jobs_timezone))
+    parts = ["⏰ Напоминание о мероприятии", f"«{(title or '').strip()}»", f"Начало: {local:%d.%m.%Y %H:%M}"]
+    if location:
+        parts.append(f"Место: {location.strip()}")
+    return "\n".join(parts)
+
+
+def _due_registrations(db: Session, now: datetime, window: int, earlier_windows: Sequence[int]) -> list:
+    """Записи на мероприятия в окне, по которым ещё не напоминали (event_id, ..., user_id, max_id)"""
+    already_sent = exists().where(
+        EventReminder.event_id == Event.id,
+        EventReminder.user_id == EventRegistration.user_id,
+        EventReminder.window_minutes.in_(earlier_windows),
+        EventReminder.event_date == Event.date,
+    )
+    return db.execute(
+        select(Event.id, Event.title, Event.date, Event.location, EventRegistration.user_id, User.max_id)
+        .join(EventRegistration, EventRegistration.event_id == Event.id)
+        .join(User, User.id == EventRegistration.user_id)
+        .where(
+            Event.date > now,
+            Event.date <= now + timedelta(minutes=window),
+            User.max_id.is_not(None),
+            ~already_sent,
+        )
+        .order_by(Event.date, Event.id)
+    ).all()
+
+
+def send_event_reminders(
+    db: Session,
+    *,
+    now: Optional[datetime] = None,
+    windows: Optional[Sequence[int]] = None,
+    batch_size: Optional[int] = None,
+) -> dict:
+    """Разослать напоминания по всем окнам; возвращает счётчики"""
+    now = now or datetime.now(timezone.utc)
+    windows = sorted(set(windows or settings.event_reminder_windows_minutes))
+    batch_size = batch_size or settings.event_reminder_batch_size
+    sender_id = settings.bot_default_sender_max_id
+    stats = {"events": 0, "recipients": 0, "batches": 0, "failed_batches": 0}
+
+    for index, window in enumerate(windows):
+        rows = _due_registrations(db, now, window, windows[: index + 1])
+        for event_id, event_rows in groupby(rows, key=lambda row: row.id):
+            event_rows = list(event_rows)
+            first = event_rows[0]
+            text = _format_reminder_text(first.title, first.date, first.location)
+            stats["events"] += 1
+            # Мероприятие перенесли: отметки со старой датой заменяются новыми.
+            # Удаление фиксируется сразу, чтобы откат неудачной пачки его не отменил
+            db.execute(
+                delete(EventReminder).where(
+                    EventReminder.event_id == event_id,
+                    EventReminder.window_minutes == window,
+                    EventReminder.event_date != first.date,
+                )
+            )
+            db.commit()
+            for start in range(0, len(event_rows), batch_size):
+                batch = event_rows[start:start + batch_size]
+                db.execute(
+                    insert(EventReminder),
+                    [
+                        {
+                            "event_id": event_id,
+                            "user_id": row.user_id,
+                            "window_minutes": window,
+                            "event_date": row.date,
+                            "sent_at": now,
+                        }
+                        for row in batch
+                    ],
+                )
+                try:
+                    delivered = bot_notify_service.notify_bulk(sender_id, [row.max_id for row in batch], text)
+                except bot_notify_service.BotNotifyError as exc:
+                    db.rollback()
+                    stats["failed_batches"] += 1
+                    logger.warning("failed to send reminders for event %s: %s", event_id, exc)
+                    continue
+                db.commit()
+                stats["batches"] += 1
+                stats["recipients"] += delivered
+
+    # Отметки прошедших мероприятий больше не нужны
+    stats["pruned"] = db.execute(
+        delete(EventReminder).where(EventReminder.event_date < now - REMINDER_RETENTION)
+    ).rowcount
+    db.commit()
+    return stats
+
+
+@register_job("events.send_reminders", cron=settings.event_reminder_cron or None)
+def send_event_reminders_job(db: Session, payload: dict) -> dict:
+    """Фоновая задача: напоминания о мероприятиях"""
+    return send_event_reminders(db, windows=payload.get("windows"))
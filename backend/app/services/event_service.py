@@ -6,14 +6,102 @@ Backend только предоставляет API для работы с ме
 Бот отслеживает создание новых мероприятий через API и отправляет push-уведомления пользователям.
 """
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func
+from sqlalchemy import and_, or_, event as sa_event, func, inspect, select, exists
+from dataclasses import dataclass, field
 from typing import List, Optional
 from datetime import datetime
+import json
 import uuid
 from datetime import timezone
 
-from app.models.event import Event, EventRegistration
+from app.core.jobs import register_job
+from app.models.event import Event, EventRegistration, EventTopic, EventType, EventFormat, Topic
+from app.models.waitlist import WaitlistKind
 from app.schemas.event import EventCreate, EventUpdate
+from app.services.participant_counter_service import adjust_counter
+from app.services.waitlist_service import (
+    add_to_waitlist,
+    get_waitlist_position,
+    pop_waitlist,
+    remove_from_waitlist,
+)
+
+FACET_TOPICS_LIMIT = 50
+
+
+@dataclass(slots=True)
+class EventFilters:
+    """Фильтры ленты мероприятий (все условия объединяются по И)"""
+    upcoming_only: bool = True
+    event_type: Optional[EventType] = None
+    format: Optional[EventFormat] = None
+    date_from: Optional[datetime] = None
+    date_to: Optional[datetime] = None
+    topics: List[str] = field(default_factory=list)  # Любая из тем
+    has_free_seats: Optional[bool] = None
+    price_min: Optional[int] = None  # В копейках, как Event.price
+    price_max: Optional[int] = None
+
+
+@dataclass(slots=True)
+class EventFacetCounts:
+    total: int = 0
+    event_type: dict[str, int] = field(default_factory=dict)
+    format: dict[str, int] = field(default_factory=dict)
+    topics: list[tuple[str, int]] = field(default_factory=list)
+    with_free_seats: int = 0
+
+
+def topic_key(name: str) -> str:
+    """Нормализованное название темы"""
+    return " ".join(name.lower().replace("ё", "е").split())
+
+
+def _parse_topics(topics: Optional[str]) -> List[str]:
+    if not topics:
+        return []
+    try:
+        items = json.loads(topics)
+    except ValueError:
+        return []
+    return [str(item) for item in items if str(item).strip()] if isinstance(items, list) else []
+
+
+def _seats_left():
+    # То же выражение, что в индексе ix_events_seats_left_date
+    return Event.max_participants - Event.current_participants
+
+
+def _event_conditions(filters: EventFilters, *, exclude: str = "") -> list:
+    """Условия WHERE по фильтрам; exclude — фасет, условие которого не применяется"""
+    conditions = []
+    if filters.upcoming_only:
+        conditions.append(Event.date >= func.now())
+    if filters.date_from is not None:
+        conditions.append(Event.date >= filters.date_from)
+    if filters.date_to is not None:
+        conditions.append(Event.date <= filters.date_to)
+    if filters.event_type is not None and exclude != "event_type":
+        conditions.append(Event.event_type == filters.event_type)
+    if filters.format is not None and exclude != "format":
+        conditions.append(Event.format == filters.format)
+    if filters.price_min is not None:
+        conditions.append(Event.price >= filters.price_min)
+    if filters.price_max is not None:
+        # Бесплатные мероприятия хранятся без цены
+        conditions.append(or_(Event.price.is_(None), Event.price <= filters.price_max))
+    if filters.has_free_seats is not None and exclude != "has_free_seats":
+        conditions.append(_seats_left() > 0 if filters.has_free_seats else _seats_left() <= 0)
+    if filters.topics and exclude != "topics":
+        # Идёт по ix_event_topics_topic_event: тема → мероприятия
+        conditions.append(
+            Event.id.in_(
+                select(EventTopic.event_id)
+                .join(Topic, Topic.id == EventTopic.topic_id)
+                .where(Topic.key.in_([topic_key(name) for name in filters.topics]))
+            )
+        )
+    return conditions
 
 
 def get_event_by_id(db: Session, event_id: uuid.UUID) -> Optional[Event]:
@@ -26,17 +114,93 @@ def get_all_events(
     *,
     skip: int = 0,
     limit: int = 100,
-    upcoming_only: bool = True
+    upcoming_only: bool = True,
+    filters: Optional[EventFilters] = None,
 ) -> List[Event]:
-    """Получить все мероприятия"""
-    query = db.query(Event)
-    
-    if upcoming_only:
-        query = query.filter(Event.date >= func.now())
-    
+    """Получить мероприятия ленты с учётом фильтров"""
+    filters = filters or EventFilters(upcoming_only=upcoming_only)
+    query = db.query(Event).filter(*_event_conditions(filters))
     return query.order_by(Event.date.asc()).offset(skip).limit(limit).all()
 
 
+def get_events_version(db: Session, filters: EventFilters) -> tuple[str, Optional[datetime]]:
+    """
+    Версия ленты для HTTP-кэша: (валидатор, время последнего изменения)
+
+    Один агрегат по тем же условиям, что и лента: число мероприятий,
+    max(updated_at) и сумма записавшихся (updated_at хранится с точностью
+    до секунды, запись на мероприятие в ту же секунду его не меняет).
+    """
+    count, last_updated, participants = db.execute(
+        select(func.count(), func.max(Event.updated_at), func.sum(Event.current_participants))
+        .select_from(Event)
+        .where(*_event_conditions(filters))
+    ).one()
+    return f"{count}:{last_updated}:{participants or 0}", last_updated
+
+
+def get_user_registrations_version(db: Session, user_id: uuid.UUID) -> str:
+    """Версия записей пользователя (для поля is_registered в ленте)"""
+    count, last_registered = db.execute(
+        select(func.count(), func.max(EventRegistration.registered_at))
+        .where(EventRegistration.user_id == user_id)
+    ).one()
+    return f"{count}:{last_registered}"
+
+
+def get_registered_event_ids(db: Session, *, user_id: uuid.UUID, event_ids: List[uuid.UUID]) -> set[uuid.UUID]:
+    """ID мероприятий из списка, на которые записан пользователь (одним запросом)"""
+    if not event_ids:
+        return set()
+    return set(db.execute(
+        select(EventRegistration.event_id).where(
+            EventRegistration.user_id == user_id,
+            EventRegistration.event_id.in_(event_ids),
+        )
+    ).scalars())
+
+
+def get_event_facets(db: Session, filters: EventFilters) -> EventFacetCounts:
+    """
+    Количество мероприятий по значениям фасетов
+
+    Для каждого фасета применяются все фильтры, кроме его собственного,
+    чтобы клиент видел, сколько мероприятий даст выбор другого значения.
+    """
+    facets = EventFacetCounts()
+    facets.total = db.execute(
+        select(func.count()).select_from(Event).where(*_event_conditions(filters))
+    ).scalar_one()
+
+    for name, column in (("event_type", Event.event_type), ("format", Event.format)):
+        rows = db.execute(
+            select(column, func.count())
+            .where(*_event_conditions(filters, exclude=name))
+            .group_by(column)
+        )
+        setattr(facets, name, {value.value: count for value, count in rows})
+
+    facets.topics = [
+        (topic_name, count)
+        for topic_name, count in db.execute(
+            select(Topic.name, func.count(EventTopic.event_id).label("events"))
+            .join(EventTopic, EventTopic.topic_id == Topic.id)
+            .join(Event, Event.id == EventTopic.event_id)
+            .where(*_event_conditions(filters, exclude="topics"))
+            .group_by(Topic.id, Topic.name)
+            .order_by(func.count(EventTopic.event_id).desc(), Topic.name)
+            .limit(FACET_TOPICS_LIMIT)
+        )
+    ]
+
+    facets.with_free_seats = db.execute(
+        select(func.count())
+        .select_from(Event)
+        .where(*_event_conditions(filters, exclude="has_free_seats"), _seats_left() > 0)
+    ).scalar_one()
+    return facets
+
+
 def get_user_events(db: Session, user_id: uuid.UUID) -> List[Event]:
     """Получить мероприятия, на которые записан пользователь (Мои события)"""
     return db.query(Event).join(EventRegistration).filter(
@@ -89,10 +253,17 @@ def update_event(db: Session, *, event_id: uuid.UUID, event_data: EventUpdate) -
         import json
         update_data["topics"] = json.dumps(update_data["topics"], ensure_ascii=False)
     
+    # Варианты относятся к прежнему фото
+    if "image_url" in update_data and update_data["image_url"] != event.image_url:
+        update_data["image_variants"] = None
+    
     for field, value in update_data.items():
         if hasattr(event, field):
             setattr(event, field, value)
     
+    # Вместимость могли увеличить — записываем ожидающих
+    _fill_from_waitlist(db, event)
+    
     db.commit()
     db.refresh(event)
     return event
@@ -120,12 +291,7 @@ def register_for_event(db: Session, *, event_id: uuid.UUID, user_id: uuid.UUID)
         raise ValueError("Нет свободных мест")
     
     # Проверяем, не прошло ли мероприятие
-    now = datetime.now(timezone.utc)
-    # Если event.date не имеет timezone, считаем его UTC
-    event_date = event.date
-    if event_date.tzinfo is None:
-        event_date = event_date.replace(tzinfo=timezone.utc)
-    if event_date < now:
+    if _has_started(event):
         raise ValueError("Мероприятие уже прошло")
     
     registration = EventRegistration(
@@ -133,9 +299,10 @@ def register_for_event(db: Session, *, event_id: uuid.UUID, user_id: uuid.UUID)
         user_id=user_id,
     )
     db.add(registration)
+    remove_from_waitlist(db, kind=WaitlistKind.EVENT, target_id=event_id, user_id=user_id)
     
     # Увеличиваем счетчик участников
-    event.current_participants += 1
+    adjust_counter(db, event, "current_participants", 1)
     
     db.commit()
     db.refresh(registration)
@@ -155,15 +322,66 @@ def unregister_from_event(db: Session, *, event_id: uuid.UUID, user_id: uuid.UUI
         raise ValueError("Вы не записаны на это мероприятие")
     
     event = get_event_by_id(db, event_id)
+    db.delete(registration)
     if event:
-        # Уменьшаем счетчик участников
-        event.current_participants = max(0, event.current_participants - 1)
+        # Уменьшаем счетчик участников; освободившееся место занимает первый из листа ожидания
+        adjust_counter(db, event, "current_participants", -1)
+        _fill_from_waitlist(db, event)
     
-    db.delete(registration)
     db.commit()
     return True
 
 
+def _has_started(event: Event) -> bool:
+    # Если event.date не имеет timezone, считаем его UTC
+    event_date = event.date
+    if event_date.tzinfo is None:
+        event_date = event_date.replace(tzinfo=timezone.utc)
+    return event_date < datetime.now(timezone.utc)
+
+
+def _fill_from_waitlist(db: Session, event: Event) -> List[uuid.UUID]:
+    """Записать ожидающих на свободные места (без commit)"""
+    free = event.max_participants - event.current_participants
+    if free <= 0 or _has_started(event):
+        return []
+    user_ids = pop_waitlist(db, kind=WaitlistKind.EVENT, target_id=event.id, count=free)
+    for user_id in user_ids:
+        db.add(EventRegistration(event_id=event.id, user_id=user_id))
+    adjust_counter(db, event, "current_participants", len(user_ids))
+    return user_ids
+
+
+def join_event_waitlist(db: Session, *, event_id: uuid.UUID, user_id: uuid.UUID) -> int:
+    """Встать в лист ожидания мероприятия; возвращает место в очереди"""
+    event = get_event_by_id(db, event_id)
+    if not event:
+        raise ValueError("Мероприятие не найдено")
+    if is_user_registered(db, event_id=event_id, user_id=user_id):
+        raise ValueError("Вы уже записаны на это мероприятие")
+    if _has_started(event):
+        raise ValueError("Мероприятие уже прошло")
+    if event.current_participants < event.max_participants:
+        raise ValueError("Есть свободные места — запишитесь на мероприятие")
+    
+    position = add_to_waitlist(db, kind=WaitlistKind.EVENT, target_id=event_id, user_id=user_id)
+    db.commit()
+    return position
+
+
+def leave_event_waitlist(db: Session, *, event_id: uuid.UUID, user_id: uuid.UUID) -> bool:
+    """Выйти из листа ожидания мероприятия"""
+    if not remove_from_waitlist(db, kind=WaitlistKind.EVENT, target_id=event_id, user_id=user_id):
+        raise ValueError("Вы не в листе ожидания этого мероприятия")
+    db.commit()
+    return True
+
+
+def get_event_waitlist_position(db: Session, *, event_id: uuid.UUID, user_id: uuid.UUID) -> Optional[int]:
+    """Место пользователя в листе ожидания мероприятия (None — не в очереди)"""
+    return get_waitlist_position(db, kind=WaitlistKind.EVENT, target_id=event_id, user_id=user_id)
+
+
 def is_user_registered(db: Session, *, event_id: uuid.UUID, user_id: uuid.UUID) -> bool:
     """Проверить, записан ли пользователь на мероприятие"""
     registration = db.query(EventRegistration).filter(
@@ -179,3 +397,53 @@ def get_event_participants_count(db: Session, event_id: uuid.UUID) -> int:
     """Получить количество зарегистрированных участников"""
     return db.query(EventRegistration).filter(EventRegistration.event_id == event_id).count()
 
+
+def _assign_topics(session: Session, event: Event, cache: dict[str, Topic]) -> None:
+    names = {}
+    for name in _parse_topics(event.topics):
+        names.setdefault(topic_key(name), name.strip())
+
+    missing = [key for key in names if key not in cache]
+    if missing:
+        for topic in session.query(Topic).filter(Topic.key.in_(missing)):
+            cache[topic.key] = topic
+    for key, name in names.items():
+        if key not in cache:
+            cache[key] = Topic(name=name, key=key)
+            session.add(cache[key])
+
+    event.topic_links = [EventTopic(topic=cache[key]) for key in names]
+
+
+def backfill_event_topics(db: Session) -> int:
+    """Построить связи с темами для мероприятий, у которых их ещё нет"""
+    events = db.query(Event).filter(
+        and_(
+            Event.topics.is_not(None),
+            ~exists().where(EventTopic.event_id == Event.id),
+        )
+    ).all()
+    cache: dict[str, Topic] = {}
+    with db.no_autoflush:
+        for event in events:
+            _assign_topics(db, event, cache)
+    if events:
+        db.commit()
+    return len(events)
+
+
+@register_job("events.backfill_topics", on_startup=True)
+def backfill_event_topics_job(db: Session, payload: dict) -> dict:
+    """Фоновая задача после старта: связи с темами для мероприятий, загруженных мимо ORM"""
+    return {"events": backfill_event_topics(db)}
+
+
+@sa_event.listens_for(Session, "before_flush")
+def _sync_event_topics(session: Session, flush_context, instances) -> None:
+    cache: dict[str, Topic] = {}
+    with session.no_autoflush:
+        for obj in (*session.new, *session.dirty):
+            if not isinstance(obj, Event):
+                continue
+            if obj in session.new or inspect(obj).attrs.topics.history.has_changes():
+                _assign_topics(session, obj, cache)
@@ -0,0 +1,222 @@
+"""
+Отдача файлов из static_root
+
+Два режима (settings.static_serving_mode):
+- app   — файлы отдаёт backend: строгий ETag, 304, Range-запросы (206);
+- nginx — backend только проверяет права и возвращает X-Accel-Redirect на
+          internal location nginx, байты отдаёт nginx.
+
+Файлы с неизменяемыми именами (blob'ы по sha256, фото мероприятий с uuid
+в имени) кэшируются клиентом на год.
+"""
+from email.utils import formatdate
+import hashlib
+import mimetypes
+import os
+from pathlib import Path
+from typing import Iterator, Optional
+from urllib.parse import quote
+
+from fastapi import Request
+from fastapi.staticfiles import StaticFiles
+from starlette.exceptions import HTTPException
+from starlette.responses import FileResponse, Response, StreamingResponse
+from starlette.types import Scope
+
+from app.core.config import settings
+from app.services.upload_utils import UPLOAD_CHUNK_SIZE
+
+SERVING_MODE_APP = "app"
+SERVING_MODE_NGINX = "nginx"
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+# Префиксы static_root, отдаваемые публично с долгим кэшем
+PUBLIC_IMMUTABLE_PREFIXES = ("events/",)
+
+
+def protected_prefixes() -> tuple[str, ...]:
+    """Префиксы static_root, доступные только через API с проверкой прав"""
+    return (
+        f"{settings.document_blobs_prefix}/",
+        f"{settings.request_documents_prefix}/",
+    )
+
+
+def cache_control(*, immutable: bool, private: bool) -> str:
+    scope = "private" if private else "public"
+    if immutable:
+        return f"{scope}, max-age={IMMUTABLE_MAX_AGE}, immutable"
+    return f"{scope}, no-cache"
+
+
+def stat_etag(stat_result: os.stat_result) -> str:
+    """ETag по времени изменения и размеру (для файлов без известного хэша)"""
+    base = f"{stat_result.st_mtime}-{stat_result.st_size}"
+    return f'"{hashlib.md5(base.encode(), usedforsecurity=False).hexdigest()}"'
+
+
+def content_disposition(filename: str, *, inline: bool = True) -> str:
+    kind = "inline" if inline else "attachment"
+    ascii_name = filename.encode("ascii", "ignore").decode().replace('"', "")
+    stem, dot, suffix = ascii_name.rpartition(".")
+    if not dot:
+        stem, suffix = ascii_name, ""
+    if not stem.strip(". "):
+        ascii_name = f"document.{suffix}" if suffix else "document"
+    return f"{kind}; filename=\"{ascii_name}\"; filename*=UTF-8''{quote(filename)}"
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return etag in candidates
+
+
+def _parse_range(header: str, size: int) -> Optional[tuple[int, int]]:
+    """Разобрать одиночный диапазон bytes=start-end
+
+    Возвращает (start, end) включительно, None — заголовок игнорируется
+    (несколько диапазонов или неизвестная единица). Недостижимый диапазон
+    даёт ValueError.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    start_text, sep, end_text = spec.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if not start_text:
+            length = int(end_text)
+            if length <= 0:
+                raise ValueError("empty suffix range")
+            return max(size - length, 0), size - 1
+        start = int(start_text)
+        end = int(end_text) if end_text else size - 1
+    except ValueError:
+        raise ValueError("invalid range")
+    if start >= size or start > end:
+        raise ValueError("unsatisfiable range")
+    return start, min(end, size - 1)
+
+
+def _iter_file_range(path: Path, start: int, length: int) -> Iterator[bytes]:
+    with path.open("rb") as fh:
+        fh.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = fh.read(min(UPLOAD_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def serve_file(
+    request: Request,
+    path: Path,
+    *,
+    media_type: Optional[str] = None,
+    etag: Optional[str] = None,
+    cache: str,
+    filename: Optional[str] = None,
+    accel_path: Optional[str] = None,
+    stat_result: Optional[os.stat_result] = None,
+) -> Response:
+    """Ответ с содержимым файла с учётом If-None-Match, Range и режима отдачи"""
+    if stat_result is None:
+        try:
+            stat_result = path.stat()
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="Файл не найден")
+
+    etag = etag or stat_etag(stat_result)
+    media_type = media_type or mimetypes.guess_type(path.name)[0]
+    headers = {
+        "etag": etag,
+        "cache-control": cache,
+        "accept-ranges": "bytes",
+        "last-modified": formatdate(stat_result.st_mtime, usegmt=True),
+    }
+    if filename:
+        headers["content-disposition"] = content_disposition(filename)
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    if accel_path and settings.static_serving_mode == SERVING_MODE_NGINX:
+        # nginx сам обработает Range и отдаст файл из internal location
+        headers["x-accel-redirect"] = accel_path
+        return Response(media_type=media_type or "application/octet-stream", headers=headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    size = stat_result.st_size
+    if range_header and (not if_range or if_range.strip() == etag):
+        try:
+            byte_range = _parse_range(range_header, size)
+        except ValueError:
+            headers["content-range"] = f"bytes */{size}"
+            return Response(status_code=416, headers=headers)
+        if byte_range is not None:
+            start, end = byte_range
+            length = end - start + 1
+            headers["content-range"] = f"bytes {start}-{end}/{size}"
+            headers["content-length"] = str(length)
+            return StreamingResponse(
+                _iter_file_range(path, start, length),
+                status_code=206,
+                media_type=media_type,
+                headers=headers,
+            )
+
+    return FileResponse(path, media_type=media_type, headers=headers, stat_result=stat_result)
+
+
+def accel_path_for(relative_path: str) -> str:
+    """Путь во internal location nginx для файла из static_root"""
+    return f"{settings.static_accel_prefix.rstrip('/')}/{relative_path.lstrip('/')}"
+
+
+class PublicStaticFiles(StaticFiles):
+    """
+    StaticFiles для публичной статики
+
+    Документы заявок отсюда не отдаются (только через API с проверкой прав),
+    остальные файлы поддерживают Range и долгий кэш для неизменяемых имён.
+    """
+
+    def __init__(self, *, directory: Path, **kwargs) -> None:
+        super().__init__(directory=directory, **kwargs)
+        self.root = Path(directory)
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        relative = path.replace(os.sep, "/").lstrip("/")
+        if relative.startswith(protected_prefixes()):
+            raise HTTPException(status_code=404)
+        return await super().get_response(path, scope)
+
+    def file_response(
+        self,
+        full_path,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        if status_code != 200:
+            return super().file_response(full_path, stat_result, scope, status_code)
+        try:
+            relative = Path(full_path).resolve().relative_to(self.root.resolve()).as_posix()
+        except ValueError:
+            relative = ""
+        immutable = relative.startswith(PUBLIC_IMMUTABLE_PREFIXES)
+        return serve_file(
+            Request(scope),
+            Path(full_path),
+            cache=cache_control(immutable=immutable, private=False),
+            stat_result=stat_result,
+        )
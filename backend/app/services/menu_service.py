@@ -1,187 +1,143 @@
+"""
+Главное меню по ролям
+
+Меню описаны в JSON-файле (settings.menu_config_path, по умолчанию
+app/data/menus.json): {"student": [...], "staff": [...], "admin": [...]}.
+Файл читается при старте, меню каждой роли проверяется схемой MenuItem и
+сразу сериализуется в байты с ETag — запрос меню только отдаёт готовое
+тело. Изменение файла подхватывается без перезапуска: не чаще раза в
+settings.menu_reload_interval_seconds сверяется mtime. Если новый файл
+некорректен, продолжают отдаваться прежние меню.
+"""
+from dataclasses import dataclass
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+import threading
+import time
+from typing import Optional
+
+from pydantic import ValidationError
+
+from app.core.config import settings
 from app.models.user import UserRole
 from app.schemas.menu import MenuItem, MenuResponse
 
+logger = logging.getLogger(__name__)
+
+DEFAULT_MENU_CONFIG = Path(__file__).resolve().parent.parent / "data" / "menus.json"
+
+
+@dataclass(frozen=True)
+class RenderedMenu:
+    """Меню роли в готовом к отправке виде"""
+    menu: MenuResponse
+    body: bytes
+    etag: str
+
+
+def _render(items: list[MenuItem]) -> RenderedMenu:
+    menu = MenuResponse(items=items)
+    body = menu.model_dump_json().encode()
+    etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+    return RenderedMenu(menu=menu, body=body, etag=etag)
+
+
+def _menu_config_path() -> Path:
+    return Path(settings.menu_config_path) if settings.menu_config_path else DEFAULT_MENU_CONFIG
+
+
+def _load_menus(path: Path) -> dict[UserRole, RenderedMenu]:
+    """Прочитать и проверить файл меню; ValueError при ошибке формата"""
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as exc:
+        raise ValueError(f"Не удалось прочитать файл меню {path}: {exc}") from exc
+    if not isinstance(data, dict):
+        raise ValueError(f"Файл меню {path} должен содержать объект {{роль: пункты}}")
+
+    unknown = set(data) - {role.value for role in UserRole}
+    if unknown:
+        raise ValueError(f"Неизвестные роли в файле меню {path}: {', '.join(sorted(unknown))}")
+
+    menus = {}
+    for role in UserRole:
+        try:
+            items = [MenuItem.model_validate(item) for item in data.get(role.value, [])]
+        except (ValidationError, TypeError) as exc:
+            raise ValueError(f"Некорректное меню роли {role.value} в {path}: {exc}") from exc
+        menus[role] = _render(items)
+    return menus
+
+
+class _MenuStore:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._menus: dict[UserRole, RenderedMenu] = {}
+        self._mtime: Optional[int] = None
+        self._checked_at = 0.0
+
+    def load(self) -> None:
+        path = _menu_config_path()
+        mtime = os.stat(path).st_mtime_ns
+        menus = _load_menus(path)
+        with self._lock:
+            self._menus, self._mtime = menus, mtime
+            self._checked_at = time.monotonic()
+
+    def _reload_if_changed(self) -> None:
+        now = time.monotonic()
+        if now - self._checked_at < settings.menu_reload_interval_seconds:
+            return
+        with self._lock:
+            if now - self._checked_at < settings.menu_reload_interval_seconds:
+                return
+            self._checked_at = now
+            path = _menu_config_path()
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError as exc:
+                logger.warning("menu config %s is unavailable, keeping previous menus: %s", path, exc)
+                return
+            if mtime == self._mtime:
+                return
+            # mtime запоминается и для некорректного файла, чтобы не разбирать его повторно
+            self._mtime = mtime
+            try:
+                self._menus = _load_menus(path)
+            except ValueError as exc:
+                logger.warning("failed to reload menus, keeping previous: %s", exc)
+                return
+            logger.info("menus reloaded from %s", path)
+
+    def get(self, role: UserRole) -> RenderedMenu:
+        if not self._menus:
+            self.load()
+        else:
+            self._reload_if_changed()
+        return self._menus.get(role) or _EMPTY_MENU
+
+
+_EMPTY_MENU = _render([])
+_store = _MenuStore()
+
+
+def load_menus() -> None:
+    """Загрузить меню при старте приложения (ошибка в файле останавливает запуск)"""
+    _store.load()
+
+
+def get_rendered_menu(role: UserRole) -> RenderedMenu:
+    """Готовое меню роли: тело ответа и ETag"""
+    return _store.get(role)
+
 
 def get_menu_for_role(role: UserRole) -> MenuResponse:
     """
-    Генерирует динамическое меню в зависимости от роли пользователя
-    
-    Меню студента:
-    - Лента мероприятий
-    - Элективы
-    - ЛК (Библиотека, Помощь)
-    
-    Меню преподавателя:
-    - Лента мероприятий
-    - Документооборот (Мои заявки, Согласование заявок, Отпуск)
-    - ЛК (Помощь)
-    
-    Меню админа:
-    - Все пункты + админ-панель
-    """
-    
-    if role == UserRole.STUDENT:
-        return MenuResponse(
-            items=[
-                MenuItem(
-                    id="events",
-                    title="Лента мероприятий",
-                    icon="calendar",
-                    route="/events"
-                ),
-                MenuItem(
-                    id="electives",
-                    title="Элективы",
-                    icon="book",
-                    route="/electives"
-                ),
-                MenuItem(
-                    id="profile",
-                    title="Личный кабинет",
-                    icon="user",
-                    children=[
-                        MenuItem(
-                            id="library",
-                            title="Библиотека",
-                            icon="library",
-                            route="/library/access"
-                        ),
-                        MenuItem(
-                            id="help",
-                            title="Помощь",
-                            icon="help",
-                            route="/help"
-                        )
-                    ]
-                )
-            ]
-        )
-    
-    elif role == UserRole.STAFF:
-        return MenuResponse(
-            items=[
-                MenuItem(
-                    id="events",
-                    title="Лента мероприятий",
-                    icon="calendar",
-                    route="/events"
-                ),
-                MenuItem(
-                    id="documents",
-                    title="Документооборот",
-                    icon="file-text",
-                    children=[
-                        MenuItem(
-                            id="my-requests",
-                            title="Мои заявки",
-                            icon="inbox",
-                            route="/requests/my"
-                        ),
-                        MenuItem(
-                            id="approval",
-                            title="Согласование заявок",
-                            icon="check-circle",
-                            route="/requests/approval"
-                        ),
-                        MenuItem(
-                            id="vacation",
-                            title="Отпуск",
-                            icon="briefcase",
-                            route="/requests?type=vacation"
-                        )
-                    ]
-                ),
-                MenuItem(
-                    id="profile",
-                    title="Личный кабинет",
-                    icon="user",
-                    children=[
-                        MenuItem(
-                            id="help",
-                            title="Помощь",
-                            icon="help",
-                            route="/help"
-                        )
-                    ]
-                )
-            ]
-        )
-    
-    elif role == UserRole.ADMIN:
-        return MenuResponse(
-            items=[
-                MenuItem(
-                    id="events",
-                    title="Лента мероприятий",
-                    icon="calendar",
-                    route="/events"
-                ),
-                MenuItem(
-                    id="documents",
-                    title="Документооборот",
-                    icon="file-text",
-                    children=[
-                        MenuItem(
-                            id="my-requests",
-                            title="Мои заявки",
-                            icon="inbox",
-                            route="/requests/my"
-                        ),
-                        MenuItem(
-                            id="approval",
-                            title="Согласование заявок",
-                            icon="check-circle",
-                            route="/requests/approval"
-                        ),
-                        MenuItem(
-                            id="vacation",
-                            title="Отпуск",
-                            icon="briefcase",
-                            route="/requests?type=vacation"
-                        )
-                    ]
-                ),
-                MenuItem(
-                    id="admin",
-                    title="Админ-панель",
-                    icon="settings",
-                    children=[
-                        MenuItem(
-                            id="users",
-                            title="Пользователи",
-                            icon="users",
-                            route="/admin/users"
-                        ),
-                        MenuItem(
-                            id="events-management",
-                            title="Управление мероприятиями",
-                            icon="calendar",
-                            route="/admin/events"
-                        ),
-                        MenuItem(
-                            id="library-management",
-                            title="Управление библиотекой",
-                            icon="library",
-                            route="/admin/library"
-                        )
-                    ]
-                ),
-                MenuItem(
-                    id="profile",
-                    title="Личный кабинет",
-                    icon="user",
-                    children=[
-                        MenuItem(
-                            id="help",
-                            title="Помощь",
-                            icon="help",
-                            route="/help"
-                        )
-                    ]
-                )
-            ]
-        )
-    
-    # По умолчанию возвращаем пустое меню
-    return MenuResponse(items=[])
+    Меню в зависимости от роли пользователя
 
+    Возвращается общий для всех запросов объект — изменять его нельзя.
+    """
+    return get_rendered_menu(role).menu
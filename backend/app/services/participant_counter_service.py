@@ -0,0 +1,200 @@
+"""
+Счётчики записавшихся: Event.current_participants и Elective.current_students
+
+Счётчики денормализованы, чтобы лента и проверка мест не делали COUNT(*)
+по регистрациям. Поддерживать их можно двумя способами:
+
+- сервисы записи (по умолчанию) — adjust_counter меняет счётчик в той же
+  транзакции, что и регистрацию;
+- триггеры БД (settings.counter_triggers_enabled) — AFTER INSERT/DELETE на
+  таблицах регистраций, счётчик меняется при любом изменении регистраций,
+  включая каскадные удаления и скрипты наполнения. adjust_counter тогда
+  только перечитывает счётчик. При выключенной настройке триггеры удаляются,
+  чтобы записи не учитывались дважды. Триггеры приводятся в соответствие
+  с настройкой при старте каждого воркера, до приёма запросов (иначе
+  adjust_counter не менял бы счётчики вовсе), seed-скрипты делают это сами
+  до вставки регистраций.
+
+Расхождения (удаление каскадом, сбой посреди операции, включение
+триггеров на базе с уже разошедшимися счётчиками) исправляет фоновая
+задача counters.reconcile: один GROUP BY по таблице регистраций на каждый
+счётчик, исправление одним executemany и отчёт о найденных расхождениях.
+"""
+from dataclasses import dataclass
+import logging
+
+from sqlalchemy import bindparam, func, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.jobs import register_job
+from app.models.elective import Elective, ElectiveRegistration
+from app.models.event import Event, EventRegistration
+
+logger = logging.getLogger(__name__)
+
+# Сколько расхождений каждого вида перечислять в отчёте
+REPORT_LIMIT = 100
+
+
+@dataclass(frozen=True)
+class _Counter:
+    kind: str
+    model: type
+    counter: str  # Колонка счётчика
+    registration: type
+    foreign_key: str  # Колонка регистрации со ссылкой на model
+
+
+_COUNTERS = (
+    _Counter("events", Event, "current_participants", EventRegistration, "event_id"),
+    _Counter("electives", Elective, "current_students", ElectiveRegistration, "elective_id"),
+)
+
+
+def adjust_counter(db: Session, target, attr: str, delta: int) -> None:
+    """Учесть добавленные (delta > 0) или удалённые регистрации в счётчике target (без commit)"""
+    if settings.counter_triggers_enabled:
+        # Счётчик изменит триггер при записи регистраций
+        db.flush()
+        db.refresh(target, [attr])
+    else:
+        setattr(target, attr, max(0, getattr(target, attr) + delta))
+
+
+def _trigger_ddl(dialect: str, spec: _Counter) -> list[str]:
+    parent, child = spec.model.__tablename__, spec.registration.__tablename__
+    name = f"counter_{child}"
+    if dialect == "sqlite":
+        return [
+            f"CREATE TRIGGER IF NOT EXISTS {name}_ai AFTER INSERT ON {child} BEGIN "
+            f"UPDATE {parent} SET {spec.counter} = {spec.counter} + 1 WHERE id = new.{spec.foreign_key}; END",
+            f"CREATE TRIGGER IF NOT EXISTS {name}_ad AFTER DELETE ON {child} BEGIN "
+            f"UPDATE {parent} SET {spec.counter} = MAX({spec.counter} - 1, 0) WHERE id = old.{spec.foreign_key}; END",
+        ]
+    if dialect == "postgresql":
+        return [
+            f"CREATE OR REPLACE FUNCTION {name}() RETURNS trigger AS $$ BEGIN "
+            f"IF TG_OP = 'INSERT' THEN "
+            f"UPDATE {parent} SET {spec.counter} = {spec.counter} + 1 WHERE id = NEW.{spec.foreign_key}; "
+            f"ELSE "
+            f"UPDATE {parent} SET {spec.counter} = GREATEST({spec.counter} - 1, 0) WHERE id = OLD.{spec.foreign_key}; "
+            f"END IF; RETURN NULL; END $$ LANGUAGE plpgsql",
+            f"DROP TRIGGER IF EXISTS {name} ON {child}",
+            f"CREATE TRIGGER {name} AFTER INSERT OR DELETE ON {child} FOR EACH ROW EXECUTE FUNCTION {name}()",
+        ]
+    raise ValueError(f"Триггеры счётчиков не поддерживаются для {dialect}")
+
+
+def _trigger_names(dialect: str, spec: _Counter) -> set[str]:
+    name = f"counter_{spec.registration.__tablename__}"
+    if dialect == "sqlite":
+        return {f"{name}_ai", f"{name}_ad"}
+    return {name}
+
+
+def _existing_triggers(conn) -> set[str]:
+    if conn.dialect.name == "sqlite":
+        query = "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'counter_%'"
+    elif conn.dialect.name == "postgresql":
+        # Блокировка до конца транзакции: воркеры, стартующие вместе, не выполняют DDL одновременно
+        conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('counter_triggers'))"))
+        query = "SELECT tgname FROM pg_trigger WHERE NOT tgisinternal AND tgname LIKE 'counter_%'"
+    else:
+        return set()
+    return set(conn.execute(text(query)).scalars())
+
+
+def _drop_trigger_ddl(dialect: str, spec: _Counter) -> list[str]:
+    child = spec.registration.__tablename__
+    name = f"counter_{child}"
+    if dialect == "sqlite":
+        return [f"DROP TRIGGER IF EXISTS {name}_ai", f"DROP TRIGGER IF EXISTS {name}_ad"]
+    if dialect == "postgresql":
+        return [f"DROP TRIGGER IF EXISTS {name} ON {child}", f"DROP FUNCTION IF EXISTS {name}()"]
+    return []
+
+
+def ensure_counter_triggers(engine: Engine) -> bool:
+    """Создать или удалить триггеры счётчиков по settings.counter_triggers_enabled; True, если что-то изменилось"""
+    changed = False
+    with engine.begin() as conn:
+        dialect = conn.dialect.name
+        existing = _existing_triggers(conn)
+        for spec in _COUNTERS:
+            names = _trigger_names(dialect, spec)
+            if settings.counter_triggers_enabled:
+                if names <= existing:
+                    continue
+                statements = _trigger_ddl(dialect, spec)
+            else:
+                if not names & existing:
+                    continue
+                statements = _drop_trigger_ddl(dialect, spec)
+            for statement in statements:
+                conn.execute(text(statement))
+            changed = True
+    return changed
+
+
+def _reconcile(db: Session, spec: _Counter, *, dry_run: bool) -> dict:
+    model, registration = spec.model, spec.registration
+    stored = getattr(model, spec.counter)
+    counts = (
+        select(getattr(registration, spec.foreign_key).label("target_id"), func.count().label("actual"))
+        .group_by(getattr(registration, spec.foreign_key))
+        .subquery()
+    )
+    actual = func.coalesce(counts.c.actual, 0)
+    rows = db.execute(
+        select(model.id, model.title, stored, actual)
+        .outerjoin(counts, counts.c.target_id == model.id)
+        .where(stored != actual)
+        .order_by(func.abs(stored - actual).desc())
+    ).all()
+
+    fixed = 0
+    if rows and not dry_run:
+        table = model.__table__
+        column = table.c[spec.counter]
+        # Условие на прежнее значение: счётчик, изменённый параллельной записью, не затирается
+        fixed = db.connection().execute(
+            table.update()
+            .where(table.c.id == bindparam("target_id"), column == bindparam("stored"))
+            .values({spec.counter: bindparam("actual")}),
+            [{"target_id": row[0], "stored": row[2], "actual": row[3]} for row in rows],
+        ).rowcount
+
+    return {
+        "drifted": len(rows),
+        "fixed": fixed,
+        "total_drift": sum(abs(row[2] - row[3]) for row in rows),
+        "discrepancies": [
+            {"id": str(row[0]), "title": row[1], "stored": row[2], "actual": row[3]}
+            for row in rows[:REPORT_LIMIT]
+        ],
+    }
+
+
+def reconcile_participant_counts(db: Session, *, dry_run: bool = False) -> dict:
+    """Сверить счётчики с числом регистраций и исправить расхождения (dry_run — только отчёт)"""
+    report = {"dry_run": dry_run}
+    for spec in _COUNTERS:
+        report[spec.kind] = _reconcile(db, spec, dry_run=dry_run)
+        if report[spec.kind]["drifted"]:
+            logger.warning(
+                "%s counters drifted: %d rows, total drift %d",
+                spec.kind, report[spec.kind]["drifted"], report[spec.kind]["total_drift"],
+            )
+    if dry_run:
+        db.rollback()
+    else:
+        db.commit()
+    return report
+
+
+@register_job("counters.reconcile", cron=settings.counter_reconcile_cron or None)
+def reconcile_participant_counts_job(db: Session, payload: dict) -> dict:
+    """Фоновая задача: сверка счётчиков записавшихся"""
+    return reconcile_participant_counts(db, dry_run=bool(payload.get("dry_run")))
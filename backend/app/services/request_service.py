@@ -1,10 +1,9 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy import and_, or_, select, union
 from sqlalchemy.sql import func
 from typing import List, Optional
 from datetime import datetime
 import uuid
-from pathlib import Path
 
 """
 Модуль 4: Система заявок и документов
@@ -16,14 +15,10 @@ Backend только меняет статусы заявок и предост
 from app.models.request import Request, RequestType, RequestStatus
 from app.models.request_document import RequestDocument
 from app.models.request_approval_step import RequestApprovalStep, ApprovalAction
-from app.models.user import User, UserRole
-from app.models.student import Student
-from app.models.student_group import StudentGroup
-from app.models.teacher import Teacher
-from app.models.staff import Staff
-from app.models.faculty import Faculty
-from app.models.kafedra import Kafedra
 from app.schemas.request import RequestCreate, RequestApprove, RequestReject
+from app.services.approval_routing_service import get_approver_routing, resolve_approver
+from app.services.document_store import store_blob
+from app.services.upload_utils import IncomingUpload
 from app.core.config import settings
 
 
@@ -34,141 +29,82 @@ def get_request_by_id(db: Session, request_id: int) -> Optional[Request]:
 
 def get_user_requests(db: Session, user_id: uuid.UUID) -> List[Request]:
     """Получить все заявки пользователя (Мои заявки)"""
-    return db.query(Request).filter(Request.author_user_id == user_id).order_by(Request.created_at.desc()).all()
+    return (
+        db.query(Request)
+        .options(joinedload(Request.author), joinedload(Request.current_approver))
+        .filter(Request.author_user_id == user_id)
+        .order_by(Request.created_at.desc())
+        .all()
+    )
 
 
-def get_requests_for_approval(db: Session, approver_user_id: uuid.UUID) -> List[Request]:
-    """Получить заявки на согласование для пользователя"""
-    # Ищем заявки, где пользователь является текущим согласующим
-    # ИЛИ где есть шаг согласования с PENDING для этого пользователя
-    requests_by_current_approver = db.query(Request).filter(
+def _approval_inbox_ids(approver_user_id: uuid.UUID):
+    """Подзапрос id заявок, ожидающих решения пользователя"""
+    # Каждая ветка UNION идёт по своему составному индексу.
+    # Шаги согласования учитываются на случай, если current_approver_id не установлен.
+    by_current_approver = select(Request.id).where(
         and_(
             Request.current_approver_id == approver_user_id,
-            Request.status == RequestStatus.PENDING
+            Request.status == RequestStatus.PENDING,
         )
-    ).all()
-    
-    # Также ищем через шаги согласования (на случай, если current_approver_id не установлен)
-    pending_steps = db.query(RequestApprovalStep).filter(
+    )
+    by_pending_step = select(RequestApprovalStep.request_id).where(
         and_(
             RequestApprovalStep.approver_user_id == approver_user_id,
-            RequestApprovalStep.action == ApprovalAction.PENDING
-        )
-    ).all()
-    
-    request_ids_from_steps = {step.request_id for step in pending_steps}
-    requests_by_steps = db.query(Request).filter(
-        and_(
-            Request.id.in_(request_ids_from_steps),
-            Request.status == RequestStatus.PENDING
+            RequestApprovalStep.action == ApprovalAction.PENDING,
         )
-    ).all() if request_ids_from_steps else []
-    
-    # Объединяем результаты и убираем дубликаты
-    all_requests = {req.id: req for req in requests_by_current_approver}
-    for req in requests_by_steps:
-        all_requests[req.id] = req
-    
-    # Сортируем по дате создания (новые сначала)
-    return sorted(all_requests.values(), key=lambda r: r.created_at, reverse=True)
-
+    )
+    return union(by_current_approver, by_pending_step)
 
-def _get_deanery_staff_for_faculty(db: Session, faculty_id: uuid.UUID) -> Optional[uuid.UUID]:
-    """Найти сотрудника деканата для факультета"""
-    # Находим факультет и его университет
-    faculty = db.query(Faculty).filter(Faculty.id == faculty_id).first()
-    if not faculty:
-        return None
-    
-    # Ищем первого сотрудника (Staff) из того же университета
-    staff = db.query(Staff).filter(Staff.university_id == faculty.university_id).first()
-    if staff:
-        return staff.user_id
-    
-    # Если сотрудника нет, используем админа как fallback
-    admin = db.query(User).filter(User.role == UserRole.ADMIN).first()
-    if admin:
-        return admin.id
-    
-    return None
 
+def get_requests_for_approval(
+    db: Session,
+    approver_user_id: uuid.UUID,
+    *,
+    limit: Optional[int] = None,
+    before_id: Optional[int] = None,
+) -> List[Request]:
+    """Получить заявки на согласование для пользователя
 
-def _get_kafedra_head_for_teacher(db: Session, teacher_user_id: uuid.UUID) -> Optional[uuid.UUID]:
-    """Найти руководителя кафедры для преподавателя"""
-    teacher = db.query(Teacher).filter(Teacher.user_id == teacher_user_id).first()
-    if not teacher:
-        return None
-    
-    # Ищем первого преподавателя из той же кафедры (кроме самого автора)
-    # В реальной системе здесь должна быть логика определения руководителя
-    # Для MVP используем первого преподавателя из кафедры или админа
-    kafedra_teacher = db.query(Teacher).filter(
+    Заявки отдаются от новых к старым. Для постраничной выдачи используется
+    keyset-пагинация: before_id — id последней заявки предыдущей страницы.
+    id монотонно растёт вместе с created_at, поэтому сортировка по нему
+    совпадает с сортировкой по дате создания.
+    """
+    query = db.query(Request).options(
+        joinedload(Request.author),
+        joinedload(Request.current_approver),
+    ).filter(
         and_(
-            Teacher.kafedra_id == teacher.kafedra_id,
-            Teacher.user_id != teacher_user_id
+            Request.id.in_(_approval_inbox_ids(approver_user_id)),
+            Request.status == RequestStatus.PENDING,
         )
-    ).first()
-    
-    if kafedra_teacher:
-        return kafedra_teacher.user_id
-    
-    # Если преподавателя нет, используем админа как fallback
-    admin = db.query(User).filter(User.role == UserRole.ADMIN).first()
-    if admin:
-        return admin.id
-    
-    return None
-
+    )
+    if before_id is not None:
+        query = query.filter(Request.id < before_id)
 
-def _get_hr_staff_for_university(db: Session, university_id: uuid.UUID) -> Optional[uuid.UUID]:
-    """Найти сотрудника отдела кадров для университета"""
-    # Ищем первого сотрудника (Staff) из университета
-    staff = db.query(Staff).filter(Staff.university_id == university_id).first()
-    if staff:
-        return staff.user_id
-    
-    # Если сотрудника нет, используем админа как fallback
-    admin = db.query(User).filter(User.role == UserRole.ADMIN).first()
-    if admin:
-        return admin.id
-    
-    return None
+    query = query.order_by(Request.id.desc())
+    if limit is not None:
+        query = query.limit(limit)
+    return query.all()
 
 
-def _get_first_approver_for_request(
-    db: Session,
-    request_type: RequestType,
-    author_user_id: uuid.UUID
-) -> Optional[uuid.UUID]:
-    """Определить первого согласующего для заявки"""
-    if request_type == RequestType.STUDENT_CERTIFICATE:
-        # Справка об обучении - автоматически готово, согласующих нет
-        return None
-    elif request_type == RequestType.ACADEMIC_LEAVE:
-        # Академический отпуск: Куратор → Деканат
-        student = db.query(Student).filter(Student.user_id == author_user_id).first()
-        if student and student.group and student.group.curator_user_id:
-            return student.group.curator_user_id
-    elif request_type == RequestType.TRANSFER:
-        # Заявка на перевод: Деканат
-        student = db.query(Student).filter(Student.user_id == author_user_id).first()
-        if student and student.faculty_id:
-            return _get_deanery_staff_for_faculty(db, student.faculty_id)
-    elif request_type == RequestType.VACATION:
-        # Отпуск: Руководитель → Отдел кадров
-        # Для преподавателя находим руководителя кафедры
-        return _get_kafedra_head_for_teacher(db, author_user_id)
-    elif request_type == RequestType.DOCUMENT_APPROVAL:
-        # Документ на согласование: Руководитель
-        # Для преподавателя находим руководителя кафедры
-        return _get_kafedra_head_for_teacher(db, author_user_id)
-    
-    return None
+def count_requests_for_approval(db: Session, approver_user_id: uuid.UUID) -> int:
+    """Количество заявок, ожидающих решения пользователя (для бейджа в боте)"""
+    stmt = select(func.count()).select_from(Request).where(
+        and_(
+            Request.id.in_(_approval_inbox_ids(approver_user_id)),
+            Request.status == RequestStatus.PENDING,
+        )
+    )
+    return db.execute(stmt).scalar_one()
 
 
 def create_request(db: Session, *, request_data: RequestCreate, author_user_id: uuid.UUID) -> Request:
     """Создать новую заявку"""
     # Определяем маршрут согласования в зависимости от типа заявки
+    routing = get_approver_routing(db)
+    road = routing.road_for(request_data.request_type)
     approval_road_id = None
     current_approver_id = None
     initial_status = RequestStatus.PENDING
@@ -177,15 +113,16 @@ def create_request(db: Session, *, request_data: RequestCreate, author_user_id:
     if request_data.request_type == RequestType.STUDENT_CERTIFICATE:
         initial_status = RequestStatus.APPROVED
     else:
+        approval_road_id = routing.road_ids.get(request_data.request_type)
         # Определяем первого согласующего
-        current_approver_id = _get_first_approver_for_request(
-            db=db,
-            request_type=request_data.request_type,
-            author_user_id=author_user_id
-        )
-        if not current_approver_id:
-            # Если не нашли согласующего, оставляем в ожидании
-            initial_status = RequestStatus.PENDING
+        # Если не нашли согласующего, заявка остаётся в ожидании
+        if road:
+            current_approver_id = resolve_approver(
+                db,
+                routing,
+                role=road[0],
+                author_user_id=author_user_id,
+            )
     
     request = Request(
         request_type=request_data.request_type,
@@ -200,18 +137,11 @@ def create_request(db: Session, *, request_data: RequestCreate, author_user_id:
     
     # Создаем шаги согласования (если нужно)
     if initial_status == RequestStatus.PENDING and current_approver_id:
-        # Определяем роль согласующего
-        approver_role = "Куратор"
-        if request_data.request_type == RequestType.TRANSFER:
-            approver_role = "Деканат"
-        elif request_data.request_type in [RequestType.VACATION, RequestType.DOCUMENT_APPROVAL]:
-            approver_role = "Руководитель"
-        
         step = RequestApprovalStep(
             request_id=request.id,
             step_order=1,
             approver_user_id=current_approver_id,
-            approver_role=approver_role,
+            approver_role=road[0],
             action=ApprovalAction.PENDING,
         )
         db.add(step)
@@ -252,51 +182,31 @@ def approve_request(
         current_step.comment = approve_data.comment
         current_step.processed_at = datetime.utcnow()
     
-    # Определяем следующий шаг согласования
+    # Определяем следующий шаг согласования по маршруту
+    # (академический отпуск: куратор → деканат, отпуск: руководитель → отдел кадров;
+    # перевод и документ на согласование завершаются после первого шага)
     next_approver_id = None
     next_approver_role = None
     
-    if request.request_type == RequestType.ACADEMIC_LEAVE:
-        # После куратора идет деканат
-        if current_step and current_step.step_order == 1:
-            # Находим студента и его факультет
-            student = db.query(Student).filter(Student.user_id == request.author_user_id).first()
-            if student and student.faculty_id:
-                next_approver_id = _get_deanery_staff_for_faculty(db, student.faculty_id)
-                next_approver_role = "Деканат"
-    elif request.request_type == RequestType.VACATION:
-        # После руководителя идет отдел кадров
-        if current_step and current_step.step_order == 1:
-            # Находим преподавателя и его университет
-            teacher = db.query(Teacher).filter(Teacher.user_id == request.author_user_id).first()
-            if teacher:
-                # Находим кафедру и факультет, чтобы получить university_id
-                kafedra = db.query(Kafedra).filter(Kafedra.id == teacher.kafedra_id).first()
-                if kafedra:
-                    faculty = db.query(Faculty).filter(Faculty.id == kafedra.faculty_id).first()
-                    if faculty:
-                        next_approver_id = _get_hr_staff_for_university(db, faculty.university_id)
-                        next_approver_role = "Отдел кадров"
-    elif request.request_type == RequestType.TRANSFER:
-        # Заявка на перевод идет только в деканат, после одобрения - одобрено
-        # После одобрения деканатом статус меняется на APPROVED
-        if current_step and current_step.step_order == 1:
-            # Это был последний шаг - заявка одобрена
-            pass
-    elif request.request_type == RequestType.DOCUMENT_APPROVAL:
-        # Документ на согласование: только руководитель, после одобрения - одобрено
-        # После одобрения руководителем статус меняется на APPROVED
-        if current_step and current_step.step_order == 1:
-            # Это был последний шаг - заявка одобрена
-            pass
+    if current_step:
+        routing = get_approver_routing(db)
+        road = routing.road_for(request.request_type)
+        if current_step.step_order < len(road):
+            next_approver_role = road[current_step.step_order]
+            next_approver_id = resolve_approver(
+                db,
+                routing,
+                role=next_approver_role,
+                author_user_id=request.author_user_id,
+            )
     
     if next_approver_id:
         # Есть следующий шаг
         next_step = RequestApprovalStep(
             request_id=request_id,
-            step_order=current_step.step_order + 1 if current_step else 1,
+            step_order=current_step.step_order + 1,
             approver_user_id=next_approver_id,
-            approver_role=next_approver_role or "Деканат",
+            approver_role=next_approver_role,
             action=ApprovalAction.PENDING,
         )
         db.add(next_step)
@@ -356,31 +266,28 @@ def add_request_document(
     db: Session,
     *,
     request_id: int,
-    filename: str,
-    file_content: bytes,
-    mime_type: Optional[str] = None
+    upload: IncomingUpload,
 ) -> RequestDocument:
-    """Добавить документ к заявке"""
+    """Добавить документ к заявке
+
+    Файл уже записан на диск потоково (см. document_store.receive_document_upload).
+    Содержимое кладётся в хранилище blob'ов по sha256: одинаковые файлы
+    хранятся один раз, документ ссылается на общий blob.
+    """
     request = get_request_by_id(db, request_id)
     if not request:
+        upload.path.unlink(missing_ok=True)
         raise ValueError("Заявка не найдена")
     
-    # Сохраняем файл
-    static_dir = Path(settings.static_root)
-    requests_dir = static_dir / settings.request_documents_prefix / str(request_id)
-    requests_dir.mkdir(parents=True, exist_ok=True)
-    
-    file_path = requests_dir / filename
-    file_path.write_bytes(file_content)
-    
-    relative_path = f"{settings.request_documents_prefix}/{request_id}/{filename}"
+    blob = store_blob(db, upload)
     
     document = RequestDocument(
         request_id=request_id,
-        filename=filename,
-        file_path=relative_path,
-        file_size=len(file_content),
-        mime_type=mime_type,
+        filename=upload.filename,
+        file_path=blob.file_path,
+        file_size=upload.size,
+        mime_type=upload.content_type,
+        blob_sha256=blob.sha256,
     )
     db.add(document)
     db.commit()
@@ -393,9 +300,43 @@ def get_request_documents(db: Session, request_id: int) -> List[RequestDocument]
     return db.query(RequestDocument).filter(RequestDocument.request_id == request_id).all()
 
 
+def get_request_document_for_user(
+    db: Session,
+    *,
+    request_id: int,
+    document_id: uuid.UUID,
+    user_id: uuid.UUID,
+) -> Optional[RequestDocument]:
+    """Получить документ заявки с проверкой прав доступа (автор или текущий согласующий)"""
+    return (
+        db.query(RequestDocument)
+        .join(Request, Request.id == RequestDocument.request_id)
+        .filter(
+            and_(
+                RequestDocument.id == document_id,
+                RequestDocument.request_id == request_id,
+                or_(Request.author_user_id == user_id, Request.current_approver_id == user_id),
+            )
+        )
+        .first()
+    )
+
+
 def get_request_detail(db: Session, request_id: int, user_id: uuid.UUID) -> Optional[Request]:
     """Получить детальную информацию о заявке с проверкой прав доступа"""
-    request = get_request_by_id(db, request_id)
+    # Автор, согласующий, шаги (с именами согласующих) и документы загружаются сразу,
+    # чтобы сборка ответа не порождала отдельных запросов на каждое отношение
+    request = (
+        db.query(Request)
+        .options(
+            joinedload(Request.author),
+            joinedload(Request.current_approver),
+            selectinload(Request.approval_steps).joinedload(RequestApprovalStep.approver),
+            selectinload(Request.documents),
+        )
+        .filter(Request.id == request_id)
+        .first()
+    )
     if not request:
         return None
     
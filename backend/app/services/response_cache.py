@@ -0,0 +1,311 @@
+"""
+HTTP-кэширование ответов списков (ETag / Last-Modified / 304)
+
+Валидатор ответа вычисляется дешёвым запросом до сборки тела:
+- мероприятия и элективы — количество и max(updated_at) по тем же фильтрам;
+  у элективов ещё счётчик версии electives (правки элективов и смена имени
+  их преподавателя: updated_at в SQLite с точностью до секунды, а имя
+  преподавателя хранится в users);
+- справочники без updated_at — счётчики версий в таблице cache_versions,
+  которые увеличиваются в той же транзакции, что и изменение данных
+  (общие для всех воркеров);
+- личный кабинет — версия пользователя (User.profile_version), которая
+  увеличивается при изменении его самого или его записи студента,
+  преподавателя или сотрудника, плюс версия справочников вузов;
+- меню — постоянно для роли.
+
+Если клиент прислал совпадающий If-None-Match, ответ 304 отдаётся без
+запросов за данными и без сериализации. Тела общих вариантов (без
+персональных полей) хранятся в памяти процесса (LRU по объёму).
+"""
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+import hashlib
+import threading
+from typing import Any, Callable, Iterable, Optional
+import uuid
+
+from fastapi import Request
+from pydantic import BaseModel
+from sqlalchemy import event, insert, inspect, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from starlette.responses import Response
+
+from app.core.config import settings
+from app.core.jobs import register_job
+from app.core.metrics import RESPONSE_CACHE_REQUESTS
+from app.core.responses import dumps
+from app.models.cache_version import CacheVersion
+from app.models.elective import Elective
+from app.models.faculty import Faculty
+from app.models.kafedra import Kafedra
+from app.models.library import LibraryAccess
+from app.models.staff import Staff
+from app.models.student import Student
+from app.models.student_group import StudentGroup
+from app.models.teacher import Teacher
+from app.models.university import University
+from app.models.user import User
+from app.services.file_serving import etag_matches
+
+# Ограничение числа параметров в одном IN (SQLite)
+PROFILE_BUMP_CHUNK_SIZE = 5000
+
+VERSION_UNIVERSITIES = "universities"
+VERSION_LIBRARY = "library"
+VERSION_ELECTIVES = "electives"
+
+_VERSIONED_MODELS = {
+    University: VERSION_UNIVERSITIES,
+    Faculty: VERSION_UNIVERSITIES,
+    StudentGroup: VERSION_UNIVERSITIES,
+    Kafedra: VERSION_UNIVERSITIES,
+    LibraryAccess: VERSION_LIBRARY,
+}
+
+_VERSION_NAMES = {*_VERSIONED_MODELS.values(), VERSION_ELECTIVES}
+
+# Изменение только этих полей электива версию не меняет (счётчик есть в валидаторе как sum)
+_ELECTIVE_VOLATILE_FIELDS = ("current_students", "updated_at")
+
+# Записи, из которых собирается личный кабинет (ключ — user_id)
+_PROFILE_MODELS = (Student, Teacher, Staff)
+# Изменение остальных полей User (например, max_id при верификации) версию не меняет
+_PROFILE_USER_FIELDS = ("full_name", "role", "city", "university_id")
+
+
+class _BodyCache:
+    """Потокобезопасный LRU отрендеренных тел, ограниченный суммарным размером"""
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._items: OrderedDict[tuple[str, str], bytes] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str, validator: str) -> Optional[bytes]:
+        with self._lock:
+            body = self._items.get((key, validator))
+            if body is not None:
+                self._items.move_to_end((key, validator))
+            return body
+
+    def put(self, key: str, validator: str, body: bytes) -> None:
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._items.pop((key, validator), None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._items[(key, validator)] = body
+            self._size += len(body)
+            while self._size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self._size -= len(evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._size = 0
+
+
+body_cache = _BodyCache(settings.response_cache_max_bytes)
+
+
+def make_etag(key: str, validator: str) -> str:
+    digest = hashlib.blake2b(f"{key}|{validator}".encode(), digest_size=16).hexdigest()
+    return f'"{digest}"'
+
+
+def render_json(payload: Any) -> bytes:
+    """Сериализовать модель, список моделей или обычные данные в JSON"""
+    if isinstance(payload, BaseModel):
+        return payload.model_dump_json().encode()
+    if isinstance(payload, list) and all(isinstance(item, BaseModel) for item in payload):
+        return b"[" + b",".join(item.model_dump_json().encode() for item in payload) + b"]"
+    return dumps(payload)
+
+
+def _as_utc(value: datetime) -> datetime:
+    # В БД время хранится без зоны (UTC)
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _not_modified_since(request: Request, last_modified: Optional[datetime]) -> bool:
+    header = request.headers.get("if-modified-since")
+    if not header or last_modified is None:
+        return False
+    try:
+        since = _as_utc(parsedate_to_datetime(header))
+    except (TypeError, ValueError):
+        return False
+    return _as_utc(last_modified).replace(microsecond=0) <= since
+
+
+def cached_json_response(
+    request: Request,
+    *,
+    key: str,
+    validator: str,
+    render: Callable[[], Any],
+    shared: bool = False,
+    private: Optional[bool] = None,
+    last_modified: Optional[datetime] = None,
+) -> Response:
+    """
+    JSON-ответ с ETag и поддержкой 304
+
+    key — вариант ответа (путь, параметры, пользователь или роль), validator —
+    версия данных. shared=True разрешает хранить тело в кэше процесса: так
+    можно, только если key и validator однозначно определяют тело (например,
+    не для ленты с отметками записи текущего пользователя). private управляет
+    Cache-Control для промежуточных кэшей (по умолчанию — not shared).
+    """
+    if private is None:
+        private = not shared
+    etag = make_etag(key, validator)
+    headers = {
+        "etag": etag,
+        "cache-control": "private, no-cache" if private else "no-cache",
+        "vary": "Authorization",
+    }
+    if last_modified is not None:
+        headers["last-modified"] = format_datetime(_as_utc(last_modified), usegmt=True)
+
+    if_none_match = request.headers.get("if-none-match")
+    if etag_matches(if_none_match, etag) or (if_none_match is None and _not_modified_since(request, last_modified)):
+        RESPONSE_CACHE_REQUESTS.inc("not_modified")
+        return Response(status_code=304, headers=headers)
+
+    body = body_cache.get(key, validator) if shared else None
+    if body is None:
+        RESPONSE_CACHE_REQUESTS.inc("miss")
+        body = render_json(render())
+        if shared:
+            body_cache.put(key, validator, body)
+    else:
+        RESPONSE_CACHE_REQUESTS.inc("hit")
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def get_cache_version(db: Session, name: str) -> int:
+    return db.execute(select(CacheVersion.version).where(CacheVersion.name == name)).scalar() or 0
+
+
+def profile_validator(db: Session, user: User) -> str:
+    """Валидатор личного кабинета: версия пользователя и справочников вузов"""
+    return f"{user.profile_version}:{get_cache_version(db, VERSION_UNIVERSITIES)}"
+
+
+def create_cache_versions(db: Session) -> None:
+    """Создать отсутствующие счётчики версий (без них изменения не меняют валидаторы)"""
+    existing = set(db.execute(select(CacheVersion.name)).scalars())
+    missing = _VERSION_NAMES - existing
+    if not missing:
+        return
+    db.execute(insert(CacheVersion), [{"name": name, "version": 0} for name in missing])
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()  # счётчики только что создал другой воркер
+
+
+def ensure_cache_versions(db: Session) -> None:
+    """
+    Создать счётчики версий и увеличить их после развёртывания
+
+    Данные могли измениться без приложения (seed-скрипты), поэтому после
+    перезапуска ранее выданные ETag становятся недействительными.
+    """
+    create_cache_versions(db)
+    _bump(db.connection(), _VERSION_NAMES)
+    db.commit()
+
+
+@register_job("cache.bump_versions", on_startup=True)
+def ensure_cache_versions_job(db: Session, payload: dict) -> dict:
+    """Фоновая задача после старта: одно увеличение версий на развёртывание, а не на каждый воркер"""
+    ensure_cache_versions(db)
+    return {"versions": sorted(_VERSION_NAMES)}
+
+
+def bump_cache_versions(db: Session, *names: str) -> None:
+    """Увеличить счётчики вручную (для массовых изменений мимо flush)"""
+    _bump(db.connection(), names)
+
+
+def bump_profile_versions(db: Session, user_ids: Iterable[uuid.UUID]) -> None:
+    """Увеличить версии личных кабинетов вручную (для массовых изменений мимо flush)"""
+    _bump_profiles(db.connection(), user_ids)
+
+
+def _bump_profiles(conn, user_ids: Iterable[uuid.UUID]) -> None:
+    user_ids = list(user_ids)
+    for start in range(0, len(user_ids), PROFILE_BUMP_CHUNK_SIZE):
+        conn.execute(
+            update(User.__table__)
+            .where(User.__table__.c.id.in_(user_ids[start:start + PROFILE_BUMP_CHUNK_SIZE]))
+            .values(profile_version=User.__table__.c.profile_version + 1)
+        )
+
+
+def _bump(conn, names: Iterable[str]) -> None:
+    conn.execute(
+        update(CacheVersion)
+        .where(CacheVersion.name.in_(list(names)))
+        .values(version=CacheVersion.version + 1)
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_on_flush(session: Session, flush_context) -> None:
+    names = {
+        _VERSIONED_MODELS[type(obj)]
+        for obj in (*session.new, *session.deleted)
+        if type(obj) in _VERSIONED_MODELS
+    }
+    if any(isinstance(obj, Elective) for obj in (*session.new, *session.deleted)):
+        names.add(VERSION_ELECTIVES)
+    # Новый пользователь кэша ещё не имеет — версию меняют только правки существующих
+    profiles = {obj.user_id for obj in (*session.new, *session.deleted) if isinstance(obj, _PROFILE_MODELS)}
+    renamed = set()
+    for obj in session.dirty:
+        if isinstance(obj, User):
+            attrs = inspect(obj).attrs
+            if any(attrs[field].history.has_changes() for field in _PROFILE_USER_FIELDS):
+                profiles.add(obj.id)
+            if attrs.full_name.history.has_changes():
+                renamed.add(obj.id)
+            continue
+        if isinstance(obj, Elective):
+            if any(
+                attr.history.has_changes()
+                for attr in inspect(obj).attrs
+                if attr.key not in _ELECTIVE_VOLATILE_FIELDS
+            ):
+                names.add(VERSION_ELECTIVES)
+            continue
+        if isinstance(obj, _PROFILE_MODELS):
+            if session.is_modified(obj, include_collections=False):
+                profiles.add(obj.user_id)
+            continue
+        name = _VERSIONED_MODELS.get(type(obj))
+        if name is None or name in names:
+            continue
+        if session.is_modified(obj, include_collections=False):
+            names.add(name)
+    if renamed and VERSION_ELECTIVES not in names:
+        # Имя преподавателя входит в список элективов
+        teaches = session.connection().execute(
+            select(Elective.id).where(Elective.teacher_user_id.in_(renamed)).limit(1)
+        ).first()
+        if teaches:
+            names.add(VERSION_ELECTIVES)
+    if names:
+        _bump(session.connection(), names)
+    if profiles:
+        _bump_profiles(session.connection(), profiles)
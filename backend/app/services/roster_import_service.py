@@ -0,0 +1,401 @@
+"""
+Массовый импорт студентов и преподавателей из CSV/XLSX
+
+Файл читается построчно (CSV — потоком, XLSX — openpyxl в режиме
+read_only), поэтому объём памяти не зависит от размера файла. Ссылки на
+факультеты, группы и кафедры проверяются по справочникам вуза,
+загруженным один раз перед импортом; в колонке можно указать UUID,
+название или (для группы) код.
+
+Строки записываются пачками по settings.import_chunk_size: существующие
+записи (по student_card / tab_number) обновляются, новые вставляются
+одним INSERT на пачку. Ошибка в строке не прерывает импорт — она попадает
+в отчёт с номером строки файла. Если пачка не записалась целиком
+(например, нарушено ограничение БД), её строки записываются по одной,
+чтобы найти виновные.
+"""
+from collections import defaultdict
+import csv
+from dataclasses import dataclass, field
+import enum
+import io
+import itertools
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterator, Optional
+import uuid
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.faculty import Faculty
+from app.models.kafedra import Kafedra
+from app.models.student import Student
+from app.models.student_group import StudentGroup
+from app.models.teacher import Teacher
+from app.models.university import University
+from app.models.user import User, UserRole
+from app.services.approval_routing_service import invalidate_approver_routing
+from app.services.response_cache import bump_profile_versions
+
+# Ошибок в отчёте не больше этого числа (счётчик failed — полный)
+MAX_REPORTED_ERRORS = 1000
+
+_COLUMN_ALIASES = {
+    "faculty_id": "faculty",
+    "group_id": "group",
+    "kafedra_id": "kafedra",
+}
+
+
+class RosterKind(str, enum.Enum):
+    """Что импортируется"""
+    STUDENTS = "students"
+    TEACHERS = "teachers"
+
+
+@dataclass
+class RosterImportError:
+    row: int  # Номер строки в файле (заголовок — строка 1)
+    key: Optional[str]  # Студенческий билет / табельный номер
+    message: str
+
+
+@dataclass
+class RosterImportResult:
+    processed: int = 0
+    created: int = 0
+    updated: int = 0
+    failed: int = 0
+    errors: list[RosterImportError] = field(default_factory=list)
+
+    def add_error(self, row: int, key: Optional[str], message: str) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(RosterImportError(row=row, key=key, message=message))
+
+
+@dataclass
+class _Record:
+    row: int
+    key: str
+    user: dict  # Поля User
+    profile: dict  # Поля Student / Teacher
+
+
+class _References:
+    """Справочники вуза для проверки ссылок в строках"""
+
+    def __init__(self, db: Session, university_id: uuid.UUID) -> None:
+        university = db.get(University, university_id)
+        if not university:
+            raise ValueError("Университет не найден")
+        self.city = university.city
+
+        self.faculties_by_id: dict[str, uuid.UUID] = {}
+        self.faculties_by_name: dict[str, list[uuid.UUID]] = defaultdict(list)
+        for faculty_id, title in db.execute(
+            select(Faculty.id, Faculty.title).where(Faculty.university_id == university_id)
+        ):
+            self.faculties_by_id[str(faculty_id)] = faculty_id
+            self.faculties_by_name[_norm(title)].append(faculty_id)
+
+        self.groups_by_id: dict[str, tuple[uuid.UUID, uuid.UUID]] = {}
+        self.groups_by_name: dict[str, list[tuple[uuid.UUID, uuid.UUID]]] = defaultdict(list)
+        for group_id, name, code, faculty_id in db.execute(
+            select(StudentGroup.id, StudentGroup.name, StudentGroup.code, StudentGroup.faculty_id)
+            .join(Faculty, Faculty.id == StudentGroup.faculty_id)
+            .where(Faculty.university_id == university_id)
+        ):
+            self.groups_by_id[str(group_id)] = (group_id, faculty_id)
+            for label in {_norm(name), _norm(code)} - {""}:
+                self.groups_by_name[label].append((group_id, faculty_id))
+
+        self.kafedras_by_id: dict[str, tuple[uuid.UUID, uuid.UUID]] = {}
+        self.kafedras_by_name: dict[str, list[tuple[uuid.UUID, uuid.UUID]]] = defaultdict(list)
+        for kafedra_id, title, faculty_id in db.execute(
+            select(Kafedra.id, Kafedra.title, Kafedra.faculty_id)
+            .join(Faculty, Faculty.id == Kafedra.faculty_id)
+            .where(Faculty.university_id == university_id)
+        ):
+            self.kafedras_by_id[str(kafedra_id)] = (kafedra_id, faculty_id)
+            if title:
+                self.kafedras_by_name[_norm(title)].append((kafedra_id, faculty_id))
+
+    def faculty(self, value: str) -> Optional[uuid.UUID]:
+        if not value:
+            return None
+        if _norm(value) in self.faculties_by_id:
+            return self.faculties_by_id[_norm(value)]
+        matches = self.faculties_by_name.get(_norm(value), [])
+        if not matches:
+            raise ValueError(f"Факультет «{value}» не найден")
+        if len(matches) > 1:
+            raise ValueError(f"Несколько факультетов с названием «{value}», укажите UUID")
+        return matches[0]
+
+    def _pick(self, kind: str, value: str, by_id: dict, by_name: dict, faculty_id: Optional[uuid.UUID]):
+        """(id, faculty_id) группы или кафедры с учётом факультета"""
+        if _norm(value) in by_id:
+            matches = [by_id[_norm(value)]]
+        else:
+            matches = by_name.get(_norm(value), [])
+            if not matches:
+                raise ValueError(f"{kind} «{value}» не найдена")
+        if faculty_id is not None:
+            matches = [match for match in matches if match[1] == faculty_id]
+            if not matches:
+                raise ValueError(f"{kind} «{value}» не относится к указанному факультету")
+        if len(matches) > 1:
+            raise ValueError(f"{kind} «{value}» есть на нескольких факультетах, укажите факультет")
+        return matches[0]
+
+    def group(self, value: str, faculty_id: Optional[uuid.UUID]) -> tuple[uuid.UUID, uuid.UUID]:
+        return self._pick("Группа", value, self.groups_by_id, self.groups_by_name, faculty_id)
+
+    def kafedra(self, value: str, faculty_id: Optional[uuid.UUID]) -> tuple[uuid.UUID, uuid.UUID]:
+        return self._pick("Кафедра", value, self.kafedras_by_id, self.kafedras_by_name, faculty_id)
+
+
+@dataclass(frozen=True)
+class _Spec:
+    model: type
+    key_column: str
+    role: UserRole
+    required: tuple[str, ...]
+    parse_profile: Callable[[_References, dict], dict]
+
+
+def _student_profile(refs: _References, row: dict) -> dict:
+    group_id, faculty_id = refs.group(row["group"], refs.faculty(row.get("faculty", "")))
+    return {"faculty_id": faculty_id, "group_id": group_id}
+
+
+def _teacher_profile(refs: _References, row: dict) -> dict:
+    kafedra_id, _ = refs.kafedra(row["kafedra"], refs.faculty(row.get("faculty", "")))
+    return {"kafedra_id": kafedra_id}
+
+
+_SPECS = {
+    RosterKind.STUDENTS: _Spec(
+        model=Student,
+        key_column="student_card",
+        role=UserRole.STUDENT,
+        required=("full_name", "student_card", "group"),
+        parse_profile=_student_profile,
+    ),
+    RosterKind.TEACHERS: _Spec(
+        model=Teacher,
+        key_column="tab_number",
+        role=UserRole.STAFF,  # Преподаватели имеют роль staff
+        required=("full_name", "tab_number", "kafedra"),
+        parse_profile=_teacher_profile,
+    ),
+}
+
+
+def _norm(value) -> str:
+    return str(value).strip().lower() if value is not None else ""
+
+
+def _cell(value) -> str:
+    if value is None:
+        return ""
+    # Excel хранит номера как числа: 1001.0 -> "1001"
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def _header(names) -> list[str]:
+    header = [_norm(name) for name in names]
+    return [_COLUMN_ALIASES.get(name, name) for name in header]
+
+
+def _iter_csv(file: BinaryIO) -> Iterator[tuple[int, dict[str, str]]]:
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    first_line = text.readline()
+    if not first_line:
+        return
+    # Excel с русской локалью сохраняет CSV через ";"
+    delimiter = max((";", ",", "\t"), key=first_line.count)
+    reader = csv.reader(itertools.chain([first_line], text), delimiter=delimiter)
+    header = _header(next(reader))
+    for row_number, values in enumerate(reader, start=2):
+        if not any(value.strip() for value in values):
+            continue
+        yield row_number, dict(zip(header, (_cell(value) for value in values)))
+
+
+def _iter_xlsx(file: BinaryIO) -> Iterator[tuple[int, dict[str, str]]]:
+    try:
+        from openpyxl import load_workbook
+    except ImportError as exc:
+        raise ValueError("Для импорта XLSX нужен пакет openpyxl") from exc
+
+    try:
+        workbook = load_workbook(file, read_only=True, data_only=True)
+    except Exception as exc:  # noqa: BLE001 — openpyxl бросает разные исключения на битых файлах
+        raise ValueError(f"Не удалось открыть XLSX: {exc}") from exc
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header_row = next(rows, None)
+        if header_row is None:
+            return
+        header = _header(header_row)
+        for row_number, values in enumerate(rows, start=2):
+            if not any(value not in (None, "") for value in values):
+                continue
+            yield row_number, dict(zip(header, (_cell(value) for value in values)))
+    finally:
+        workbook.close()
+
+
+def iter_roster_rows(file: BinaryIO, filename: str) -> Iterator[tuple[int, dict[str, str]]]:
+    """Строки файла: (номер строки, {колонка: значение})"""
+    suffix = Path(filename or "").suffix.lower()
+    if suffix == ".xlsx":
+        return _iter_xlsx(file)
+    if suffix in (".csv", ".txt", ""):
+        return _iter_csv(file)
+    raise ValueError("Поддерживаются файлы CSV и XLSX")
+
+
+def _parse_row(spec: _Spec, refs: _References, row_number: int, row: dict) -> _Record:
+    missing = [column for column in spec.required if not row.get(column)]
+    if missing:
+        raise ValueError(f"Не заполнены колонки: {', '.join(missing)}")
+    return _Record(
+        row=row_number,
+        key=row[spec.key_column],
+        user={
+            "full_name": row["full_name"],
+            "city": row.get("city") or refs.city,
+            "university_id": None,  # Заполняется в import_roster
+        },
+        profile=spec.parse_profile(refs, row),
+    )
+
+
+def _upsert(db: Session, spec: _Spec, records: list[_Record]) -> tuple[int, int]:
+    """Записать пачку; возвращает (создано, обновлено)"""
+    key_column = getattr(spec.model, spec.key_column)
+    existing: dict[str, list[uuid.UUID]] = defaultdict(list)
+    for key, user_id in db.execute(
+        select(key_column, spec.model.user_id).where(key_column.in_([record.key for record in records]))
+    ):
+        existing[key].append(user_id)
+
+    new_users, new_profiles, user_updates, profile_updates = [], [], [], []
+    for record in records:
+        user_ids = existing.get(record.key)
+        if not user_ids:
+            user_id = uuid.uuid4()
+            new_users.append({"id": user_id, "role": spec.role, **record.user})
+            new_profiles.append({"user_id": user_id, spec.key_column: record.key, **record.profile})
+        elif len(user_ids) > 1:
+            raise ValueError(f"В базе несколько записей с номером {record.key}")
+        else:
+            user_updates.append({"id": user_ids[0], **record.user})
+            profile_updates.append({"user_id": user_ids[0], **record.profile})
+
+    if new_users:
+        db.execute(insert(User), new_users)
+        db.execute(insert(spec.model), new_profiles)
+    if user_updates:
+        db.execute(update(User), user_updates)
+        db.execute(update(spec.model), profile_updates)
+        # Массовый UPDATE идёт мимо flush — кэш личных кабинетов сбрасываем явно
+        bump_profile_versions(db, [row["id"] for row in user_updates])
+    return len(new_users), len(user_updates)
+
+
+def _write_chunk(db: Session, spec: _Spec, records: list[_Record], result: RosterImportResult, dry_run: bool) -> None:
+    finish = db.rollback if dry_run else db.commit
+    try:
+        created, updated = _upsert(db, spec, records)
+        finish()
+    except (SQLAlchemyError, ValueError):
+        db.rollback()
+        # Ищем строки, из-за которых не записалась пачка
+        created = updated = 0
+        for record in records:
+            try:
+                one_created, one_updated = _upsert(db, spec, [record])
+                finish()
+            except (SQLAlchemyError, ValueError) as exc:
+                db.rollback()
+                result.add_error(record.row, record.key, _db_error_message(exc))
+                continue
+            created += one_created
+            updated += one_updated
+    result.created += created
+    result.updated += updated
+    # Преподаватели записаны мимо flush — маршрутизацию заявок сбрасываем явно
+    if spec.model is Teacher and not dry_run and (created or updated):
+        invalidate_approver_routing()
+
+
+def _db_error_message(exc: Exception) -> str:
+    if isinstance(exc, SQLAlchemyError):
+        return f"Ошибка записи в БД: {getattr(exc, 'orig', exc)}"
+    return str(exc)
+
+
+def import_roster(
+    db: Session,
+    *,
+    kind: RosterKind,
+    file: BinaryIO,
+    filename: str,
+    university_id: uuid.UUID,
+    dry_run: bool = False,
+    chunk_size: Optional[int] = None,
+) -> RosterImportResult:
+    """
+    Импортировать студентов или преподавателей вуза из CSV/XLSX
+
+    Колонки студентов: full_name, student_card, group, [faculty], [city];
+    преподавателей: full_name, tab_number, kafedra, [faculty], [city].
+    Без city берётся город вуза. ValueError — если файл нельзя разобрать
+    целиком (формат, нет обязательных колонок, вуз не найден); ошибки
+    отдельных строк возвращаются в отчёте.
+    dry_run — проверить файл и записать в БД без фиксации транзакции.
+    """
+    spec = _SPECS[kind]
+    chunk_size = chunk_size or settings.import_chunk_size
+    refs = _References(db, university_id)
+    result = RosterImportResult()
+    seen: dict[str, int] = {}
+    chunk: list[_Record] = []
+    header_checked = False
+
+    for row_number, row in iter_roster_rows(file, filename):
+        if not header_checked:
+            missing = [column for column in spec.required if column not in row]
+            if missing:
+                raise ValueError(f"В файле нет колонок: {', '.join(missing)}")
+            header_checked = True
+
+        result.processed += 1
+        key = row.get(spec.key_column) or None
+        if key in seen:
+            result.add_error(row_number, key, f"Номер повторяется в файле (строка {seen[key]})")
+            continue
+        try:
+            record = _parse_row(spec, refs, row_number, row)
+        except ValueError as exc:
+            result.add_error(row_number, key, str(exc))
+            continue
+        record.user["university_id"] = university_id
+        seen[record.key] = row_number
+        chunk.append(record)
+
+        if len(chunk) >= chunk_size:
+            _write_chunk(db, spec, chunk, result, dry_run)
+            chunk = []
+
+    if chunk:
+        _write_chunk(db, spec, chunk, result, dry_run)
+    return result
@@ -9,9 +9,11 @@ Backend хранит расписание в БД и записывает изм
 для гибкости и масштабируемости. JSON можно добавить для экспорта/импорта.
 """
 from sqlalchemy.orm import Session
-from datetime import date
+from datetime import date, datetime, timedelta, timezone
 import uuid
 
+from app.core.config import settings
+from app.core.jobs import register_job
 from app.models.lesson import Lesson
 from app.models.lesson_group import LessonGroup
 from app.models.schedule_meta import ScheduleMeta
@@ -197,4 +199,15 @@ def get_schedule_changelog(db: Session, group_id: uuid.UUID | None = None, teach
     return query.order_by(ScheduleChangelog.created_at.desc()).all()
 
 
-
+@register_job(
+    "schedule_changelog.prune",
+    cron="45 3 * * *" if settings.schedule_changelog_retention_days > 0 else None,
+)
+def prune_schedule_changelog(db: Session, payload: dict) -> dict:
+    """Удалить записи changelog старше settings.schedule_changelog_retention_days"""
+    days = int(payload.get("days", settings.schedule_changelog_retention_days))
+    if days <= 0:
+        return {"deleted": 0}
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+    deleted = db.query(ScheduleChangelog).filter(ScheduleChangelog.created_at < cutoff).delete(synchronize_session=False)
+    return {"deleted": deleted}
@@ -0,0 +1,340 @@
+"""
+Полнотекстовый поиск по мероприятиям, элективам и рассылкам
+
+Текст сущностей хранится в search_documents (одна строка на сущность) и
+обновляется в той же транзакции, что и сама сущность (after_flush).
+
+- SQLite: FTS5-индекс search_index с внешним содержимым search_documents,
+  синхронизируется триггерами. Встроенного русского стеммера в FTS5 нет,
+  поэтому в search_documents пишутся основы слов (stem_ru), а термы
+  запроса ищутся по префиксу основы. Ранжирование — bm25, заголовок
+  весит больше текста.
+- PostgreSQL: GIN-индекс по to_tsvector('russian', ...), текст хранится
+  как есть, ранжирование — ts_rank_cd.
+"""
+import json
+import re
+from typing import Iterable, Optional, Sequence
+import uuid
+
+from sqlalchemy import and_, column, delete, event, func, insert, inspect, literal_column, or_, select, table, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from app.core.jobs import register_job
+from app.models.broadcast import Broadcast
+from app.models.elective import Elective
+from app.models.event import Event
+from app.models.search_document import SearchDocument, SearchKind
+from app.models.student import Student
+from app.models.student_group import StudentGroup
+from app.models.user import User, UserRole
+
+TITLE_WEIGHT = 10.0
+BODY_WEIGHT = 1.0
+REBUILD_CHUNK_SIZE = 1000
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_CYRILLIC_RE = re.compile(r"[а-я]")
+
+# Отсекается самое длинное окончание, основа не короче трёх букв
+_RU_ENDINGS = frozenset({
+    "иями", "ями", "ами", "иях", "иям", "ях", "ям", "ах", "ией", "ием", "ию", "ии",
+    "ей", "ем", "ом", "ам",
+    "ого", "его", "ому", "ему", "ыми", "ими", "ым", "им", "ых", "их", "ую", "юю",
+    "ая", "яя", "ое", "ее", "ие", "ые", "ий", "ый", "ой", "ов", "ев", "ия", "ья", "ье",
+    "ьи", "ью", "ться", "тся", "ать", "ять", "ить", "еть", "ешь", "ет", "ут", "ют",
+    "а", "я", "о", "е", "ы", "и", "у", "ю", "ь", "й",
+})
+_RU_ENDING_LENGTHS = tuple(sorted({len(ending) for ending in _RU_ENDINGS}, reverse=True))
+
+# Служебные слова не индексируются и не участвуют в запросе
+_RU_STOP_WORDS = frozenset(
+    "а без в во да для до же за и из или к ко ли на над не ни но о об от "
+    "по под при про с со то у".split()
+)
+
+_INDEXED_FIELDS = {
+    Event: ("title", "description", "speaker_name", "topics"),
+    Elective: ("title", "description"),
+    Broadcast: ("title", "message"),
+}
+
+_KIND_BY_MODEL = {
+    Event: SearchKind.EVENT,
+    Elective: SearchKind.ELECTIVE,
+    Broadcast: SearchKind.BROADCAST,
+}
+
+_search_index = table("search_index", column("rowid"))
+
+_PG_TSVECTOR = (
+    "setweight(to_tsvector('russian', title), 'A') || "
+    "setweight(to_tsvector('russian', body), 'B')"
+)
+
+
+def stem_ru(word: str) -> str:
+    """Упрощённая основа русского слова (отсечение окончания)"""
+    word = word.lower().replace("ё", "е")
+    if not _CYRILLIC_RE.search(word):
+        return word
+    for length in _RU_ENDING_LENGTHS:
+        if len(word) - length >= 3 and word[-length:] in _RU_ENDINGS:
+            return word[:-length]
+    return word
+
+
+def _terms(value: str) -> list[str]:
+    return [
+        stem_ru(word)
+        for word in _WORD_RE.findall(value)
+        if word.lower() not in _RU_STOP_WORDS
+    ]
+
+
+def _normalize(value: Optional[str], *, stem: bool) -> str:
+    if not value:
+        return ""
+    if not stem:
+        return value
+    return " ".join(_terms(value))
+
+
+def _topics_text(topics: Optional[str]) -> str:
+    if not topics:
+        return ""
+    try:
+        items = json.loads(topics)
+    except ValueError:
+        return topics
+    return " ".join(str(item) for item in items) if isinstance(items, list) else topics
+
+
+def _document_values(obj, *, stem: bool) -> dict:
+    if isinstance(obj, Event):
+        title = obj.title
+        body = " ".join(filter(None, (obj.description, obj.speaker_name, _topics_text(obj.topics))))
+    elif isinstance(obj, Elective):
+        title, body = obj.title, obj.description
+    else:
+        title, body = obj.title, obj.message
+    return {
+        "kind": _KIND_BY_MODEL[type(obj)].value,
+        "entity_id": str(obj.id),
+        "title": _normalize(title, stem=stem),
+        "body": _normalize(body, stem=stem),
+    }
+
+
+def _stems(dialect_name: str) -> bool:
+    return dialect_name == "sqlite"
+
+
+def ensure_search_index(engine: Engine) -> None:
+    """Создать индекс поиска для текущей СУБД (таблица search_documents уже создана)"""
+    with engine.begin() as conn:
+        if conn.dialect.name == "sqlite":
+            conn.execute(text(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5("
+                "title, body, content='search_documents', content_rowid='id', "
+                "tokenize='unicode61 remove_diacritics 2')"
+            ))
+            conn.execute(text(
+                "CREATE TRIGGER IF NOT EXISTS search_documents_ai AFTER INSERT ON search_documents BEGIN "
+                "INSERT INTO search_index(rowid, title, body) VALUES (new.id, new.title, new.body); END"
+            ))
+            conn.execute(text(
+                "CREATE TRIGGER IF NOT EXISTS search_documents_ad AFTER DELETE ON search_documents BEGIN "
+                "INSERT INTO search_index(search_index, rowid, title, body) "
+                "VALUES ('delete', old.id, old.title, old.body); END"
+            ))
+            conn.execute(text(
+                "CREATE TRIGGER IF NOT EXISTS search_documents_au AFTER UPDATE ON search_documents BEGIN "
+                "INSERT INTO search_index(search_index, rowid, title, body) "
+                "VALUES ('delete', old.id, old.title, old.body); "
+                "INSERT INTO search_index(rowid, title, body) VALUES (new.id, new.title, new.body); END"
+            ))
+        elif conn.dialect.name == "postgresql":
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_search_documents_tsv ON search_documents USING GIN ("
+                f"({_PG_TSVECTOR}))"
+            ))
+
+
+def drop_search_index(engine: Engine) -> None:
+    """Удалить индекс поиска (перед пересозданием таблиц: drop_all не знает о FTS5-таблице)"""
+    with engine.begin() as conn:
+        if conn.dialect.name == "sqlite":
+            conn.execute(text("DROP TABLE IF EXISTS search_index"))
+
+
+def _replace_documents(conn: Connection, kind: str, rows: Sequence[dict], removed_ids: Iterable[str] = ()) -> None:
+    entity_ids = [row["entity_id"] for row in rows] + list(removed_ids)
+    if entity_ids:
+        conn.execute(
+            delete(SearchDocument).where(
+                and_(SearchDocument.kind == kind, SearchDocument.entity_id.in_(entity_ids))
+            )
+        )
+    if rows:
+        conn.execute(insert(SearchDocument), list(rows))
+
+
+def rebuild_search_index(db: Session) -> int:
+    """Перестроить индекс поиска целиком; возвращает число документов"""
+    conn = db.connection()
+    stem = _stems(conn.dialect.name)
+    conn.execute(delete(SearchDocument))
+    if conn.dialect.name == "sqlite":
+        # Индекс мог разойтись с search_documents (например, таблицу пересоздали,
+        # а FTS5-индекс остался): без очистки старые термы укажут на новые строки
+        conn.execute(text("INSERT INTO search_index(search_index) VALUES ('delete-all')"))
+    total = 0
+    for model in _INDEXED_FIELDS:
+        rows: list[dict] = []
+        for obj in db.query(model).yield_per(REBUILD_CHUNK_SIZE):
+            rows.append(_document_values(obj, stem=stem))
+            if len(rows) >= REBUILD_CHUNK_SIZE:
+                conn.execute(insert(SearchDocument), rows)
+                total += len(rows)
+                rows = []
+        if rows:
+            conn.execute(insert(SearchDocument), rows)
+            total += len(rows)
+    db.commit()
+    return total
+
+
+def sync_search_index(db: Session) -> bool:
+    """Перестроить индекс, если он расходится с данными (например, после массовой загрузки)"""
+    expected = sum(db.query(func.count(model.id)).scalar() for model in _INDEXED_FIELDS)
+    indexed = db.query(func.count(SearchDocument.id)).scalar()
+    if expected == indexed:
+        return False
+    rebuild_search_index(db)
+    return True
+
+
+@register_job("search.sync_index", on_startup=True)
+def sync_search_index_job(db: Session, payload: dict) -> dict:
+    """Фоновая задача после старта: сверка индекса поиска (один воркер, а не каждый при импорте)"""
+    return {"rebuilt": sync_search_index(db)}
+
+
+def _match_query(query: str, *, stem: bool) -> Optional[str]:
+    if not stem:
+        return query if _WORD_RE.search(query) else None
+    terms = _terms(query)
+    if not terms:
+        return None
+    # Каждый терм — префикс основы, термы объединяются по И
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def _visibility_filter(db: Session, user: Optional[User]):
+    """Рассылки видны только адресатам и авторам, элективы — только активные"""
+    active_electives = or_(
+        SearchDocument.kind != SearchKind.ELECTIVE.value,
+        SearchDocument.entity_id.in_(select(Elective.id).where(Elective.is_active == 1)),
+    )
+
+    broadcast_ids = None
+    if user is not None and user.role == UserRole.STUDENT:
+        group = (
+            db.query(StudentGroup)
+            .join(Student, Student.group_id == StudentGroup.id)
+            .filter(Student.user_id == user.id)
+            .first()
+        )
+        if group:
+            broadcast_ids = select(Broadcast.id).where(
+                or_(Broadcast.group_id == group.id, Broadcast.faculty_id == group.faculty_id)
+            )
+    elif user is not None and user.role in (UserRole.STAFF, UserRole.ADMIN):
+        broadcast_ids = select(Broadcast.id).where(Broadcast.author_user_id == user.id)
+
+    if broadcast_ids is None:
+        visible_broadcasts = SearchDocument.kind != SearchKind.BROADCAST.value
+    else:
+        visible_broadcasts = or_(
+            SearchDocument.kind != SearchKind.BROADCAST.value,
+            SearchDocument.entity_id.in_(broadcast_ids),
+        )
+    return and_(active_electives, visible_broadcasts)
+
+
+def search(
+    db: Session,
+    *,
+    query: str,
+    user: Optional[User] = None,
+    kinds: Optional[Sequence[SearchKind]] = None,
+    limit: int = 20,
+    offset: int = 0,
+) -> list[tuple[SearchKind, uuid.UUID, float]]:
+    """Найти сущности по запросу: [(тип, id, релевантность)], лучшие первыми"""
+    dialect = db.get_bind().dialect.name
+    match = _match_query(query, stem=_stems(dialect))
+    if not match:
+        return []
+
+    if dialect == "sqlite":
+        # bm25 тем меньше, чем документ релевантнее
+        rank = func.bm25(literal_column("search_index"), TITLE_WEIGHT, BODY_WEIGHT)
+        stmt = (
+            select(SearchDocument.kind, SearchDocument.entity_id, rank.label("rank"))
+            .select_from(_search_index.join(SearchDocument, SearchDocument.id == _search_index.c.rowid))
+            .where(literal_column("search_index").op("MATCH")(match))
+            .order_by(rank)
+        )
+    else:
+        tsvector = literal_column(f"({_PG_TSVECTOR})")
+        tsquery = func.plainto_tsquery("russian", match)
+        rank = func.ts_rank_cd(tsvector, tsquery)
+        stmt = (
+            select(SearchDocument.kind, SearchDocument.entity_id, rank.label("rank"))
+            .where(tsvector.op("@@")(tsquery))
+            .order_by(rank.desc())
+        )
+
+    if kinds:
+        stmt = stmt.where(SearchDocument.kind.in_([kind.value for kind in kinds]))
+    stmt = stmt.where(_visibility_filter(db, user)).limit(limit).offset(offset)
+
+    return [
+        (SearchKind(kind), uuid.UUID(entity_id), abs(float(score)))
+        for kind, entity_id, score in db.execute(stmt)
+    ]
+
+
+@event.listens_for(Session, "after_flush")
+def _index_on_flush(session: Session, flush_context) -> None:
+    changed: dict[str, list] = {}
+    removed: dict[str, list[str]] = {}
+
+    for obj in (*session.new, *session.dirty):
+        fields = _INDEXED_FIELDS.get(type(obj))
+        if not fields:
+            continue
+        # Например, запись на мероприятие меняет только current_participants
+        if obj not in session.new and not any(
+            inspect(obj).attrs[name].history.has_changes() for name in fields
+        ):
+            continue
+        changed.setdefault(_KIND_BY_MODEL[type(obj)].value, []).append(obj)
+
+    for obj in session.deleted:
+        kind = _KIND_BY_MODEL.get(type(obj))
+        if kind:
+            removed.setdefault(kind.value, []).append(str(obj.id))
+
+    if not changed and not removed:
+        return
+
+    conn = session.connection()
+    stem = _stems(conn.dialect.name)
+    for kind in set(changed) | set(removed):
+        rows = [_document_values(obj, stem=stem) for obj in changed.get(kind, [])]
+        _replace_documents(conn, kind, rows, removed.get(kind, []))
+
@@ -1,30 +1,118 @@
+import hashlib
+import os
+import tempfile
 from dataclasses import dataclass
-from typing import Sequence
+from pathlib import Path
+from typing import BinaryIO, Sequence
 
 from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+class UploadTooLargeError(ValueError):
+    """Raised when an upload exceeds the configured size limit."""
+
+    def __init__(self, max_size: int) -> None:
+        super().__init__(f"Файл превышает допустимый размер {max_size // (1024 * 1024)} МБ")
+        self.max_size = max_size
 
 
 @dataclass(slots=True)
 class IncomingUpload:
     filename: str
-    content: bytes
+    path: Path
+    size: int
+    sha256: str
     content_type: str | None
 
-    @property
-    def size(self) -> int:
-        return len(self.content)
 
+def safe_filename(filename: str | None, default: str = "document") -> str:
+    """Strip client-supplied directories so the name cannot escape the target dir."""
+    name = Path(filename or "").name.strip()
+    if name in {"", ".", ".."}:
+        return default
+    return name
+
+
+async def stream_upload_to_dir(
+    file: UploadFile,
+    directory: Path,
+    *,
+    max_size: int,
+    filename: str | None = None,
+) -> IncomingUpload:
+    """
+    Stream an upload to ``directory`` chunk by chunk.
+
+    Size and sha256 are computed incrementally, the limit is enforced mid-stream,
+    disk I/O runs in the threadpool and the file appears under its final name
+    only after an atomic rename, so readers never see a partial file.
+    """
+    if file.size is not None and file.size > max_size:
+        raise UploadTooLargeError(max_size)
+
+    target_name = safe_filename(filename or file.filename)
+    await run_in_threadpool(directory.mkdir, parents=True, exist_ok=True)
+    tmp = await run_in_threadpool(
+        tempfile.NamedTemporaryFile, dir=directory, prefix=".upload-", delete=False
+    )
+    hasher = hashlib.sha256()
+    size = 0
+    try:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            size += len(chunk)
+            if size > max_size:
+                raise UploadTooLargeError(max_size)
+            await run_in_threadpool(_write_chunk, tmp, hasher, chunk)
+        await run_in_threadpool(_flush_and_close, tmp)
+        target = directory / target_name
+        await run_in_threadpool(os.replace, tmp.name, target)
+    except BaseException:
+        await run_in_threadpool(_discard, tmp)
+        raise
+    finally:
+        await file.close()
 
-async def gather_incoming_uploads(files: Sequence[UploadFile]) -> list[IncomingUpload]:
+    return IncomingUpload(
+        filename=target_name,
+        path=target,
+        size=size,
+        sha256=hasher.hexdigest(),
+        content_type=file.content_type,
+    )
+
+
+async def gather_incoming_uploads(
+    files: Sequence[UploadFile],
+    directory: Path,
+    *,
+    max_size: int,
+) -> list[IncomingUpload]:
+    """Stream several uploads one after another, keeping at most one chunk in memory."""
     uploads: list[IncomingUpload] = []
-    for file in files:
-        content = await file.read()
-        file.file.close()
-        uploads.append(
-            IncomingUpload(
-                filename=file.filename or "",
-                content=content,
-                content_type=file.content_type,
-            )
-        )
-    return uploads
\ No newline at end of file
+    try:
+        for file in files:
+            uploads.append(await stream_upload_to_dir(file, directory, max_size=max_size))
+    except BaseException:
+        for upload in uploads:
+            await run_in_threadpool(upload.path.unlink, missing_ok=True)
+        raise
+    return uploads
+
+
+def _write_chunk(tmp: BinaryIO, hasher, chunk: bytes) -> None:
+    hasher.update(chunk)
+    tmp.write(chunk)
+
+
+def _flush_and_close(tmp: BinaryIO) -> None:
+    tmp.flush()
+    os.fsync(tmp.fileno())
+    tmp.close()
+
+
+def _discard(tmp: BinaryIO) -> None:
+    tmp.close()
+    Path(tmp.name).unlink(missing_ok=True)
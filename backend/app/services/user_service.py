@@ -1,4 +1,4 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import and_
 import uuid
 import re
@@ -9,6 +9,9 @@ from app.models.teacher import Teacher
 from app.models.staff import Staff
 from app.schemas.user import UserCreate, UserVerificationRequest, UserVerificationResponse
 
+# Номер курса в начале названия группы (например, "204" -> 2 курс)
+_GROUP_NUMBER_RE = re.compile(r'(\d+)')
+
 
 def get_user_by_id(db: Session, user_id: uuid.UUID) -> User | None:
     return db.query(User).filter(User.id == user_id).first()
@@ -136,8 +139,24 @@ def verify_user(db: Session, *, request: UserVerificationRequest) -> UserVerific
 
 
 def get_user_profile(db: Session, user_id: uuid.UUID) -> dict:
-    """Получить данные личного кабинета пользователя"""
-    user = db.get(User, user_id)
+    """
+    Получить данные личного кабинета пользователя
+
+    Пользователь и все связанные сущности загружаются одним запросом.
+    Готовый ответ кэшируется в эндпоинте (см. response_cache, profile_validator).
+    """
+    user = (
+        db.query(User)
+        .options(
+            joinedload(User.university),
+            joinedload(User.student).joinedload(Student.faculty),
+            joinedload(User.student).joinedload(Student.group),
+            joinedload(User.teacher).joinedload(Teacher.kafedra),
+            joinedload(User.staff),
+        )
+        .filter(User.id == user_id)
+        .one_or_none()
+    )
     if not user:
         raise ValueError("Пользователь не найден")
     
@@ -164,7 +183,7 @@ def get_user_profile(db: Session, user_id: uuid.UUID) -> dict:
             course = "Не указан"
             if student.group and student.group.name:
                 # Пытаемся найти цифру в начале названия группы
-                match = re.match(r'(\d+)', student.group.name)
+                match = _GROUP_NUMBER_RE.match(student.group.name)
                 if match:
                     group_num = int(match.group(1))
                     # Предполагаем, что номер группы содержит курс (например, 204 = 2 курс)
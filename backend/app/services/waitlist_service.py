@@ -0,0 +1,183 @@
+"""
+Листы ожидания мероприятий и элективов
+
+Когда мест нет, пользователь один раз встаёт в очередь вместо повторных
+попыток записи; повторная постановка возвращает текущее место. Как только
+место освобождается (отписка, увеличение вместимости), event_service и
+elective_service в той же транзакции записывают первых из очереди
+(pop_waitlist), а уведомление повышенным уходит пачками /notify/bulk из
+фоновой задачи waitlist.notify_promoted.
+
+Место в очереди — O(1): абсолютная позиция записи минус число записей,
+ушедших из головы очереди (Waitlist.offset). Продвижение очереди меняет
+только счётчик; выход из середины сдвигает позиции стоящих позади одним
+UPDATE. Счётчики меняются через UPDATE ... RETURNING, который берёт
+блокировку строки, поэтому параллельные запросы не получат одну позицию.
+
+Функции модуля не фиксируют транзакцию — это делает вызывающий сервис.
+"""
+import logging
+from typing import Optional
+import uuid
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.jobs import enqueue_job, register_job
+from app.models.elective import Elective
+from app.models.event import Event
+from app.models.user import User
+from app.models.waitlist import Waitlist, WaitlistEntry, WaitlistKind
+from app.services import bot_notify_service
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_BATCH_SIZE = 500
+
+
+def _lock_counters(db: Session, kind: WaitlistKind, target_id: uuid.UUID, *, size_delta: int = 0) -> Optional[tuple[int, int]]:
+    """Заблокировать строку счётчиков (и изменить size); вернуть (offset, size) после изменения"""
+    return db.execute(
+        update(Waitlist)
+        .where(Waitlist.kind == kind, Waitlist.target_id == target_id)
+        .values(size=Waitlist.size + size_delta)
+        .returning(Waitlist.offset, Waitlist.size)
+    ).one_or_none()
+
+
+def _ensure_counters(db: Session, kind: WaitlistKind, target_id: uuid.UUID) -> None:
+    if db.get(Waitlist, (kind, target_id)) is not None:
+        return
+    try:
+        with db.begin_nested():
+            db.add(Waitlist(kind=kind, target_id=target_id, offset=0, size=0))
+    except IntegrityError:
+        pass  # строку создал параллельный запрос
+
+
+def get_waitlist_entry(db: Session, *, kind: WaitlistKind, target_id: uuid.UUID, user_id: uuid.UUID) -> Optional[WaitlistEntry]:
+    return db.execute(
+        select(WaitlistEntry).where(
+            WaitlistEntry.kind == kind,
+            WaitlistEntry.target_id == target_id,
+            WaitlistEntry.user_id == user_id,
+        )
+    ).scalar_one_or_none()
+
+
+def get_waitlist_position(db: Session, *, kind: WaitlistKind, target_id: uuid.UUID, user_id: uuid.UUID) -> Optional[int]:
+    """Место пользователя в очереди (1 — следующий), None — не в очереди"""
+    row = db.execute(
+        select(WaitlistEntry.position - Waitlist.offset)
+        .join(Waitlist, (Waitlist.kind == WaitlistEntry.kind) & (Waitlist.target_id == WaitlistEntry.target_id))
+        .where(
+            WaitlistEntry.kind == kind,
+            WaitlistEntry.target_id == target_id,
+            WaitlistEntry.user_id == user_id,
+        )
+    ).one_or_none()
+    return row[0] if row else None
+
+
+def get_waitlist_size(db: Session, *, kind: WaitlistKind, target_id: uuid.UUID) -> int:
+    counters = db.get(Waitlist, (kind, target_id))
+    return counters.size if counters else 0
+
+
+def add_to_waitlist(db: Session, *, kind: WaitlistKind, target_id: uuid.UUID, user_id: uuid.UUID) -> int:
+    """Поставить пользователя в конец очереди; если он уже в ней — вернуть текущее место"""
+    position = get_waitlist_position(db, kind=kind, target_id=target_id, user_id=user_id)
+    if position is not None:
+        return position
+    _ensure_counters(db, kind, target_id)
+    offset, size = _lock_counters(db, kind, target_id, size_delta=1)
+    db.add(WaitlistEntry(kind=kind, target_id=target_id, user_id=user_id, position=offset + size))
+    db.flush()
+    return size
+
+
+def remove_from_waitlist(db: Session, *, kind: WaitlistKind, target_id: uuid.UUID, user_id: uuid.UUID) -> bool:
+    """Убрать пользователя из очереди; стоящие позади продвигаются на одно место"""
+    if _lock_counters(db, kind, target_id) is None:
+        return False
+    entry = get_waitlist_entry(db, kind=kind, target_id=target_id, user_id=user_id)
+    if entry is None:
+        return False
+    position = entry.position
+    db.delete(entry)
+    db.flush()
+    db.execute(
+        update(WaitlistEntry)
+        .where(WaitlistEntry.kind == kind, WaitlistEntry.target_id == target_id, WaitlistEntry.position > position)
+        .values(position=WaitlistEntry.position - 1)
+        .execution_options(synchronize_session=False)
+    )
+    _lock_counters(db, kind, target_id, size_delta=-1)
+    return True
+
+
+def pop_waitlist(db: Session, *, kind: WaitlistKind, target_id: uuid.UUID, count: int) -> list[uuid.UUID]:
+    """
+    Забрать до count первых из очереди и поставить задачу их уведомить
+
+    Возвращает ID пользователей по порядку очереди; записать их должен вызывающий.
+    """
+    if count <= 0:
+        return []
+    counters = _lock_counters(db, kind, target_id)
+    if counters is None or counters[1] == 0:
+        return []
+    offset, size = counters
+    taken = min(count, size)
+    head = (
+        WaitlistEntry.kind == kind,
+        WaitlistEntry.target_id == target_id,
+        WaitlistEntry.position > offset,
+        WaitlistEntry.position <= offset + taken,
+    )
+    user_ids = list(db.execute(select(WaitlistEntry.user_id).where(*head).order_by(WaitlistEntry.position)).scalars())
+    db.execute(delete(WaitlistEntry).where(*head).execution_options(synchronize_session=False))
+    db.execute(
+        update(Waitlist)
+        .where(Waitlist.kind == kind, Waitlist.target_id == target_id)
+        .values(offset=Waitlist.offset + taken, size=Waitlist.size - taken)
+    )
+    enqueue_job(
+        db,
+        "waitlist.notify_promoted",
+        {"kind": kind.value, "target_id": str(target_id), "user_ids": [str(user_id) for user_id in user_ids]},
+    )
+    return user_ids
+
+
+def _promotion_text(db: Session, kind: WaitlistKind, target_id: uuid.UUID) -> Optional[str]:
+    if kind == WaitlistKind.EVENT:
+        target = db.get(Event, target_id)
+        what = "мероприятие"
+    else:
+        target = db.get(Elective, target_id)
+        what = "электив"
+    if target is None:
+        return None
+    return f"🎉 Освободилось место — вы записаны на {what} «{(target.title or '').strip()}» из листа ожидания"
+
+
+@register_job("waitlist.notify_promoted")
+def notify_promoted(db: Session, payload: dict) -> dict:
+    """Фоновая задача: сообщить записанным из листа ожидания"""
+    kind = WaitlistKind(payload["kind"])
+    text = _promotion_text(db, kind, uuid.UUID(payload["target_id"]))
+    user_ids = [uuid.UUID(value) for value in payload.get("user_ids", [])]
+    if text is None or not user_ids:
+        return {"recipients": 0}
+    max_ids = list(db.execute(
+        select(User.max_id).where(User.id.in_(user_ids), User.max_id.is_not(None))
+    ).scalars())
+    delivered = 0
+    for start in range(0, len(max_ids), NOTIFY_BATCH_SIZE):
+        delivered += bot_notify_service.notify_bulk(
+            settings.bot_default_sender_max_id, max_ids[start:start + NOTIFY_BATCH_SIZE], text
+        )
+    return {"recipients": delivered}
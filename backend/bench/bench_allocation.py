@@ -0,0 +1,138 @@
+"""
+Бенчмарк пакетного распределения по элективам (elective_allocation_service)
+
+Создаёт временную SQLite-базу со студентами, элективами и ранжированными
+списками приоритетов: популярность элективов распределена по Ципфу (на
+популярные курсы претендентов намного больше, чем мест), суммарная
+вместимость — --capacity-ratio от числа студентов. Затем один раз
+запускает allocate_electives и замеряет фазы загрузки, решения и записи.
+
+Результат — JSON (stdout или --output): время фаз, сколько студентов
+получили электив и с каким номером в списке.
+
+Запуск: python bench/bench_allocation.py --students 20000 --electives 200 --output allocation.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+import uuid
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_endpoints import _git_revision  # noqa: E402
+
+
+def _seed(db, args: argparse.Namespace) -> None:
+    from sqlalchemy import insert
+
+    from app.models.elective import Elective, ElectivePreference
+    from app.models.user import User, UserRole
+
+    rng = random.Random(args.seed)
+    teacher_id = uuid.uuid4()
+    student_ids = [uuid.uuid4() for _ in range(args.students)]
+    db.execute(insert(User), [
+        {"id": teacher_id, "role": UserRole.STAFF, "full_name": "Преподаватель", "city": "Москва"},
+        *(
+            {"id": user_id, "role": UserRole.STUDENT, "full_name": f"Студент {i}", "city": "Москва"}
+            for i, user_id in enumerate(student_ids)
+        ),
+    ])
+
+    elective_ids = [uuid.uuid4() for _ in range(args.electives)]
+    seats = max(args.electives, round(args.students * args.capacity_ratio))
+    db.execute(insert(Elective), [
+        {
+            "id": elective_id,
+            "title": f"Электив {i}",
+            "teacher_user_id": teacher_id,
+            "max_students": seats // args.electives + (1 if i < seats % args.electives else 0),
+            "current_students": 0,
+            "is_active": 1,
+        }
+        for i, elective_id in enumerate(elective_ids)
+    ])
+
+    weights = [1 / (i + 1) ** args.zipf for i in range(args.electives)]
+    rows = []
+    for user_id in student_ids:
+        chosen: list[uuid.UUID] = []
+        while len(chosen) < min(args.choices, args.electives):
+            elective_id = rng.choices(elective_ids, weights)[0]
+            if elective_id not in chosen:
+                chosen.append(elective_id)
+        rows.extend(
+            {"user_id": user_id, "elective_id": elective_id, "rank": rank}
+            for rank, elective_id in enumerate(chosen, start=1)
+        )
+    db.execute(insert(ElectivePreference), rows)
+    db.commit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=20000, help="Студентов со списками приоритетов")
+    parser.add_argument("--electives", type=int, default=200, help="Активных элективов")
+    parser.add_argument("--choices", type=int, default=5, help="Элективов в списке каждого студента")
+    parser.add_argument("--capacity-ratio", type=float, default=1.1, help="Суммарная вместимость / число студентов")
+    parser.add_argument("--zipf", type=float, default=1.0, help="Показатель Ципфа для популярности элективов")
+    parser.add_argument("--seed", type=int, default=42, help="Зерно генератора данных и жребия")
+    parser.add_argument("--output", type=Path, default=None, help="Куда записать JSON (по умолчанию stdout)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{tmp}/bench.db"
+        os.environ["STATIC_ROOT"] = f"{tmp}/static"
+
+        from sqlalchemy import func, select
+
+        from app.db.base import Base
+        from app.db.session import SessionLocal, engine
+        from app.models.elective import ElectiveRegistration
+        from app.services.elective_allocation_service import allocate_electives
+
+        Base.metadata.create_all(bind=engine)
+        with SessionLocal() as db:
+            started = time.perf_counter()
+            _seed(db, args)
+            seed_seconds = time.perf_counter() - started
+
+            started = time.perf_counter()
+            result = allocate_electives(db, seed=args.seed)
+            total_seconds = time.perf_counter() - started
+            registrations = db.execute(select(func.count()).select_from(ElectiveRegistration)).scalar_one()
+
+    report = {
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "dataset": {
+            "seed": args.seed,
+            "students": args.students,
+            "electives": args.electives,
+            "choices": args.choices,
+            "capacity_ratio": args.capacity_ratio,
+            "zipf": args.zipf,
+            "seed_seconds": round(seed_seconds, 1),
+        },
+        "total_seconds": round(total_seconds, 3),
+        "registrations": registrations,
+        "allocation": result.as_dict(),
+    }
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        args.output.write_text(output + "\n", encoding="utf-8")
+        print(f"Результаты записаны в {args.output}")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
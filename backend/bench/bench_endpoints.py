@@ -0,0 +1,233 @@
+"""
+Бенчмарк горячих эндпоинтов API на синтетической базе масштаба университета
+
+Создаёт временную SQLite-базу генератором seed_bulk.py (параметры и зерно
+фиксированы, поэтому данные воспроизводимы), поднимает приложение в
+процессе (TestClient, без сети) и для каждого эндпоинта замеряет:
+- задержку — min/p50/p95/p99/max, мс;
+- число SQL-запросов на один вызов;
+- пропускную способность — запросов в секунду при --threads клиентах.
+
+Результат — JSON (stdout или --output), его удобно сравнивать между
+коммитами; --baseline добавляет к каждому эндпоинту изменение p50 и числа
+запросов относительно прежнего файла.
+
+Запуск: python bench/bench_endpoints.py --students 20000 --repeat 100 --output bench.json
+"""
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+
+def _percentile(values: list[float], share: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(share * len(ordered)) - 1))
+    return ordered[index]
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _seed(args: argparse.Namespace, env: dict) -> float:
+    started = time.perf_counter()
+    subprocess.run(
+        [
+            sys.executable, str(BACKEND_DIR / "seed_bulk.py"),
+            "--seed", str(args.seed),
+            "--students", str(args.students),
+            "--teachers", str(max(1, args.students // 40)),
+            "--events", str(args.events),
+            "--registrations", str(args.students * 3),
+            "--payments", str(args.students * 2),
+            "--requests", str(args.students // 2),
+        ],
+        env=env, check=True, stdout=subprocess.DEVNULL,
+    )
+    return time.perf_counter() - started
+
+
+def _measure(
+    name: str,
+    call: Callable[[int], Any],
+    *,
+    repeat: int,
+    warmup: int,
+    threads: int,
+) -> dict:
+    """call(i) выполняет i-й запрос и возвращает ответ"""
+    from app.core.query_stats import query_budget
+
+    for i in range(warmup):
+        call(i)
+
+    timings, statements = [], []
+    for i in range(warmup, warmup + repeat):
+        with query_budget() as captured:
+            started = time.perf_counter()
+            response = call(i)
+            timings.append((time.perf_counter() - started) * 1000)
+        statements.append(captured.count)
+        if response.status_code >= 400:
+            raise RuntimeError(f"{name}: HTTP {response.status_code} {response.text[:200]}")
+
+    offset = warmup + repeat
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(call, range(offset, offset + repeat)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "endpoint": name,
+        "requests": repeat,
+        "min_ms": round(min(timings), 3),
+        "p50_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(_percentile(timings, 0.95), 3),
+        "p99_ms": round(_percentile(timings, 0.99), 3),
+        "max_ms": round(max(timings), 3),
+        "sql_statements": round(statistics.median(statements)),
+        "sql_statements_max": max(statements),
+        "throughput_rps": round(repeat / elapsed, 1),
+    }
+
+
+def _compare(results: list[dict], baseline_path: Path) -> None:
+    baseline = {row["endpoint"]: row for row in json.loads(baseline_path.read_text())["results"]}
+    for row in results:
+        previous = baseline.get(row["endpoint"])
+        if previous is None:
+            continue
+        row["baseline"] = {
+            "p50_ms": previous["p50_ms"],
+            "p50_change_pct": round((row["p50_ms"] / previous["p50_ms"] - 1) * 100, 1) if previous["p50_ms"] else None,
+            "sql_statements": previous["sql_statements"],
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=20000, help="Студентов в синтетической базе")
+    parser.add_argument("--events", type=int, default=2000, help="Мероприятий в синтетической базе")
+    parser.add_argument("--seed", type=int, default=42, help="Зерно генератора данных")
+    parser.add_argument("--repeat", type=int, default=100, help="Запросов на каждый эндпоинт")
+    parser.add_argument("--warmup", type=int, default=5, help="Прогревочных запросов (не учитываются)")
+    parser.add_argument("--threads", type=int, default=4, help="Параллельных клиентов при замере пропускной способности")
+    parser.add_argument("--output", type=Path, default=None, help="Куда записать JSON (по умолчанию stdout)")
+    parser.add_argument("--baseline", type=Path, default=None, help="Прежний JSON для сравнения")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{tmp}/bench.db"
+        os.environ["STATIC_ROOT"] = f"{tmp}/static"
+        seed_seconds = _seed(args, dict(os.environ))
+
+        from fastapi.testclient import TestClient
+        from sqlalchemy import func, select, update
+
+        from app.core.security import create_access_token
+        from app.db.base import Base  # noqa: F401
+        from app.db.session import SessionLocal
+        from app.main import app
+        from app.models.event import Event, EventRegistration, EventType
+        from app.models.request import Request, RequestStatus
+        from app.models.student import Student
+        from app.models.user import User
+
+        with SessionLocal() as db:
+            # Куратор с наибольшим числом заявок на согласовании
+            curator_id, approvals = db.execute(
+                select(Request.current_approver_id, func.count())
+                .where(Request.status == RequestStatus.PENDING)
+                .group_by(Request.current_approver_id)
+                .order_by(func.count().desc())
+                .limit(1)
+            ).one()
+            student = db.execute(select(User).join(Student, Student.user_id == User.id).limit(1)).scalar_one()
+            group_id = db.get(Student, student.id).group_id
+            # Вместимое бесплатное мероприятие: на него записываются разные студенты
+            event_id = db.execute(
+                select(Event.id).where(Event.event_type == EventType.FREE, Event.date >= func.now()).limit(1)
+            ).scalar_one()
+            db.execute(update(Event).where(Event.id == event_id).values(max_participants=10 ** 9))
+            registrants = db.execute(
+                select(User.id)
+                .join(Student, Student.user_id == User.id)
+                .where(
+                    User.id != student.id,
+                    User.id.notin_(select(EventRegistration.user_id).where(EventRegistration.event_id == event_id)),
+                )
+                .order_by(User.id)
+                .limit(3 * (args.warmup + args.repeat))
+            ).scalars().all()
+            db.commit()
+            student_id, student_max_id = student.id, student.max_id
+
+        def auth(user_id) -> dict:
+            return {"Authorization": f"Bearer {create_access_token(subject=str(user_id))}"}
+
+        student_headers, curator_headers = auth(student_id), auth(curator_id)
+        registrant_headers = [auth(user_id) for user_id in registrants]
+
+        with TestClient(app) as client:
+            endpoints: list[tuple[str, Callable[[int], Any]]] = [
+                ("GET /schedule", lambda i: client.get("/api/v1/schedule", params={"group_id": str(group_id)})),
+                ("GET /events", lambda i: client.get("/api/v1/events", headers=student_headers)),
+                ("GET /broadcasts", lambda i: client.get("/api/v1/broadcasts", headers=student_headers)),
+                ("GET /requests/approval", lambda i: client.get("/api/v1/requests/approval", headers=curator_headers)),
+                ("GET /payments/status", lambda i: client.get("/api/v1/payments/status", params={"user_id": student_max_id})),
+                ("GET /users/profile", lambda i: client.get("/api/v1/users/profile", headers=student_headers)),
+                (
+                    "POST /events/{id}/register",
+                    lambda i: client.post(f"/api/v1/events/{event_id}/register", headers=registrant_headers[i]),
+                ),
+            ]
+            results = [
+                _measure(name, call, repeat=args.repeat, warmup=args.warmup, threads=args.threads)
+                for name, call in endpoints
+            ]
+
+    if args.baseline:
+        _compare(results, args.baseline)
+
+    report = {
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "dataset": {
+            "seed": args.seed,
+            "students": args.students,
+            "events": args.events,
+            "seed_seconds": round(seed_seconds, 1),
+            "curator_pending_approvals": approvals,
+        },
+        "repeat": args.repeat,
+        "threads": args.threads,
+        "results": results,
+    }
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        args.output.write_text(output + "\n", encoding="utf-8")
+        print(f"Результаты записаны в {args.output}")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Бенчмарк полнотекстового поиска
+
+Создаёт временную SQLite-базу с N синтетическими мероприятиями, строит
+индекс (search_service.rebuild_search_index) и замеряет время запросов
+search_service.search.
+
+Запуск: python bench/bench_search.py --documents 100000 --repeat 50
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+WORDS = (
+    "лекция семинар хакатон конференция мастер-класс встреча турнир олимпиада "
+    "машинное обучение программирование физика математика история экономика "
+    "стартап карьера волонтёрство спорт музыка театр кино дизайн робототехника "
+    "биология химия право психология журналистика маркетинг финансы экология"
+).split()
+
+QUERIES = ("хакатон", "машинному обучению", "конференции по экономике", "спорт", "робототехника дизайн")
+
+SYLLABLES = "ба ве го да же зи ко ла ми но пу ра со ту фе ха це чи ша эк юн ям".split()
+
+# Доля тематических слов в тексте; остальное — словарь псевдослов
+TOPIC_SHARE = 0.1
+
+
+def _vocabulary(rng: random.Random, size: int) -> list[str]:
+    return ["".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))) for _ in range(size)]
+
+
+def _text(rng: random.Random, vocabulary: list[str], words: int) -> str:
+    return " ".join(
+        rng.choice(WORDS) if rng.random() < TOPIC_SHARE else rng.choice(vocabulary)
+        for _ in range(words)
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=100_000, help="Количество мероприятий")
+    parser.add_argument("--repeat", type=int, default=50, help="Повторов каждого запроса")
+    parser.add_argument("--vocabulary", type=int, default=20_000, help="Размер словаря псевдослов")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{tmp}/bench.db"
+
+        from sqlalchemy import insert, text
+
+        from app.db.base import Base
+        from app.db.session import SessionLocal, engine
+        from app.models.event import Event, EventFormat, EventType
+        from app.services.search_service import _match_query, ensure_search_index, rebuild_search_index, search
+
+        Base.metadata.create_all(bind=engine)
+        ensure_search_index(engine)
+
+        rng = random.Random(42)
+        vocabulary = _vocabulary(rng, args.vocabulary)
+        start = datetime(2025, 1, 1)
+        rows = [
+            {
+                "id": f"00000000-0000-0000-0000-{i:012d}",
+                "title": _text(rng, vocabulary, 4),
+                "description": _text(rng, vocabulary, 30),
+                "date": start + timedelta(hours=i),
+                "event_type": EventType.FREE,
+                "format": EventFormat.OFFLINE,
+                "max_participants": 100,
+                "current_participants": 0,
+            }
+            for i in range(args.documents)
+        ]
+        with engine.begin() as conn:
+            conn.execute(insert(Event), rows)
+
+        with SessionLocal() as db:
+            started = time.perf_counter()
+            indexed = rebuild_search_index(db)
+            build_seconds = time.perf_counter() - started
+
+            results = []
+            for query in QUERIES:
+                timings = []
+                for _ in range(args.repeat):
+                    started = time.perf_counter()
+                    hits = search(db, query=query, limit=20)
+                    timings.append((time.perf_counter() - started) * 1000)
+                matches = db.execute(
+                    text("SELECT count(*) FROM search_index WHERE search_index MATCH :q"),
+                    {"q": _match_query(query, stem=True)},
+                ).scalar()
+                results.append({
+                    "query": query,
+                    "matches": matches,
+                    "hits": len(hits),
+                    "p50_ms": round(statistics.median(timings), 2),
+                    "max_ms": round(max(timings), 2),
+                })
+
+    print(json.dumps(
+        {"documents": indexed, "build_seconds": round(build_seconds, 2), "queries": results},
+        ensure_ascii=False,
+        indent=2,
+    ))
+
+
+if __name__ == "__main__":
+    main()
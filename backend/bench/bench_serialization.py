@@ -0,0 +1,195 @@
+"""
+Микробенчмарк сериализации ответов API
+
+Для типичных ответов (лента из 100 мероприятий, неделя расписания из 200
+пар, 50 рассылок, меню администратора) замеряет перевод данных в байты:
+- json — как FastAPI по умолчанию: dump_python(mode="json") + json.dumps;
+- orjson — dump_python(mode="json") + orjson (ORJSONResponse приложения);
+- dump_json — сериализация pydantic сразу в байты (response_cache).
+
+Отдельно замеряет сборку схем рассылок: прежняя двойная валидация
+(model_validate().model_dump() и BroadcastRead(**payload)) против одной.
+БД не нужна — данные синтетические.
+
+Запуск: python bench/bench_serialization.py --repeat 200
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import date, datetime, time as dt_time, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import orjson  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+
+from app.core.responses import ORJSON_OPTIONS  # noqa: E402
+from app.models.event import EventFormat, EventType  # noqa: E402
+from app.models.user import UserRole  # noqa: E402
+from app.schemas.broadcast import BroadcastRead  # noqa: E402
+from app.schemas.event import EventRead  # noqa: E402
+from app.schemas.menu import MenuResponse  # noqa: E402
+from app.schemas.schedule import LessonRead  # noqa: E402
+from app.services.menu_service import get_menu_for_role  # noqa: E402
+
+WORDS = "лекция семинар хакатон конференция встреча турнир олимпиада карьера спорт дизайн".split()
+
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def _events(rng: random.Random, count: int) -> List[EventRead]:
+    start = datetime(2025, 9, 1, 10, 0)
+    return [
+        EventRead(
+            id=uuid.uuid4(),
+            title=_text(rng, 4),
+            description=_text(rng, 60),
+            date=start + timedelta(days=i),
+            end_time=start + timedelta(days=i, hours=2),
+            event_type=EventType.PAID if i % 3 else EventType.FREE,
+            price=150000 if i % 3 else None,
+            format=EventFormat.OFFLINE,
+            location="Главный корпус, ауд. 101",
+            max_participants=100,
+            current_participants=rng.randint(0, 100),
+            image_url=f"/static/events/{i}.jpg",
+            image_srcset={320: f"/static/events/{i}-320w.webp", 640: f"/static/events/{i}-640w.webp"},
+            speaker_name="Иванов Иван Иванович",
+            speaker_bio=_text(rng, 20),
+            topics=rng.sample(WORDS, 3),
+            created_at=start,
+            updated_at=start,
+            is_registered=bool(i % 2),
+        )
+        for i in range(count)
+    ]
+
+
+def _lessons(rng: random.Random, count: int) -> List[LessonRead]:
+    return [
+        LessonRead(
+            id=uuid.uuid4(),
+            teacher="Петров Пётр Петрович",
+            room=f"ауд {rng.randint(1, 500)}",
+            subject=_text(rng, 3),
+            pair_no=i % 6 + 1,
+            groups=[f"ПИ {rng.randint(10, 40)}/{rng.randint(1, 3)}" for _ in range(rng.randint(1, 3))],
+            time="12:40 - 14:00",
+        )
+        for i in range(count)
+    ]
+
+
+def _broadcast_rows(rng: random.Random, count: int) -> list[SimpleNamespace]:
+    return [
+        SimpleNamespace(
+            id=uuid.uuid4(),
+            title=_text(rng, 5),
+            message=_text(rng, 80),
+            group_id=uuid.uuid4(),
+            faculty_id=None,
+            author_user_id=uuid.uuid4(),
+            created_at=datetime(2025, 9, 1) + timedelta(hours=i),
+            author=SimpleNamespace(full_name="Сидорова Анна Павловна"),
+            group=SimpleNamespace(name="ИВТ-21-01"),
+            faculty=None,
+        )
+        for i in range(count)
+    ]
+
+
+def _build_double(rows: list[SimpleNamespace]) -> List[BroadcastRead]:
+    result = []
+    for row in rows:
+        payload = BroadcastRead.model_validate(row).model_dump()
+        payload["author_full_name"] = row.author.full_name
+        payload["group_name"] = row.group.name
+        result.append(BroadcastRead(**payload))
+    return result
+
+
+def _build_single(rows: list[SimpleNamespace]) -> List[BroadcastRead]:
+    return [
+        BroadcastRead(
+            id=row.id,
+            title=row.title,
+            message=row.message,
+            group_id=row.group_id,
+            faculty_id=row.faculty_id,
+            author_user_id=row.author_user_id,
+            created_at=row.created_at,
+            author_full_name=row.author.full_name,
+            group_name=row.group.name,
+            faculty_name=None,
+        )
+        for row in rows
+    ]
+
+
+def _measure(fn: Callable[[], Any], repeat: int) -> float:
+    """Медиана времени вызова, мс"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return round(statistics.median(timings), 3)
+
+
+def _encoders(adapter: TypeAdapter, payload: Any) -> dict[str, Callable[[], bytes]]:
+    return {
+        "json": lambda: json.dumps(
+            adapter.dump_python(payload, mode="json"), ensure_ascii=False, separators=(",", ":")
+        ).encode(),
+        "orjson": lambda: orjson.dumps(adapter.dump_python(payload, mode="json"), option=ORJSON_OPTIONS),
+        "dump_json": lambda: adapter.dump_json(payload),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200, help="Повторов каждого замера")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    broadcast_rows = _broadcast_rows(rng, 50)
+    payloads = [
+        ("events_feed_100", TypeAdapter(List[EventRead]), _events(rng, 100)),
+        ("schedule_week_200", TypeAdapter(List[LessonRead]), _lessons(rng, 200)),
+        ("broadcasts_50", TypeAdapter(List[BroadcastRead]), _build_single(broadcast_rows)),
+        ("menu_admin", TypeAdapter(MenuResponse), get_menu_for_role(UserRole.ADMIN)),
+    ]
+
+    results = []
+    for name, adapter, payload in payloads:
+        encoders = _encoders(adapter, payload)
+        row = {"payload": name, "bytes": len(encoders["dump_json"]())}
+        for encoder, fn in encoders.items():
+            row[f"{encoder}_ms"] = _measure(fn, args.repeat)
+        row["orjson_speedup"] = round(row["json_ms"] / row["orjson_ms"], 2)
+        results.append(row)
+
+    construction = {
+        "broadcasts": len(broadcast_rows),
+        "double_validation_ms": _measure(lambda: _build_double(broadcast_rows), args.repeat),
+        "single_validation_ms": _measure(lambda: _build_single(broadcast_rows), args.repeat),
+    }
+
+    print(json.dumps(
+        {"repeat": args.repeat, "serialization": results, "construction": construction},
+        ensure_ascii=False,
+        indent=2,
+    ))
+
+
+if __name__ == "__main__":
+    main()
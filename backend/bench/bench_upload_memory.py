@@ -0,0 +1,90 @@
+"""
+Бенчмарк памяти при параллельной загрузке больших файлов
+
+Сравнивает пиковое потребление памяти (tracemalloc) двух способов сохранения
+UploadFile: прежнего (await file.read() + write_bytes) и потокового
+(upload_utils.stream_upload_to_dir). Входные файлы, как и в Starlette,
+лежат во временных файлах на диске, поэтому в пике учитывается только то,
+что выделяет код сохранения.
+
+Запуск: python bench/bench_upload_memory.py --uploads 8 --size-mb 50
+"""
+import argparse
+import asyncio
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi import UploadFile  # noqa: E402
+from starlette.datastructures import Headers  # noqa: E402
+
+from app.services.upload_utils import stream_upload_to_dir  # noqa: E402
+
+
+def _make_source(directory: Path, index: int, size: int) -> Path:
+    path = directory / f"source-{index}.bin"
+    block = bytes(range(256)) * 4096
+    with path.open("wb") as fh:
+        remaining = size
+        while remaining > 0:
+            chunk = block[: min(len(block), remaining)]
+            fh.write(chunk)
+            remaining -= len(chunk)
+    return path
+
+
+def _upload_file(path: Path) -> UploadFile:
+    return UploadFile(
+        file=path.open("rb"),
+        filename=path.name,
+        headers=Headers({"content-type": "application/octet-stream"}),
+    )
+
+
+async def _buffered(file: UploadFile, directory: Path) -> None:
+    content = await file.read()
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / file.filename).write_bytes(content)
+    await file.close()
+
+
+async def _streamed(file: UploadFile, directory: Path) -> None:
+    await stream_upload_to_dir(file, directory, max_size=1 << 40)
+
+
+async def _run(mode: str, sources: list[Path], target: Path) -> dict:
+    handler = _buffered if mode == "buffered" else _streamed
+    files = [_upload_file(path) for path in sources]
+    tracemalloc.start()
+    started = time.perf_counter()
+    await asyncio.gather(*(handler(file, target / f"{mode}-{i}") for i, file in enumerate(files)))
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"mode": mode, "peak_mb": round(peak / (1024 * 1024), 2), "seconds": round(elapsed, 3)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uploads", type=int, default=8, help="Количество параллельных загрузок")
+    parser.add_argument("--size-mb", type=int, default=50, help="Размер каждого файла, МБ")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        sources = [_make_source(root, i, args.size_mb * 1024 * 1024) for i in range(args.uploads)]
+        results = [
+            asyncio.run(_run(mode, sources, root / "out"))
+            for mode in ("buffered", "streamed")
+        ]
+
+    print(json.dumps({"uploads": args.uploads, "size_mb": args.size_mb, "results": results}, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Локальная заглушка эндпоинтов уведомлений чат-бота (/notify/*)
+
+Повторяет контракт max_bot/internal/httpserver: POST /notify/{max_id},
+/notify/bulk, /notify/ready/{max_id}, /notify/payment/tuition/{max_id}.
+Ничего не отправляет — только считает вызовы и получателей (fan-out) и
+отвечает с заданной задержкой и долей ошибок, чтобы нагрузочный тест
+видел поведение бэкенда при медленном боте.
+
+GET /stats — накопленная статистика, POST /stats/reset — обнулить её.
+
+Запуск: python bench/bot_stub.py --port 8080 --latency-ms 50 --error-rate 0.01
+(бэкенд: BOT_NOTIFY_BASE_URL=http://localhost:8080)
+"""
+import argparse
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import random
+import re
+import threading
+import time
+from typing import Optional
+
+_NOTIFY_RE = re.compile(r"^/notify/(?:(?P<kind>ready|payment/tuition)/)?(?P<max_id>\d+)$")
+# Те же имена, что у метки method метрик бэкенда (bot_notify_duration_seconds)
+_KINDS = {None: "user", "ready": "ready", "payment/tuition": "tuition"}
+
+
+class BotStub:
+    """HTTP-сервер заглушки в фоновом потоке"""
+
+    def __init__(
+        self,
+        *,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        token: str = "",
+        seed: Optional[int] = None,
+    ) -> None:
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.token = token
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.reset()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "BotStub":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="bot-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.calls: Counter = Counter()
+            self.errors: Counter = Counter()
+            self.recipients = 0
+            self.max_fanout = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "calls": dict(self.calls),
+                "errors": dict(self.errors),
+                "recipients": self.recipients,
+                "max_fanout": self.max_fanout,
+                "latency_ms": self.latency_ms,
+                "jitter_ms": self.jitter_ms,
+                "error_rate": self.error_rate,
+            }
+
+    def _record(self, kind: str, recipients: int, failed: bool) -> None:
+        with self._lock:
+            self.calls[kind] += 1
+            if failed:
+                self.errors[kind] += 1
+                return
+            self.recipients += recipients
+            self.max_fanout = max(self.max_fanout, recipients)
+
+    def _delay(self) -> tuple[float, bool]:
+        with self._lock:
+            delay = max(0.0, self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+            failed = self._rng.random() < self.error_rate
+        return delay, failed
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args) -> None:  # noqa: A002
+                pass
+
+            def _reply(self, status: int, payload: dict) -> None:
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _body(self) -> dict:
+                length = int(self.headers.get("Content-Length") or 0)
+                if not length:
+                    return {}
+                try:
+                    return json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    return {}
+
+            def do_GET(self) -> None:
+                if self.path == "/stats":
+                    self._reply(200, stub.stats())
+                elif self.path == "/healthz":
+                    self._reply(200, {"status": "ok"})
+                else:
+                    self._reply(404, {"error": "not found"})
+
+            def do_POST(self) -> None:
+                if self.path == "/stats/reset":
+                    stub.reset()
+                    self._reply(200, {"status": "ok"})
+                    return
+
+                payload = self._body()
+                if stub.token and self.headers.get("Authorization", "").strip() != f"Bearer {stub.token}":
+                    self._reply(401, {"error": "unauthorized"})
+                    return
+                if self.path == "/notify/bulk":
+                    kind, recipients = "bulk", len(set(payload.get("user_ids") or []))
+                else:
+                    match = _NOTIFY_RE.match(self.path)
+                    if not match:
+                        self._reply(404, {"error": "not found"})
+                        return
+                    kind, recipients = _KINDS[match.group("kind")], 1
+
+                delay, failed = stub._delay()
+                if delay:
+                    time.sleep(delay)
+                stub._record(kind, recipients, failed)
+                if failed:
+                    self._reply(502, {"error": "injected failure"})
+                elif kind == "bulk":
+                    self._reply(200, {"status": "ok", "delivered": recipients})
+                else:
+                    self._reply(200, {"status": "sent"})
+
+        return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Задержка ответа")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Разброс задержки (±)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Доля ответов 502")
+    parser.add_argument("--token", default="", help="Ожидаемый BOT_NOTIFY_TOKEN")
+    args = parser.parse_args()
+
+    stub = BotStub(
+        host=args.host,
+        port=args.port,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        token=args.token,
+    ).start()
+    print(f"Заглушка бота слушает {stub.url} (статистика: GET {stub.url}/stats)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        stub.stop()
+
+
+if __name__ == "__main__":
+    main()
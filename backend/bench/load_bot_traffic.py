@@ -0,0 +1,378 @@
+"""
+Нагрузочный тест: воспроизводит трафик чат-бота по сценариям пользователей
+
+Бот (max_bot/internal/backend) ходит в API короткими цепочками — это и есть
+сценарии (journeys):
+- schedule  — GET /schedule?max_id=
+- profile   — GET /auth/login-by-max-id, GET /users/profile
+- payments  — GET /payments/status?user_id=
+- request   — вход по max_id, POST /requests (справка об обучении)
+- broadcast — вход куратора, POST /broadcasts на его группу (рассылка через бота)
+- reminder  — вход администратора, POST /payments/tuition/remind/{max_id}
+
+Нагрузка открытая: сценарии стартуют пуассоновским потоком с заданной
+интенсивностью независимо от того, успевает ли сервер, поэтому очередь
+растёт так же, как в утренний всплеск перед первой парой. Интенсивность
+задаётся фазами --phases "60s@5,30s@80,60s@5" (длительность@сценариев в
+секунду), доли сценариев — --mix. Если в работе уже --max-concurrency
+сценариев, новый не запускается и считается пропущенным.
+
+Пользователи (max_id, роли, группы кураторов) читаются из базы приложения
+(DATABASE_URL). --students создаёт временную базу генератором seed_bulk.py;
+--spawn-backend поднимает uvicorn на этой базе, а --stub запускает
+заглушку /notify/* (bot_stub.py) и направляет в неё уведомления бэкенда.
+
+Отчёт — JSON: по каждому сценарию число запусков, ошибки и их доля,
+p50/p95/p99/max в мс и коды ответов; плюс задержки по отдельным запросам и
+статистика заглушки (вызовы и число получателей рассылок).
+
+Запуск: python bench/load_bot_traffic.py --students 20000 --spawn-backend --stub --phases "30s@5,20s@60,30s@5"
+"""
+import argparse
+import asyncio
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_endpoints import _git_revision, _percentile  # noqa: E402
+from bot_stub import BotStub  # noqa: E402
+
+JOURNEYS = ("schedule", "profile", "payments", "request", "broadcast", "reminder")
+DEFAULT_MIX = "schedule=40,profile=20,payments=20,request=10,broadcast=5,reminder=5"
+DEFAULT_PHASES = "30s@5,20s@50,30s@5"
+
+
+@dataclass
+class Users:
+    students: list[int]
+    curators: list[tuple[int, str]]  # (max_id куратора, id его группы)
+    admins: list[int]
+
+
+@dataclass
+class JourneyStats:
+    timings: list[float] = field(default_factory=list)
+    errors: int = 0
+    statuses: Counter = field(default_factory=Counter)
+
+
+class JourneyError(Exception):
+    def __init__(self, status: str) -> None:
+        super().__init__(status)
+        self.status = status
+
+
+def _parse_phases(value: str) -> list[tuple[float, float]]:
+    """'60s@5,30s@80' -> [(60.0, 5.0), (30.0, 80.0)]"""
+    phases = []
+    for part in value.split(","):
+        duration, _, rate = part.strip().partition("@")
+        if not rate:
+            raise argparse.ArgumentTypeError(f"Фаза без интенсивности: {part!r}")
+        duration = duration.strip()
+        seconds = float(duration[:-1]) * 60 if duration.endswith("m") else float(duration.rstrip("s"))
+        phases.append((seconds, float(rate)))
+    return phases
+
+
+def _parse_mix(value: str) -> dict[str, float]:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.strip().partition("=")
+        if name not in JOURNEYS:
+            raise argparse.ArgumentTypeError(f"Неизвестный сценарий: {name!r}")
+        mix[name] = float(weight or 1)
+    return {name: weight for name, weight in mix.items() if weight > 0}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _load_users(limit: int) -> Users:
+    from sqlalchemy import select
+
+    from app.db.base import Base  # noqa: F401
+    from app.db.session import SessionLocal
+    from app.models.student import Student
+    from app.models.student_group import StudentGroup
+    from app.models.user import User, UserRole
+
+    with SessionLocal() as db:
+        students = db.execute(
+            select(User.max_id).join(Student, Student.user_id == User.id)
+            .where(User.max_id.is_not(None)).order_by(User.max_id).limit(limit)
+        ).scalars().all()
+        curators = db.execute(
+            select(User.max_id, StudentGroup.id)
+            .join(StudentGroup, StudentGroup.curator_user_id == User.id)
+            .where(User.max_id.is_not(None), User.role.in_([UserRole.STAFF, UserRole.ADMIN]))
+            .order_by(User.max_id).limit(limit)
+        ).all()
+        admins = db.execute(
+            select(User.max_id).where(User.role == UserRole.ADMIN, User.max_id.is_not(None)).limit(limit)
+        ).scalars().all()
+    return Users(list(students), [(max_id, str(group_id)) for max_id, group_id in curators], list(admins))
+
+
+class LoadRunner:
+    def __init__(self, client: httpx.AsyncClient, users: Users, *, seed: int) -> None:
+        self.client = client
+        self.users = users
+        self.rng = random.Random(seed)
+        self.journeys: dict[str, JourneyStats] = defaultdict(JourneyStats)
+        self.steps: dict[str, list[float]] = defaultdict(list)
+        self.skipped: Counter = Counter()
+        self.in_flight = 0
+
+    async def _call(self, step: str, method: str, url: str, **kwargs) -> httpx.Response:
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.TimeoutException as exc:
+            raise JourneyError("timeout") from exc
+        except httpx.TransportError as exc:
+            raise JourneyError(type(exc).__name__) from exc
+        finally:
+            self.steps[step].append((time.perf_counter() - started) * 1000)
+        if response.status_code >= 400:
+            raise JourneyError(str(response.status_code))
+        return response
+
+    async def _login(self, max_id: int) -> dict:
+        response = await self._call("GET /auth/login-by-max-id", "GET", "/auth/login-by-max-id", params={"max_id": max_id})
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    async def schedule(self) -> None:
+        max_id = self.rng.choice(self.users.students)
+        await self._call("GET /schedule", "GET", "/schedule", params={"max_id": max_id})
+
+    async def profile(self) -> None:
+        headers = await self._login(self.rng.choice(self.users.students))
+        await self._call("GET /users/profile", "GET", "/users/profile", headers=headers)
+
+    async def payments(self) -> None:
+        max_id = self.rng.choice(self.users.students)
+        await self._call("GET /payments/status", "GET", "/payments/status", params={"user_id": max_id})
+
+    async def request(self) -> None:
+        headers = await self._login(self.rng.choice(self.users.students))
+        payload = {"request_type": "student_certificate", "content": "Справка по месту требования"}
+        await self._call("POST /requests", "POST", "/requests", json=payload, headers=headers)
+
+    async def broadcast(self) -> None:
+        max_id, group_id = self.rng.choice(self.users.curators)
+        headers = await self._login(max_id)
+        payload = {"title": "Нагрузочный тест", "message": "Пара переносится", "group_id": group_id}
+        await self._call("POST /broadcasts", "POST", "/broadcasts", json=payload, headers=headers)
+
+    async def reminder(self) -> None:
+        headers = await self._login(self.rng.choice(self.users.admins))
+        max_id = self.rng.choice(self.users.students)
+        await self._call("POST /payments/tuition/remind", "POST", f"/payments/tuition/remind/{max_id}", headers=headers)
+
+    async def _run_journey(self, name: str, journey: Callable[[], Awaitable[None]]) -> None:
+        stats = self.journeys[name]
+        started = time.perf_counter()
+        try:
+            await journey()
+            stats.statuses["ok"] += 1
+        except JourneyError as exc:
+            stats.errors += 1
+            stats.statuses[exc.status] += 1
+        finally:
+            stats.timings.append((time.perf_counter() - started) * 1000)
+            self.in_flight -= 1
+
+    async def run(self, phases: list[tuple[float, float]], mix: dict[str, float], max_concurrency: int) -> float:
+        names, weights = list(mix), list(mix.values())
+        tasks: set[asyncio.Task] = set()
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        phase_start = started
+        for duration, rate in phases:
+            next_at = phase_start
+            while True:
+                next_at += self.rng.expovariate(rate) if rate > 0 else duration
+                if next_at >= phase_start + duration:
+                    break
+                await asyncio.sleep(max(0.0, next_at - loop.time()))
+                name = self.rng.choices(names, weights)[0]
+                if self.in_flight >= max_concurrency:
+                    self.skipped[name] += 1
+                    continue
+                self.in_flight += 1
+                task = asyncio.create_task(self._run_journey(name, getattr(self, name)))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            phase_start += duration
+        if tasks:
+            await asyncio.wait(tasks)
+        return loop.time() - started
+
+    def report(self) -> dict:
+        def summary(timings: list[float]) -> dict:
+            return {
+                "p50_ms": round(statistics.median(timings), 2),
+                "p95_ms": round(_percentile(timings, 0.95), 2),
+                "p99_ms": round(_percentile(timings, 0.99), 2),
+                "max_ms": round(max(timings), 2),
+            }
+
+        journeys = {}
+        for name, stats in sorted(self.journeys.items()):
+            count = len(stats.timings)
+            journeys[name] = {
+                "count": count,
+                "errors": stats.errors,
+                "error_rate": round(stats.errors / count, 4),
+                "skipped": self.skipped.get(name, 0),
+                **summary(stats.timings),
+                "statuses": dict(stats.statuses),
+            }
+        steps = {name: {"count": len(timings), **summary(timings)} for name, timings in sorted(self.steps.items())}
+        return {"journeys": journeys, "requests": steps}
+
+
+def _seed(students: int, seed: int, env: dict) -> None:
+    subprocess.run(
+        [
+            sys.executable, str(BACKEND_DIR / "seed_bulk.py"),
+            "--seed", str(seed),
+            "--students", str(students),
+            "--teachers", str(max(1, students // 40)),
+            "--payments", str(students * 2),
+            "--requests", str(students // 10),
+        ],
+        env=env, check=True, stdout=subprocess.DEVNULL,
+    )
+
+
+def _spawn_backend(port: int, env: dict, workers: int) -> subprocess.Popen:
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(workers), "--log-level", "warning",
+        ],
+        cwd=BACKEND_DIR, env=env,
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Бэкенд завершился с кодом {process.returncode}")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1.0).status_code == 200:
+                return process
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("Бэкенд не ответил на /health за 60 секунд")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000", help="Адрес бэкенда (без /api/v1)")
+    parser.add_argument("--phases", type=_parse_phases, default=DEFAULT_PHASES, help="Фазы нагрузки: длительность@сценариев_в_секунду")
+    parser.add_argument("--mix", type=_parse_mix, default=DEFAULT_MIX, help="Доли сценариев: имя=вес,...")
+    parser.add_argument("--max-concurrency", type=int, default=200, help="Предел сценариев в работе")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Таймаут одного HTTP-запроса, с")
+    parser.add_argument("--users", type=int, default=50000, help="Сколько пользователей каждой роли взять из базы")
+    parser.add_argument("--seed", type=int, default=42, help="Зерно генератора (данные и выбор сценариев)")
+    parser.add_argument("--students", type=int, default=0, help="Создать временную базу с таким числом студентов")
+    parser.add_argument("--spawn-backend", action="store_true", help="Запустить uvicorn на свободном порту")
+    parser.add_argument("--workers", type=int, default=1, help="Процессов uvicorn для --spawn-backend")
+    parser.add_argument("--stub", action="store_true", help="Запустить заглушку /notify/* (с --spawn-backend)")
+    parser.add_argument("--stub-latency-ms", type=float, default=50.0, help="Задержка ответа заглушки")
+    parser.add_argument("--stub-jitter-ms", type=float, default=20.0, help="Разброс задержки заглушки")
+    parser.add_argument("--stub-error-rate", type=float, default=0.0, help="Доля ошибок заглушки")
+    parser.add_argument("--output", type=Path, default=None, help="Куда записать JSON (по умолчанию stdout)")
+    args = parser.parse_args()
+
+    stub: Optional[BotStub] = None
+    backend: Optional[subprocess.Popen] = None
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ)
+        if args.students:
+            env["DATABASE_URL"] = os.environ["DATABASE_URL"] = f"sqlite:///{tmp}/load.db"
+            env["STATIC_ROOT"] = os.environ["STATIC_ROOT"] = f"{tmp}/static"
+            _seed(args.students, args.seed, env)
+        users = _load_users(args.users)
+        if not users.students:
+            parser.error("В базе нет студентов с max_id — задайте --students или DATABASE_URL")
+        if "broadcast" in args.mix and not users.curators:
+            args.mix.pop("broadcast")
+        if "reminder" in args.mix and not users.admins:
+            args.mix.pop("reminder")
+
+        try:
+            if args.stub:
+                stub = BotStub(
+                    latency_ms=args.stub_latency_ms,
+                    jitter_ms=args.stub_jitter_ms,
+                    error_rate=args.stub_error_rate,
+                    token=env.get("BOT_NOTIFY_TOKEN", ""),
+                    seed=args.seed,
+                ).start()
+                env["BOT_NOTIFY_BASE_URL"] = stub.url
+            if args.spawn_backend:
+                port = _free_port()
+                backend = _spawn_backend(port, env, args.workers)
+                args.base_url = f"http://127.0.0.1:{port}"
+
+            async def run() -> tuple[LoadRunner, float]:
+                limits = httpx.Limits(max_connections=args.max_concurrency, max_keepalive_connections=args.max_concurrency)
+                async with httpx.AsyncClient(
+                    base_url=f"{args.base_url.rstrip('/')}/api/v1", timeout=args.timeout, limits=limits
+                ) as client:
+                    runner = LoadRunner(client, users, seed=args.seed)
+                    return runner, await runner.run(args.phases, args.mix, args.max_concurrency)
+
+            runner, elapsed = asyncio.run(run())
+        finally:
+            if backend is not None:
+                backend.terminate()
+                backend.wait(timeout=30)
+            if stub is not None:
+                stub.stop()
+
+    report = {
+        "revision": _git_revision(),
+        "base_url": args.base_url,
+        "phases": [{"seconds": seconds, "rate": rate} for seconds, rate in args.phases],
+        "mix": args.mix,
+        "max_concurrency": args.max_concurrency,
+        "elapsed_seconds": round(elapsed, 1),
+        "users": {"students": len(users.students), "curators": len(users.curators), "admins": len(users.admins)},
+        **runner.report(),
+        "bot_stub": stub.stats() if stub is not None else None,
+    }
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        args.output.write_text(output + "\n", encoding="utf-8")
+        print(f"Результаты записаны в {args.output}")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Скрипт сборки мусора в хранилище документов заявок
+Сверяет счётчики ссылок blob'ов с документами и удаляет неиспользуемые файлы.
+Запуск: python gc_document_blobs.py [--min-age 3600] [--dry-run]
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# Добавляем путь к приложению
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.db.session import SessionLocal
+# Импортируем все модели через base, чтобы relationships были правильно настроены
+from app.db.base import Base  # noqa: F401
+from app.services.document_store import collect_orphan_blobs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Сборка мусора в хранилище документов")
+    parser.add_argument("--min-age", type=int, default=3600, help="Не трогать файлы моложе N секунд")
+    parser.add_argument("--dry-run", action="store_true", help="Только показать, что будет удалено")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        result = collect_orphan_blobs(db, min_age_seconds=args.min_age, dry_run=args.dry_run)
+    finally:
+        db.close()
+
+    prefix = "🔍 [dry-run] " if args.dry_run else "🧹 "
+    print(f"{prefix}Исправлено счётчиков ссылок: {result.reconciled}")
+    print(f"{prefix}Удалено blob'ов: {result.removed_blobs}")
+    print(f"{prefix}Удалено файлов без записи в БД: {result.removed_files}")
+    print(f"✅ Освобождено: {result.freed_bytes / (1024 * 1024):.2f} МБ")
+
+
+if __name__ == "__main__":
+    main()
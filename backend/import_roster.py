@@ -0,0 +1,62 @@
+"""
+Скрипт массового импорта студентов и преподавателей из CSV/XLSX
+Запуск: python import_roster.py students students.xlsx --university-id <UUID> [--dry-run]
+        python import_roster.py teachers teachers.csv --university-id <UUID>
+Колонки файла — см. app/services/roster_import_service.py
+"""
+import argparse
+import sys
+import uuid
+from pathlib import Path
+
+# Добавляем путь к приложению
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.db.session import SessionLocal
+# Импортируем все модели через base, чтобы relationships были правильно настроены
+from app.db.base import Base  # noqa: F401
+from app.services.roster_import_service import RosterKind, import_roster
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Импорт студентов и преподавателей из CSV/XLSX")
+    parser.add_argument("kind", choices=[kind.value for kind in RosterKind], help="Что импортировать")
+    parser.add_argument("path", type=Path, help="Файл CSV или XLSX")
+    parser.add_argument("--university-id", type=uuid.UUID, required=True, help="UUID вуза")
+    parser.add_argument("--chunk-size", type=int, default=None, help="Строк в одной пачке")
+    parser.add_argument("--dry-run", action="store_true", help="Проверить файл без записи в БД")
+    parser.add_argument("--show-errors", type=int, default=20, help="Сколько ошибок напечатать")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        with args.path.open("rb") as file:
+            result = import_roster(
+                db,
+                kind=RosterKind(args.kind),
+                file=file,
+                filename=args.path.name,
+                university_id=args.university_id,
+                dry_run=args.dry_run,
+                chunk_size=args.chunk_size,
+            )
+    except ValueError as exc:
+        print(f"❌ {exc}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+    prefix = "🔍 [dry-run] " if args.dry_run else "📥 "
+    print(f"{prefix}Строк обработано: {result.processed}")
+    print(f"{prefix}Создано: {result.created}, обновлено: {result.updated}")
+    if result.failed:
+        print(f"⚠️  Строк с ошибками: {result.failed}")
+        for error in result.errors[:args.show_errors]:
+            key = f" [{error.key}]" if error.key else ""
+            print(f"   строка {error.row}{key}: {error.message}")
+    else:
+        print("✅ Ошибок нет")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,548 @@
+"""
+Генератор синтетических данных в масштабе университета (для бенчмарков)
+
+В отличие от seed_*.py, которые добавляют несколько заданных вручную
+записей через ORM, этот скрипт генерирует произвольный объём данных:
+вузы, факультеты, кафедры, группы, студентов, преподавателей, расписание,
+мероприятия с темами и регистрациями, рассылки, платежи и заявки.
+
+- Детерминированность: все идентификаторы, имена и связи выводятся из
+  --seed, даты — из --start-date (по умолчанию понедельник текущей недели,
+  чтобы часть мероприятий была предстоящей). При одинаковых параметрах
+  на пустой базе получаются одинаковые данные.
+- Скорость: строки собираются списками словарей и пишутся пачками через
+  Core insert (executemany), каждая пачка — отдельная транзакция.
+  100 000 студентов на SQLite укладываются в несколько десятков секунд.
+
+Поисковый индекс и версии кэша не трогаются: приложение перестраивает
+индекс при старте, если он расходится с данными.
+
+Запуск: python seed_bulk.py --students 100000 --seed 42 [--reset]
+"""
+import argparse
+from collections import Counter
+from datetime import date, datetime, time as dt_time, timedelta
+import json
+import random
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Sequence
+
+# Добавляем путь к приложению
+sys.path.insert(0, str(Path(__file__).parent))
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.db.session import engine
+# Импортируем все модели через base, чтобы relationships были правильно настроены
+from app.db.base import Base
+from app.models.broadcast import Broadcast
+from app.models.event import Event, EventFormat, EventRegistration, EventTopic, EventType, Topic
+from app.models.faculty import Faculty
+from app.models.kafedra import Kafedra
+from app.models.lesson import Lesson
+from app.models.lesson_group import LessonGroup
+from app.models.payment import Payment, PaymentStatus, PaymentType
+from app.models.request import Request, RequestStatus, RequestType
+from app.models.request_approval_step import ApprovalAction, RequestApprovalStep
+from app.models.room import Room
+from app.models.schedule_meta import ScheduleMeta
+from app.models.staff import Staff
+from app.models.student import Student
+from app.models.student_group import StudentGroup
+from app.models.subject import Subject
+from app.models.teacher import Teacher
+from app.models.timeslot import Timeslot
+from app.models.university import University
+from app.models.user import User, UserRole
+from app.services.event_service import topic_key
+from app.services.participant_counter_service import ensure_counter_triggers
+from app.services.search_service import drop_search_index
+
+CITIES = ["Москва", "Санкт-Петербург", "Новосибирск", "Казань", "Екатеринбург", "Томск", "Самара", "Пермь"]
+LAST_NAMES = [
+    "Иванов", "Петров", "Сидоров", "Смирнов", "Кузнецов", "Попов", "Васильев", "Соколов",
+    "Михайлов", "Новиков", "Фёдоров", "Морозов", "Волков", "Алексеев", "Лебедев", "Семёнов",
+    "Егоров", "Павлов", "Козлов", "Степанов", "Николаев", "Орлов", "Андреев", "Макаров",
+]
+FIRST_NAMES = [
+    "Александр", "Дмитрий", "Максим", "Сергей", "Андрей", "Алексей", "Артём", "Илья",
+    "Кирилл", "Михаил", "Никита", "Матвей", "Роман", "Егор", "Иван", "Павел",
+]
+PATRONYMICS = [
+    "Александрович", "Дмитриевич", "Сергеевич", "Андреевич", "Алексеевич", "Игоревич",
+    "Иванович", "Михайлович", "Павлович", "Викторович", "Олегович", "Николаевич",
+]
+FACULTY_TITLES = [
+    "Информационных технологий", "Прикладной математики", "Экономики", "Юридический",
+    "Физический", "Химический", "Филологический", "Исторический", "Психологии", "Журналистики",
+]
+GROUP_PREFIXES = ["ИВТ", "ПИ", "ПМ", "ЭК", "ЮР", "ФИЗ", "ХИМ", "ФИЛ", "ИСТ", "ПСИ"]
+SUBJECT_TITLES = [
+    "Математический анализ", "Линейная алгебра", "Программирование", "Базы данных",
+    "Операционные системы", "Алгоритмы и структуры данных", "Физика", "Философия",
+    "История России", "Иностранный язык", "Экономическая теория", "Статистика",
+    "Теория вероятностей", "Компьютерные сети", "Правоведение", "Физическая культура",
+]
+EVENT_KINDS = ["Лекция", "Мастер-класс", "Хакатон", "Конференция", "Турнир", "Встреча", "Воркшоп", "Олимпиада"]
+TOPICS = [
+    "IT", "Карьера", "Наука", "Спорт", "Культура", "Дизайн", "Бизнес", "Волонтёрство",
+    "Искусственный интеллект", "Предпринимательство", "Экология", "Медиа",
+]
+BUILDINGS = ["Главный корпус", "Корпус А", "Корпус Б", "Лабораторный корпус"]
+TIMESLOTS = [
+    (1, dt_time(9, 0), dt_time(10, 30)),
+    (2, dt_time(10, 40), dt_time(12, 10)),
+    (3, dt_time(12, 20), dt_time(13, 50)),
+    (4, dt_time(14, 0), dt_time(15, 30)),
+    (5, dt_time(15, 40), dt_time(17, 10)),
+    (6, dt_time(17, 20), dt_time(18, 50)),
+    (7, dt_time(19, 0), dt_time(20, 30)),
+    (8, dt_time(20, 40), dt_time(22, 10)),
+]
+# Сдвиг max_id, чтобы сгенерированные пользователи не пересекались с реальными
+MAX_ID_BASE = 900_000_000
+
+
+class _Writer:
+    """Пишет строки пачками: каждая пачка — executemany в своей транзакции"""
+
+    def __init__(self, engine: Engine, chunk_size: int) -> None:
+        self.engine = engine
+        self.chunk_size = chunk_size
+        self.stats: dict[str, dict] = {}
+
+    def insert(self, model, rows: Sequence[dict]) -> None:
+        started = time.perf_counter()
+        table = model.__table__
+        for offset in range(0, len(rows), self.chunk_size):
+            with self.engine.begin() as conn:
+                conn.execute(insert(table), rows[offset:offset + self.chunk_size])
+        stats = self.stats.setdefault(table.name, {"rows": 0, "seconds": 0.0})
+        stats["rows"] += len(rows)
+        stats["seconds"] += time.perf_counter() - started
+
+
+class _Generator:
+    def __init__(self, args: argparse.Namespace, writer: _Writer, offset: int, request_id: int) -> None:
+        self.args = args
+        self.writer = writer
+        self.rng = random.Random(args.seed)
+        # offset — сколько пользователей уже было в базе: номера билетов и max_id продолжают нумерацию
+        self.offset = offset
+        self.request_id = request_id
+        self.start = datetime.combine(args.start_date, dt_time(0, 0))
+
+    def new_id(self) -> uuid.UUID:
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    def full_name(self) -> str:
+        rng = self.rng
+        return f"{rng.choice(LAST_NAMES)} {rng.choice(FIRST_NAMES)} {rng.choice(PATRONYMICS)}"
+
+    def run(self) -> None:
+        self.structure()
+        self.people()
+        self.schedule()
+        self.events()
+        self.broadcasts()
+        self.payments()
+        self.requests()
+
+    def structure(self) -> None:
+        args, rng = self.args, self.rng
+        universities, faculties, kafedras, groups, rooms = [], [], [], [], []
+        for u in range(args.universities):
+            university_id = self.new_id()
+            city = CITIES[u % len(CITIES)]
+            universities.append({"id": university_id, "name": f"Университет №{u + 1} ({city})", "city": city})
+            rooms.extend(
+                {
+                    "id": self.new_id(),
+                    "university_id": university_id,
+                    "number": str(100 * (r // 20 + 1) + r % 20 + 1),
+                    "building": BUILDINGS[r % len(BUILDINGS)],
+                    "capacity": str(rng.choice((30, 60, 120))),
+                }
+                for r in range(args.rooms_per_university)
+            )
+            for f in range(args.faculties_per_university):
+                faculty_id = self.new_id()
+                title = FACULTY_TITLES[f % len(FACULTY_TITLES)]
+                faculties.append({"id": faculty_id, "university_id": university_id, "title": f"Факультет {title}"})
+                kafedras.extend(
+                    {"id": self.new_id(), "faculty_id": faculty_id, "title": f"Кафедра {k + 1}", "university_id": university_id}
+                    for k in range(args.kafedras_per_faculty)
+                )
+                prefix = GROUP_PREFIXES[f % len(GROUP_PREFIXES)]
+                groups.extend(
+                    {
+                        "id": self.new_id(),
+                        "faculty_id": faculty_id,
+                        "university_id": university_id,
+                        "name": f"{prefix}-{20 + g // 4}-{g % 4 + 1:02d}",
+                        "code": f"{prefix}{u + 1}{f + 1:02d}{g + 1:03d}",
+                    }
+                    for g in range(args.groups_per_faculty)
+                )
+        if not groups:
+            raise ValueError("Нужен хотя бы один вуз, факультет и группа")
+        self.universities, self.faculties, self.kafedras = universities, faculties, kafedras
+        self.groups, self.rooms = groups, rooms
+
+        self.writer.insert(University, universities)
+        self.writer.insert(Faculty, faculties)
+        self.writer.insert(Kafedra, [_columns(Kafedra, row) for row in kafedras])
+        self.writer.insert(Room, [_columns(Room, row) for row in rooms])
+
+    def people(self) -> None:
+        args, rng = self.args, self.rng
+        users, teachers, students = [], [], []
+
+        # Преподаватели: равномерно по кафедрам, каждая группа получает куратора со своего факультета
+        self.teachers_by_faculty: dict[uuid.UUID, list[uuid.UUID]] = {}
+        for i in range(args.teachers):
+            kafedra = self.kafedras[i % len(self.kafedras)]
+            user_id = self.new_id()
+            users.append(self._user(user_id, UserRole.STAFF, kafedra["university_id"], self.offset + i))
+            teachers.append({"user_id": user_id, "kafedra_id": kafedra["id"], "tab_number": f"GEN-T{self.offset + i:07d}"})
+            self.teachers_by_faculty.setdefault(kafedra["faculty_id"], []).append(user_id)
+        all_teachers = [row["user_id"] for row in teachers]
+        for group in self.groups:
+            candidates = self.teachers_by_faculty.get(group["faculty_id"]) or all_teachers
+            group["curator_user_id"] = rng.choice(candidates) if candidates else None
+
+        staff = []
+        base = self.offset + args.teachers
+        for u, university in enumerate(self.universities):
+            user_id = self.new_id()
+            users.append(self._user(user_id, UserRole.ADMIN, university["id"], base + u))
+            staff.append({"user_id": user_id, "university_id": university["id"], "tab_number": f"GEN-S{base + u:07d}"})
+
+        base += len(self.universities)
+        self.student_groups: list[dict] = []
+        for i in range(args.students):
+            group = self.groups[i % len(self.groups)]
+            user_id = self.new_id()
+            users.append(self._user(user_id, UserRole.STUDENT, group["university_id"], base + i))
+            students.append({
+                "user_id": user_id,
+                "faculty_id": group["faculty_id"],
+                "group_id": group["id"],
+                "student_card": f"GEN{base + i:08d}",
+            })
+            self.student_groups.append(group)
+        self.students = [row["user_id"] for row in students]
+
+        self.writer.insert(StudentGroup, [_columns(StudentGroup, row) for row in self.groups])
+        self.writer.insert(User, users)
+        self.writer.insert(Teacher, teachers)
+        self.writer.insert(Staff, staff)
+        self.writer.insert(Student, students)
+
+    def _user(self, user_id: uuid.UUID, role: UserRole, university_id: uuid.UUID, number: int) -> dict:
+        return {
+            "id": user_id,
+            "max_id": MAX_ID_BASE + number,
+            "role": role,
+            "full_name": self.full_name(),
+            "city": self.rng.choice(CITIES),
+            "university_id": university_id,
+            "created_at": self.start,
+        }
+
+    def schedule(self) -> None:
+        args, rng = self.args, self.rng
+        with self.writer.engine.connect() as conn:
+            existing_slots = set(conn.execute(select(Timeslot.pair_no)).scalars())
+            subjects = dict(conn.execute(select(Subject.title, Subject.id)).all())
+        missing_slots = [
+            {"pair_no": pair_no, "start": start, "end": end}
+            for pair_no, start, end in TIMESLOTS
+            if pair_no not in existing_slots
+        ]
+        new_subjects = [{"id": self.new_id(), "title": title} for title in SUBJECT_TITLES if title not in subjects]
+        subject_ids = list(subjects.values()) + [row["id"] for row in new_subjects]
+        self.writer.insert(Timeslot, missing_slots)
+        self.writer.insert(Subject, new_subjects)
+
+        rooms_by_university: dict[uuid.UUID, list[uuid.UUID]] = {}
+        for room in self.rooms:
+            rooms_by_university.setdefault(room["university_id"], []).append(room["id"])
+        all_teachers = [t for teachers in self.teachers_by_faculty.values() for t in teachers]
+        if args.lessons_per_week and (not all_teachers or not self.rooms):
+            raise ValueError("Для расписания нужны преподаватели и аудитории")
+
+        week_start = self.start.date()
+        lessons, lesson_groups, metas = [], [], []
+        for group in self.groups:
+            teachers = self.teachers_by_faculty.get(group["faculty_id"]) or all_teachers
+            rooms = rooms_by_university.get(group["university_id"]) or [room["id"] for room in self.rooms]
+            for n in range(args.lessons_per_week):
+                lesson_id = self.new_id()
+                lessons.append({
+                    "id": lesson_id,
+                    "teacher_user_id": rng.choice(teachers),
+                    "room_id": rng.choice(rooms),
+                    "subject_id": rng.choice(subject_ids),
+                    "pair_no": n % 6 + 1,
+                })
+                lesson_groups.append({"lesson_id": lesson_id, "group_id": group["id"]})
+            if args.lessons_per_week:
+                metas.append({
+                    "id": self.new_id(),
+                    "group_id": group["id"],
+                    "teacher_user_id": group["curator_user_id"],
+                    "week_start": week_start,
+                    "version": 1,
+                })
+        self.writer.insert(Lesson, lessons)
+        self.writer.insert(LessonGroup, lesson_groups)
+        self.writer.insert(ScheduleMeta, metas)
+
+    def events(self) -> None:
+        args, rng = self.args, self.rng
+        with self.writer.engine.connect() as conn:
+            topic_ids = dict(conn.execute(select(Topic.key, Topic.id)).all())
+        new_topics = []
+        for name in TOPICS:
+            key = topic_key(name)
+            if key not in topic_ids:
+                topic_ids[key] = self.new_id()
+                new_topics.append({"id": topic_ids[key], "name": name, "key": key})
+
+        events, links = [], []
+        for i in range(args.events):
+            event_id = self.new_id()
+            starts = self.start + timedelta(
+                days=rng.randint(-args.event_days // 6, args.event_days), hours=rng.randint(9, 19)
+            )
+            paid = rng.random() < 0.3
+            online = rng.random() < 0.25
+            topics = rng.sample(TOPICS, rng.randint(1, 3))
+            kind = rng.choice(EVENT_KINDS)
+            events.append({
+                "id": event_id,
+                "title": f"{kind}: {' и '.join(topics)} #{i + 1}",
+                "description": f"{kind} для студентов. Темы: {', '.join(topics)}.",
+                "date": starts,
+                "end_time": starts + timedelta(hours=rng.choice((1, 2, 3))),
+                "event_type": EventType.PAID if paid else EventType.FREE,
+                "price": rng.choice((50000, 100000, 150000)) if paid else None,
+                "format": EventFormat.ONLINE if online else EventFormat.OFFLINE,
+                "location": "https://meet.example.com/" + event_id.hex[:10] if online else rng.choice(BUILDINGS),
+                "max_participants": rng.choice((30, 50, 100, 200, 500)),
+                "current_participants": 0,
+                "speaker_name": self.full_name(),
+                "topics": json.dumps(topics, ensure_ascii=False),
+                "created_at": self.start - timedelta(days=30),
+                "updated_at": self.start - timedelta(days=30),
+            })
+            links.extend({"event_id": event_id, "topic_id": topic_ids[topic_key(name)]} for name in topics)
+
+        # Регистрации: уникальные пары (студент, мероприятие) без переполнения мест,
+        # current_participants сразу согласован с числом регистраций (при включённых
+        # триггерах счётчиков его считает БД при вставке регистраций)
+        registrations, seen = [], set()
+        taken: Counter = Counter()
+        if events and self.students:
+            attempts = 0
+            while len(registrations) < args.registrations and attempts < args.registrations * 3:
+                attempts += 1
+                e = rng.randrange(len(events))
+                s = rng.randrange(len(self.students))
+                if (e, s) in seen or taken[e] >= events[e]["max_participants"]:
+                    continue
+                seen.add((e, s))
+                taken[e] += 1
+                registrations.append({
+                    "id": self.new_id(),
+                    "event_id": events[e]["id"],
+                    "user_id": self.students[s],
+                    "registered_at": events[e]["created_at"] + timedelta(minutes=rng.randint(1, 40000)),
+                })
+        if not settings.counter_triggers_enabled:
+            for e, count in taken.items():
+                events[e]["current_participants"] = count
+        self.paid_events = [(row["id"], row["price"]) for row in events if row["price"]]
+
+        self.writer.insert(Topic, new_topics)
+        self.writer.insert(Event, events)
+        self.writer.insert(EventTopic, links)
+        self.writer.insert(EventRegistration, registrations)
+
+    def broadcasts(self) -> None:
+        args, rng = self.args, self.rng
+        broadcasts = []
+        for group in self.groups:
+            if group["curator_user_id"] is None:
+                continue
+            for n in range(args.broadcasts_per_group):
+                # Каждая третья рассылка — на весь факультет
+                for_faculty = n % 3 == 2
+                broadcasts.append({
+                    "id": self.new_id(),
+                    "author_user_id": group["curator_user_id"],
+                    "group_id": None if for_faculty else group["id"],
+                    "faculty_id": group["faculty_id"] if for_faculty else None,
+                    "title": f"Объявление {n + 1} для {group['name']}",
+                    "message": rng.choice((
+                        "Пара переносится в другую аудиторию.",
+                        "Напоминаем о сдаче курсовых работ до конца месяца.",
+                        "Консультация перед экзаменом состоится в пятницу.",
+                    )),
+                    "created_at": self.start - timedelta(days=rng.randint(0, 60), minutes=rng.randint(0, 1440)),
+                })
+        self.writer.insert(Broadcast, broadcasts)
+
+    def payments(self) -> None:
+        args, rng = self.args, self.rng
+        if not self.students:
+            return
+        statuses = [PaymentStatus.SUCCESS] * 6 + [PaymentStatus.PENDING] * 2 + [
+            PaymentStatus.FAILED, PaymentStatus.CANCELLED, PaymentStatus.REFUNDED,
+        ]
+        payments = []
+        for _ in range(args.payments):
+            payment_type = rng.choice((PaymentType.TUITION, PaymentType.TUITION, PaymentType.DORMITORY, PaymentType.EVENT))
+            event_id, amount = None, rng.choice((2500000, 4500000, 6000000))
+            period = f"{self.start.year}-{self.start.year + 1} учебный год, {rng.randint(1, 2)} семестр"
+            if payment_type == PaymentType.DORMITORY:
+                amount, period = rng.choice((150000, 250000)), f"{self.start.year}, месяц {rng.randint(1, 12)}"
+            elif payment_type == PaymentType.EVENT:
+                if not self.paid_events:
+                    continue
+                (event_id, amount), period = rng.choice(self.paid_events), None
+            status = rng.choice(statuses)
+            created = self.start - timedelta(days=rng.randint(0, 180), minutes=rng.randint(0, 1440))
+            payments.append({
+                "id": self.new_id(),
+                "user_id": rng.choice(self.students),
+                "payment_type": payment_type,
+                "amount": amount,
+                "status": status,
+                "event_id": event_id,
+                "period": period,
+                "description": f"Сгенерированный платёж ({payment_type.value})",
+                "created_at": created,
+                "updated_at": created,
+                "paid_at": created + timedelta(minutes=5) if status == PaymentStatus.SUCCESS else None,
+            })
+        self.writer.insert(Payment, payments)
+
+    def requests(self) -> None:
+        args, rng = self.args, self.rng
+        if not self.students:
+            return
+        types = [RequestType.STUDENT_CERTIFICATE] * 4 + [RequestType.ACADEMIC_LEAVE, RequestType.TRANSFER]
+        statuses = [RequestStatus.PENDING] * 2 + [RequestStatus.APPROVED, RequestStatus.REJECTED]
+        actions = {
+            RequestStatus.PENDING: ApprovalAction.PENDING,
+            RequestStatus.APPROVED: ApprovalAction.APPROVED,
+            RequestStatus.REJECTED: ApprovalAction.REJECTED,
+        }
+        requests, steps = [], []
+        for i in range(args.requests):
+            s = rng.randrange(len(self.students))
+            curator = self.student_groups[s]["curator_user_id"]
+            status = rng.choice(statuses)
+            created = self.start - timedelta(days=rng.randint(0, 90), minutes=rng.randint(0, 1440))
+            request_id = self.request_id + i
+            requests.append({
+                "id": request_id,
+                "request_type": rng.choice(types),
+                "author_user_id": self.students[s],
+                "status": status,
+                "content": "Прошу рассмотреть заявку",
+                "rejection_reason": "Недостаточно документов" if status == RequestStatus.REJECTED else None,
+                "current_approver_id": curator if status == RequestStatus.PENDING else None,
+                "created_at": created,
+                "updated_at": created,
+            })
+            steps.append({
+                "id": self.new_id(),
+                "request_id": request_id,
+                "step_order": 1,
+                "approver_user_id": curator,
+                "approver_role": "куратор",
+                "action": actions[status],
+                "processed_at": None if status == RequestStatus.PENDING else created + timedelta(days=1),
+                "created_at": created,
+            })
+        self.writer.insert(Request, requests)
+        self.writer.insert(RequestApprovalStep, steps)
+
+
+def _columns(model, row: dict) -> dict:
+    """Оставить только колонки таблицы (служебные ключи генератора отбрасываются)"""
+    return {key: value for key, value in row.items() if key in model.__table__.c}
+
+
+def _monday(value: date) -> date:
+    return value - timedelta(days=value.weekday())
+
+
+def _positive(value: str) -> int:
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError("значение не может быть отрицательным")
+    return number
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Генерация синтетических данных для бенчмарков")
+    parser.add_argument("--seed", type=int, default=42, help="Зерно генератора")
+    parser.add_argument("--universities", type=_positive, default=3)
+    parser.add_argument("--faculties-per-university", type=_positive, default=6)
+    parser.add_argument("--kafedras-per-faculty", type=_positive, default=4)
+    parser.add_argument("--groups-per-faculty", type=_positive, default=20)
+    parser.add_argument("--rooms-per-university", type=_positive, default=60)
+    parser.add_argument("--students", type=_positive, default=10000, help="Всего студентов (поровну по группам)")
+    parser.add_argument("--teachers", type=_positive, default=500, help="Всего преподавателей (поровну по кафедрам)")
+    parser.add_argument("--lessons-per-week", type=_positive, default=18, help="Пар в неделю у каждой группы")
+    parser.add_argument("--events", type=_positive, default=2000)
+    parser.add_argument("--event-days", type=_positive, default=180, help="На сколько дней вперёд планируются мероприятия")
+    parser.add_argument("--registrations", type=_positive, default=30000, help="Регистраций на мероприятия")
+    parser.add_argument("--broadcasts-per-group", type=_positive, default=3, help="Рассылок от куратора каждой группы")
+    parser.add_argument("--payments", type=_positive, default=20000)
+    parser.add_argument("--requests", type=_positive, default=10000)
+    parser.add_argument("--start-date", type=date.fromisoformat, default=None,
+                        help="Начало учебной недели (YYYY-MM-DD), по умолчанию текущая неделя")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="Строк в одной транзакции")
+    parser.add_argument("--reset", action="store_true", help="Удалить все таблицы и создать заново")
+    args = parser.parse_args()
+    args.start_date = _monday(args.start_date or date.today())
+
+    if args.reset:
+        print("🗑️  Пересоздаём таблицы...")
+        drop_search_index(engine)
+        Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    ensure_counter_triggers(engine)
+
+    with engine.connect() as conn:
+        offset = conn.execute(select(func.count(User.id))).scalar() or 0
+        request_id = (conn.execute(select(func.max(Request.id))).scalar() or 0) + 1
+
+    writer = _Writer(engine, args.chunk_size)
+    started = time.perf_counter()
+    try:
+        _Generator(args, writer, offset, request_id).run()
+    except ValueError as exc:
+        print(f"❌ {exc}")
+        sys.exit(1)
+    elapsed = time.perf_counter() - started
+
+    for table, stats in writer.stats.items():
+        if stats["rows"]:
+            print(f"  ✓ {table}: {stats['rows']} строк за {stats['seconds']:.2f} с")
+    print(f"✅ Готово за {elapsed:.1f} с (seed={args.seed}, неделя с {args.start_date})")
+    print("ℹ️  Поисковый индекс перестроится при следующем запуске приложения")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,7 +11,7 @@ import random
 sys.path.insert(0, str(Path(__file__).parent))
 
 from sqlalchemy.orm import Session, configure_mappers
-from app.db.session import SessionLocal
+from app.db.session import SessionLocal, engine
 from app.db.base import Base
 
 # Импортируем все модели для правильной инициализации relationships
@@ -28,6 +28,7 @@ from app.models.faculty import Faculty
 from app.models.kafedra import Kafedra
 from app.models.payment import Payment, PaymentType, PaymentStatus
 from app.models.broadcast import Broadcast
+from app.services.participant_counter_service import adjust_counter, ensure_counter_triggers
 
 # Настраиваем все relationships перед использованием
 try:
@@ -81,8 +82,8 @@ def seed_event_registrations(db: Session):
             )
             db.add(registration)
             
-            # Увеличиваем счетчик участников
-            event.current_participants += 1
+            # Увеличиваем счетчик участников (при включённых триггерах его увеличит БД)
+            adjust_counter(db, event, "current_participants", 1)
             created_count += 1
     
     db.commit()
@@ -135,8 +136,8 @@ def seed_elective_registrations(db: Session):
             )
             db.add(registration)
             
-            # Увеличиваем счетчик участников
-            elective.current_students += 1
+            # Увеличиваем счетчик участников (при включённых триггерах его увеличит БД)
+            adjust_counter(db, elective, "current_students", 1)
             created_count += 1
     
     db.commit()
@@ -435,6 +436,8 @@ def main():
     print("Заполнение базы данных регистрациями и заявками")
     print("=" * 60)
     
+    # Триггеры счётчиков должны соответствовать настройке ещё до запуска приложения
+    ensure_counter_triggers(engine)
     db: Session = SessionLocal()
     
     try:
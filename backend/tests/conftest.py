@@ -0,0 +1,43 @@
+"""
+Общие фикстуры тестов backend
+
+Приложение импортируется с временной SQLite-базой: настройки читаются из
+окружения при импорте, поэтому переменные задаются до импорта app.
+"""
+import os
+from pathlib import Path
+import sys
+import tempfile
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+_TMP = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{_TMP.name}/test.db"
+os.environ["STATIC_ROOT"] = f"{_TMP.name}/static"
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.core.security import create_access_token  # noqa: E402
+from app.db.session import SessionLocal  # noqa: E402
+from app.main import app, prepare_database  # noqa: E402
+
+# Клиенты тестов без lifespan — подготовку БД из startup выполняем сами
+prepare_database()
+
+
+@pytest.fixture
+def db():
+    with SessionLocal() as session:
+        yield session
+
+
+@pytest.fixture
+def client():
+    # Без lifespan: фоновые задачи не запускаются и не добавляют SQL-запросов
+    return TestClient(app)
+
+
+def auth_headers(user) -> dict:
+    return {"Authorization": f"Bearer {create_access_token(subject=str(user.id))}"}
@@ -0,0 +1,51 @@
+"""
+Кэш списка элективов: ETag меняется при смене имени преподавателя и при правках в одну секунду
+"""
+import pytest
+
+from app.models.elective import Elective
+from app.models.user import User, UserRole
+
+
+@pytest.fixture
+def electives(db):
+    teacher = User(role=UserRole.STAFF, full_name="Преподаватель Старый", city="Москва")
+    db.add(teacher)
+    db.flush()
+    items = [
+        Elective(title=f"Электив {i}", teacher_user_id=teacher.id, max_students=10, is_active=1)
+        for i in range(2)
+    ]
+    db.add_all(items)
+    db.commit()
+    yield teacher, items
+    for item in items:
+        db.delete(item)
+    db.delete(teacher)
+    db.commit()
+
+
+def _get(client):
+    response = client.get("/api/v1/electives")
+    assert response.status_code == 200, response.text
+    return response
+
+
+def test_teacher_rename_invalidates_etag(client, db, electives):
+    teacher, _ = electives
+    etag = _get(client).headers["etag"]
+    teacher.full_name = "Преподаватель Новый"
+    db.commit()
+    response = _get(client)
+    assert response.headers["etag"] != etag
+    assert {item["teacher_full_name"] for item in response.json()} == {"Преподаватель Новый"}
+
+
+def test_edits_within_one_second_invalidate_etag(client, db, electives):
+    _, (first, second) = electives
+    first.title = "Электив первый"
+    db.commit()
+    etag = _get(client).headers["etag"]
+    second.title = "Электив второй"
+    db.commit()
+    assert _get(client).headers["etag"] != etag
@@ -0,0 +1,56 @@
+"""
+Кэш личного кабинета: ETag зависит только от данных самого пользователя
+"""
+import pytest
+
+from app.models.university import University
+from app.models.user import User, UserRole
+
+from conftest import auth_headers
+
+
+@pytest.fixture
+def users(db):
+    university = University(name="Тестовый университет", city="Москва")
+    db.add(university)
+    db.flush()
+    first, second = (
+        User(role=UserRole.STAFF, full_name=f"Сотрудник {i}", city="Москва", university_id=university.id)
+        for i in range(2)
+    )
+    db.add_all([first, second])
+    db.commit()
+    return first, second
+
+
+def _etag(client, user) -> str:
+    response = client.get("/api/v1/users/profile", headers=auth_headers(user))
+    assert response.status_code == 200, response.text
+    return response.headers["etag"]
+
+
+def test_other_user_change_keeps_etag(client, db, users):
+    first, second = users
+    etag = _etag(client, first)
+    second.full_name = "Сотрудник Переименованный"
+    db.commit()
+    assert _etag(client, first) == etag
+    response = client.get("/api/v1/users/profile", headers={**auth_headers(first), "If-None-Match": etag})
+    assert response.status_code == 304
+
+
+def test_own_change_invalidates_etag(client, db, users):
+    first, _ = users
+    etag = _etag(client, first)
+    first.full_name = "Сотрудник Новый"
+    db.commit()
+    assert _etag(client, first) != etag
+    assert client.get("/api/v1/users/profile", headers=auth_headers(first)).json()["full_name"] == "Сотрудник Новый"
+
+
+def test_verification_keeps_etag(client, db, users):
+    first, _ = users
+    etag = _etag(client, first)
+    first.max_id = 123456
+    db.commit()
+    assert _etag(client, first) == etag
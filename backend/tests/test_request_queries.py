@@ -0,0 +1,69 @@
+"""
+Число SQL-запросов эндпоинтов заявок
+
+Сборка ответа не должна догружать отношения по одному (N+1): число
+запросов фиксировано и не зависит от числа шагов и документов.
+"""
+import pytest
+
+from app.core.query_stats import query_budget
+from app.models.request import Request, RequestStatus, RequestType
+from app.models.request_approval_step import ApprovalAction, RequestApprovalStep
+from app.models.request_document import RequestDocument
+from app.models.user import User, UserRole
+
+from conftest import auth_headers
+
+
+@pytest.fixture
+def request_with_steps(db):
+    author = User(role=UserRole.STUDENT, full_name="Автор Заявки", city="Москва")
+    approvers = [User(role=UserRole.STAFF, full_name=f"Согласующий {i}", city="Москва") for i in range(3)]
+    db.add_all([author, *approvers])
+    db.flush()
+    for i in range(3):
+        request = Request(
+            request_type=RequestType.ACADEMIC_LEAVE,
+            author_user_id=author.id,
+            status=RequestStatus.PENDING,
+            content=f"Заявка {i}",
+            current_approver_id=approvers[0].id,
+        )
+        request.approval_steps = [
+            RequestApprovalStep(step_order=order, approver_user_id=approver.id, action=ApprovalAction.PENDING)
+            for order, approver in enumerate(approvers, start=1)
+        ]
+        request.documents = [
+            RequestDocument(filename=f"doc{n}.pdf", file_path=f"requests/doc{n}.pdf", file_size=10)
+            for n in range(4)
+        ]
+        db.add(request)
+    db.commit()
+    return author, approvers[0], request.id
+
+
+def _count_queries(call) -> int:
+    with query_budget() as captured:
+        response = call()
+    assert response.status_code == 200, response.text
+    return captured.count
+
+
+def test_request_detail_queries(client, request_with_steps):
+    author, _, request_id = request_with_steps
+    headers = auth_headers(author)
+    # Пользователь, заявка с автором и согласующим, шаги с согласующими, документы
+    assert _count_queries(lambda: client.get(f"/api/v1/requests/{request_id}", headers=headers)) == 4
+
+
+def test_my_requests_queries(client, request_with_steps):
+    author, _, _ = request_with_steps
+    headers = auth_headers(author)
+    # Пользователь и заявки с автором и согласующим
+    assert _count_queries(lambda: client.get("/api/v1/requests/my", headers=headers)) == 2
+
+
+def test_approval_requests_queries(client, request_with_steps):
+    _, approver, _ = request_with_steps
+    headers = auth_headers(approver)
+    assert _count_queries(lambda: client.get("/api/v1/requests/approval", headers=headers)) == 2